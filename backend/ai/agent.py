@@ -1,7 +1,14 @@
+import threading
+import weakref
+
 from dotenv import load_dotenv
 from langchain_core.messages import HumanMessage, SystemMessage
 
-from .graph import graph
+from .conversation_store import Conversation, bound_history, get_conversation_store
+from .deadline import AGENT_DEADLINE_SECONDS, deadline_scope
+from .graph import graph, memo_from_messages
+from .prefetch import prefetch_messages
+from .token_budget import usage_report
 
 SYSTEM_PROMPT = SystemMessage(content="""
 You are a knowledgeable and structured Bible study assistant with access to a Bible database.
@@ -11,7 +18,7 @@ Your job is to help users explore scripture through direct lookups, semantic sim
 - `available_translations`: Call this first if the user has not specified a translation, or if you are unsure what translations are in the database.
 - `list_books`: Use this to retrieve all books available in the database. Call this if the user references a book you are unsure about or to validate a book name before lookup.
 - `list_chapters`: Use this to retrieve all chapters available for a given book and translation. Useful when the user asks how long a book is or before fetching an entire book.
-- `scripture_lookup`: Use this to retrieve the raw text of a specific verse or chapter by reference (e.g. "Matthew 6:34", "John 3"). Always use this before semantic_search when the user provides a verse reference.
+- `scripture_lookup`: Use this to retrieve the raw text of a specific verse or chapter by reference (e.g. "Matthew 6:34", "John 3"). Always use this before semantic_search when the user provides a verse reference. If the conversation already contains a `scripture_lookup` result for a reference, use that text instead of calling the tool again.
 - `semantic_search`: Use this to find thematically or semantically similar verses. You MUST pass raw verse text — never a reference string like "Matthew 6:34". Always call scripture_lookup first to get the verse text, then pass that text into semantic_search.
 - `keyword_search`: Use this to find verses containing a specific word or phrase (e.g. "love", "fear not"). This is a literal text match, not meaning-based. Use this when the user asks for verses that mention a specific word.
 - `cross_translation_compare`: Use this when the user wants to see how different translations render the same verse or chapter side by side.
@@ -106,11 +113,75 @@ def _content_to_text(content) -> str:
         return str(content)
 
 
-def send_prompt(prompt: str) -> str:
+# One agent run at a time per conversation, so concurrent follow-ups don't overwrite each other's history
+_conversation_locks: weakref.WeakValueDictionary[str, threading.Lock] = weakref.WeakValueDictionary()
+_conversation_locks_guard = threading.Lock()
+
+
+def _conversation_lock(conversation_id: str) -> threading.Lock:
+    with _conversation_locks_guard:
+        lock = _conversation_locks.get(conversation_id)
+        if lock is None:
+            lock = threading.Lock()
+            _conversation_locks[conversation_id] = lock
+        return lock
+
+
+def _system_prompt(summary: str) -> SystemMessage:
+    if not summary:
+        return SYSTEM_PROMPT
+    return SystemMessage(content=f"{SYSTEM_PROMPT.content}\n## Earlier in this conversation\n{summary}\n")
+
+
+def run_prompt(prompt: str, conversation_id: str | None = None) -> tuple[str, dict]:
+    """
+    Run the agent and return its answer with the request's token and tool
+    timing report. With a conversation id, earlier turns (including their
+    tool results) are loaded first and the new turn is saved afterwards.
+    The whole run shares one AGENT_DEADLINE_SECONDS budget; past it the answer
+    is built from the tool results fetched so far.
+    """
+    if conversation_id is None:
+        with deadline_scope(AGENT_DEADLINE_SECONDS):
+            return _run_agent(prompt, Conversation([], ""))[:2]
+
+    with _conversation_lock(conversation_id), deadline_scope(AGENT_DEADLINE_SECONDS):
+        store = get_conversation_store()
+        answer, report, history = _run_agent(prompt, store.load(conversation_id))
+        store.save(conversation_id, bound_history(history))
+        return answer, report
+
+
+def record_exchange(conversation_id: str, prompt: str, answer: str) -> None:
+    """Add a turn that was answered without the agent, so follow-ups can refer back to it."""
+    with _conversation_lock(conversation_id):
+        get_conversation_store().append_exchange(conversation_id, prompt, answer)
+
+
+def _run_agent(prompt: str, conversation: Conversation) -> tuple[str, dict, Conversation]:
+    # References named in the prompt arrive pre-resolved as scripture_lookup results
+    messages = [
+        _system_prompt(conversation.summary),
+        *conversation.messages,
+        HumanMessage(content=prompt),
+        *prefetch_messages(prompt),
+    ]
     result = agent.invoke({
-        "messages": [SYSTEM_PROMPT, HumanMessage(content=prompt)]
+        "messages": messages,
+        "token_usage": [],
+        "tool_memo": memo_from_messages(messages),
+        "tool_timings": [],
     })
 
     last_message = result["messages"][-1]
     content = getattr(last_message, "content", last_message)
-    return _content_to_text(content)
+    report = usage_report(result.get("token_usage", []))
+    report["tool_timings"] = result.get("tool_timings", [])
+
+    history = Conversation(list(result["messages"][1:]), conversation.summary)
+    return _content_to_text(content), report, history
+
+
+def send_prompt(prompt: str, conversation_id: str | None = None) -> str:
+    answer, _ = run_prompt(prompt, conversation_id)
+    return answer
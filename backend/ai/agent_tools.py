@@ -1,5 +1,8 @@
+import json
 import logging
+import os
 import re
+import threading
 from typing import Any
 
 from langchain_core.messages import HumanMessage, SystemMessage
@@ -8,9 +11,14 @@ from langchain_core.tools import tool
 from sentence_transformers import SentenceTransformer
 from sqlmodel import Session
 
-from .model import model
-from ..schemas.scripture import ScriptureQuery
+from .llm_policy import invoke_with_policy
+from .model import model, fallback_model, MODEL_NAME
+from ..schemas.scripture import ScriptureQuery, SEMANTIC_SEARCH_TRANSLATION
 from ..db_session import engine
+from ..services.embedding_store import EmbeddingStore
+from ..services.llm_cache import llm_cache
+from ..services.metrics import traced
+from ..services.single_flight import SingleFlight
 from ..services.sql_service import (
     get_translation,
     get_book,
@@ -18,6 +26,9 @@ from ..services.sql_service import (
     get_verses,
     list_translations,
     get_semantic_similar_verses,
+    get_semantic_similar_verses_among,
+    get_verse_embeddings,
+    get_verses_by_ids,
     get_books,
     get_book_chapters,
     keyword_search_verses # NEW: SELECT ... FROM verses WHERE verse_text ILIKE %query%
@@ -28,6 +39,24 @@ logger = logging.getLogger("backend.ai.tools.agent_tools")
 embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
 
 
+@traced("embedding", "all-MiniLM-L6-v2")
+def encode_text(text: str):
+    return embedding_model.encode(text)
+
+
+# Compressed in-process embedding index (float16 | int8 | binary | float32).
+# Unset keeps semantic_search entirely on pgvector.
+EMBEDDING_STORAGE = os.getenv("EMBEDDING_STORAGE")
+EMBEDDING_STORE_PATH = os.getenv("EMBEDDING_STORE_PATH")
+EMBEDDING_RERANK_FACTOR = int(os.getenv("EMBEDDING_RERANK_FACTOR", "10"))
+
+# Concurrent identical tool calls (across requests) share one DB query / LLM call
+tool_flight = SingleFlight(timeout=float(os.getenv("TOOL_SINGLE_FLIGHT_TIMEOUT_SECONDS", "60")))
+
+_embedding_store: EmbeddingStore | None = None
+_embedding_store_lock = threading.Lock()
+
+
 def _preview(value: Any, limit: int = 200) -> str:
     """Return a safe, short preview string for logs."""
     try:
@@ -39,35 +68,123 @@ def _preview(value: Any, limit: int = 200) -> str:
     return s
 
 
+def _load_embedding_store() -> EmbeddingStore | None:
+    """The saved index, if it was written for the configured mode and the semantic search translation."""
+    if not EMBEDDING_STORE_PATH or not os.path.exists(EMBEDDING_STORE_PATH):
+        return None
+    store = EmbeddingStore.load(EMBEDDING_STORE_PATH)
+    if store.mode != EMBEDDING_STORAGE or store.translation != SEMANTIC_SEARCH_TRANSLATION:
+        logger.warning(
+            "embedding_store ignored path=%s mode=%s translation=%s (want mode=%s translation=%s)",
+            EMBEDDING_STORE_PATH, store.mode, store.translation, EMBEDDING_STORAGE, SEMANTIC_SEARCH_TRANSLATION,
+        )
+        return None
+    return store
+
+
+def warm_embedding_store() -> None:
+    """
+    Load the compressed verse index from EMBEDDING_STORE_PATH, or build it from
+    the DB when the saved one is missing or stale. Runs at startup so no
+    request pays for the build.
+    """
+    global _embedding_store
+    if not EMBEDDING_STORAGE:
+        return
+    with _embedding_store_lock:
+        if _embedding_store is not None:
+            return
+
+        store = _load_embedding_store()
+        if store is not None:
+            logger.info("embedding_store loaded path=%s mode=%s verses=%s", EMBEDDING_STORE_PATH, store.mode, len(store))
+        else:
+            with Session(engine) as session:
+                rows = get_verse_embeddings(SEMANTIC_SEARCH_TRANSLATION, session)
+            store = EmbeddingStore.encode(
+                [row.id for row in rows],
+                [json.loads(row.verse_embedding) for row in rows],
+                mode=EMBEDDING_STORAGE,
+                translation=SEMANTIC_SEARCH_TRANSLATION,
+            )
+            if EMBEDDING_STORE_PATH:
+                store.save(EMBEDDING_STORE_PATH)
+            logger.info("embedding_store built mode=%s verses=%s bytes=%s", store.mode, len(store), store.nbytes)
+        _embedding_store = store
+
+
+def _semantic_search_rows(embedding, session: Session, limit: int = 20):
+    store = _embedding_store
+    if store is None:
+        # Storage off, or the index is not warmed yet: pgvector answers
+        return get_semantic_similar_verses(embedding.tolist(), session, limit=limit)
+
+    if store.mode == "binary":
+        # Hamming pre-filter in process, exact cosine re-rank of the candidates in pgvector
+        candidate_ids, _ = store.candidates(embedding, limit * EMBEDDING_RERANK_FACTOR)
+        return get_semantic_similar_verses_among(embedding.tolist(), candidate_ids.tolist(), session, limit=limit)
+
+    hits = store.search(embedding, limit=limit)
+    return get_verses_by_ids([verse_id for verse_id, _ in hits], session)
+
+
 def _norm_shortname(s: Any) -> str:
     """Normalize translation shortname for DB lookup (e.g., 'niv' -> 'NIV')."""
     if s is None:
         return ""
     return str(s).strip().upper()
 
+
+# Bump when a prompt below changes so stale cached output is not served
+BOOK_CONTEXT_PROMPT_VERSION = "1"
+VERSE_COMMENTARY_PROMPT_VERSION = "1"
+
+
+def generate_book_context(book: str, refresh: bool = False):
+    def compute():
+        messages = [
+            SystemMessage(content="You are a Bible scholar. Return only factual, historically grounded information. No speculation."),
+            HumanMessage(content=f"Give a concise scholarly overview of the book of {book}: authorship, date written, original audience, historical setting, and major themes.")
+        ]
+        return invoke_with_policy(model, messages, fallback=fallback_model)[0].content
+
+    return llm_cache.get_or_set(
+        "get_book_context",
+        {"book": book},
+        f"{MODEL_NAME}:{BOOK_CONTEXT_PROMPT_VERSION}",
+        compute,
+        refresh=refresh,
+    )
+
+
 @tool(description="Get historical and cultural background context for a Bible book. "
                   "Use this when the user asks about the meaning, background, or setting of a passage.")
+@tool_flight.wrap("get_book_context")
 def get_book_context(book: str) -> str:
-    messages = [
-        SystemMessage(content="You are a Bible scholar. Return only factual, historically grounded information. No speculation."),
-        HumanMessage(content=f"Give a concise scholarly overview of the book of {book}: authorship, date written, original audience, historical setting, and major themes.")
-    ]
-    response = model.invoke(messages)
-    return response.content
+    return generate_book_context(book)
 
 
 @tool(description="Get scholarly commentary and explanation for a specific Bible verse or passage. "
                   "Use this AFTER retrieving the verse text to provide deeper meaning and context.")
+@tool_flight.wrap("get_verse_commentary")
 def get_verse_commentary(book: str, chapter: int, verse: int, verse_text: str) -> str:
-    messages = [
-        SystemMessage(content="You are a Bible scholar providing study commentary. Be concise, accurate, and cite relevant cross-references where helpful."),
-        HumanMessage(content=f"Provide study commentary for {book} {chapter}:{verse} — \"{verse_text}\". Include: literary context, meaning of key words, theological significance, and 1-2 cross-references.")
-    ]
-    response = model.invoke(messages)
-    return response.content
+    def compute():
+        messages = [
+            SystemMessage(content="You are a Bible scholar providing study commentary. Be concise, accurate, and cite relevant cross-references where helpful."),
+            HumanMessage(content=f"Provide study commentary for {book} {chapter}:{verse} — \"{verse_text}\". Include: literary context, meaning of key words, theological significance, and 1-2 cross-references.")
+        ]
+        return invoke_with_policy(model, messages, fallback=fallback_model)[0].content
+
+    return llm_cache.get_or_set(
+        "get_verse_commentary",
+        {"book": book, "chapter": chapter, "verse": verse, "verse_text": verse_text},
+        f"{MODEL_NAME}:{VERSE_COMMENTARY_PROMPT_VERSION}",
+        compute,
+    )
 
 
 @tool(description="List the Bible translations that are available in the database (shortnames like KJV, BSB).")
+@tool_flight.wrap("available_translations")
 def available_translations() -> str:
     logger.info("tool_called available_translations")
     try:
@@ -87,29 +204,25 @@ def available_translations() -> str:
 @tool(description="Given RAW text (not a reference or question),"
                   "find semantically similar verses across the Bible. "
                   "Use this AFTER you already have the verse text from scripture_lookup")
+@tool_flight.wrap("semantic_search")
 def semantic_search(verse_text: str) -> str:
     if re.match(r'^[\w\s]+\d+:\d+$', verse_text.strip()):
         return "Error: you must pass the actual verse text"
 
     try:
-        embedding = embedding_model.encode(verse_text)
-        embedding_list = embedding.tolist()
-        logger.info(f"semantic_search embedding_list = {verse_text}")
-        logger.info(
-            f"tool_return semantic_search result = %s\n size of embedding = %s",
-            _preview(embedding_list),
-            embedding.shape[0]
-        )
+        embedding = encode_text(verse_text)
+        logger.info("tool_called semantic_search text=%s dims=%s", _preview(verse_text, 80), embedding.shape[0])
 
         with Session(engine) as session:
-            result_rows = get_semantic_similar_verses(embedding_list, session)
+            result_rows = _semantic_search_rows(embedding, session)
 
         formatted = "\n".join(
             f"({row.translation_shortname}) {row.name} {row.chapter_num}:{row.verse_num} - {row.verse_text}"
             for row in result_rows
         )
         result = f"Semantic search results:\n{formatted}"
-        logger.info(result)
+        logger.info("tool_return semantic_search rows=%s chars=%s", len(result_rows), len(result))
+        logger.debug("tool_return semantic_search result = %s", _preview(result))
         return result
     except Exception:
         logger.exception("TOOL_ERROR!!! semantic_search query=%s", _preview(verse_text))
@@ -119,9 +232,11 @@ def semantic_search(verse_text: str) -> str:
 @tool(
     description="Look up scripture verses by translation, book, chapter, and verse number in the database. Returns raw verse text only."
 )
+@tool_flight.wrap("scripture_lookup")
 def scripture_lookup(query: ScriptureQuery) -> str:
     query_translation = _norm_shortname(query.translation)
-    logger.info(f"tool_return scripture_lookup query_translation = {query_translation}")
+    logger.info("tool_called scripture_lookup translation=%s book=%s chapter=%s verse=%s",
+                query_translation, query.book, query.chapter, query.verse)
 
     try:
         with Session(engine) as session:
@@ -159,6 +274,7 @@ def scripture_lookup(query: ScriptureQuery) -> str:
 @tool(description="List all books of the Bible available in the database. "
                   "Returns book names in canonical order. "
                   "Use this to validate a book name before calling scripture_lookup.")
+@tool_flight.wrap("list_books")
 def list_books() -> str:
     logger.info("tool_called list_books")
     try:
@@ -174,28 +290,38 @@ def list_books() -> str:
         raise
 
 
+def book_chapters(book: str, translation: str = "BSB") -> list[int] | str:
+    """Sorted chapter numbers of `book`, or a "not found" message for the user."""
+    query_translation = _norm_shortname(translation)
+    with Session(engine) as session:
+        trans = get_translation(query_translation, session)
+        if not trans:
+            return f"Translation '{query_translation}' not found."
+
+        book_obj = get_book(book, session)
+        if not book_obj:
+            return f"Book '{book}' not found."
+
+        chapters = get_book_chapters(trans, book_obj, session)
+        if not chapters:
+            return f"No chapters found for {book} in {query_translation}."
+    return sorted(chapters)
+
+
 @tool(description="Get all chapters available for a given book and translation. "
                   "Returns a list of chapter numbers. "
                   "Useful before calling scripture_lookup to know what chapters exist.")
+@tool_flight.wrap("list_chapters")
 def list_chapters(book: str, translation: str = "BSB") -> str:
     query_translation = _norm_shortname(translation)
     logger.info("tool_called list_chapters book=%s translation=%s", book, query_translation)
 
     try:
-        with Session(engine) as session:
-            trans = get_translation(query_translation, session)
-            if not trans:
-                return f"Translation '{query_translation}' not found."
-
-            book_obj = get_book(book, session)
-            if not book_obj:
-                return f"Book '{book}' not found."
-
-            chapters = get_book_chapters(trans, book_obj, session)
-            if not chapters:
-                return f"No chapters found for {book} in {query_translation}."
+        chapters = book_chapters(book, query_translation)
+        if isinstance(chapters, str):
+            return chapters
 
-        nums = ", ".join(str(c) for c in sorted(chapters))
+        nums = ", ".join(str(c) for c in chapters)
         result = f"{book} ({query_translation}) has chapters: {nums}"
         logger.info("tool_return list_chapters result = %s", _preview(result))
         return result
@@ -208,6 +334,7 @@ def list_chapters(book: str, translation: str = "BSB") -> str:
                   "Use this when the user wants to find verses mentioning a topic or word, "
                   "not for semantic/meaning-based search. "
                   "Optionally filter by translation and book.")
+@tool_flight.wrap("keyword_search")
 def keyword_search(query: str, translation: str = "BSB", book: str = None, limit: int = 10) -> str:
     query_translation = _norm_shortname(translation)
     logger.info(
@@ -237,7 +364,8 @@ def keyword_search(query: str, translation: str = "BSB", book: str = None, limit
             for row in results
         )
         result = f"Keyword search results for '{query}':\n{formatted}"
-        logger.info("tool_return keyword_search result = %s", _preview(result))
+        logger.info("tool_return keyword_search rows=%s chars=%s", len(results), len(result))
+        logger.debug("tool_return keyword_search result = %s", _preview(result))
         return result
     except Exception:
         logger.exception("TOOL_ERROR!!! keyword_search query=%s", _preview(query))
@@ -247,6 +375,7 @@ def keyword_search(query: str, translation: str = "BSB", book: str = None, limit
 @tool(description="Compare the same verse or chapter across multiple Bible translations side by side. "
                   "Use this when the user wants to see how different translations render the same passage. "
                   "Provide a book, chapter, and optionally a verse number.")
+@tool_flight.wrap("cross_translation_compare")
 def cross_translation_compare(book: str, chapter: int, verse: int = None) -> str:
     logger.info(
         "tool_called cross_translation_compare book=%s chapter=%s verse=%s",
@@ -287,7 +416,8 @@ def cross_translation_compare(book: str, chapter: int, verse: int = None) -> str
 
         passage = f"{book} {chapter}" + (f":{verse}" if verse else "")
         result = f"Cross-translation comparison for {passage}:\n\n" + "\n\n".join(sections)
-        logger.info("tool_return cross_translation_compare result = %s", _preview(result))
+        logger.info("tool_return cross_translation_compare chars=%s", len(result))
+        logger.debug("tool_return cross_translation_compare result = %s", _preview(result))
         return result
     except Exception:
         logger.exception(
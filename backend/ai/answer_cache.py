@@ -0,0 +1,151 @@
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, NamedTuple
+
+import numpy as np
+
+from .agent_tools import encode_text
+
+ANSWER_CACHE_ENABLED = os.getenv("ANSWER_CACHE_ENABLED", "true").lower() != "false"
+ANSWER_CACHE_THRESHOLD = float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.92"))
+ANSWER_CACHE_TTL_SECONDS = int(os.getenv("ANSWER_CACHE_TTL_SECONDS", str(24 * 3600)))
+ANSWER_CACHE_MAX_ENTRIES = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "1000"))
+
+# Lookups scoring within this distance below the threshold are counted as
+# near misses, to show how many more hits a slightly lower threshold would give.
+NEAR_MISS_MARGIN = 0.05
+
+
+def normalize_prompt(prompt: str) -> str:
+    return re.sub(r"[\s?.!]+$", "", " ".join(prompt.split()).casefold())
+
+
+def _numbers(prompt: str) -> tuple[str, ...]:
+    """
+    Digits in a prompt are almost always chapter/verse numbers. "John 3:16" and
+    "John 3:17" embed nearly identically, so only prompts with the same numbers
+    may share an answer.
+    """
+    return tuple(re.findall(r"\d+", prompt))
+
+
+class CachedAnswer(NamedTuple):
+    answer: str
+    kind: str
+    similarity: float
+
+
+class _Entry(NamedTuple):
+    answer: str
+    embedding: np.ndarray
+    numbers: tuple[str, ...]
+    created_at: float
+
+
+class AnswerCache:
+    """
+    In-memory cache of whole chat answers. A normalized prompt is matched
+    exactly first, then against earlier prompts by embedding cosine similarity.
+    """
+
+    def __init__(self, encode: Callable[[str], Any], threshold: float, ttl_seconds: int, max_entries: int):
+        self.encode = encode
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+        self._lock = threading.Lock()
+        self.counts = {"exact_hits": 0, "semantic_hits": 0, "misses": 0, "near_misses": 0, "bypassed": 0}
+
+    def _embed(self, normalized: str) -> np.ndarray:
+        embedding = np.asarray(self.encode(normalized), dtype=np.float32)
+        return embedding / (np.linalg.norm(embedding) or 1.0)
+
+    def _expire(self, now: float) -> None:
+        expired = [key for key, entry in self._entries.items() if now - entry.created_at > self.ttl_seconds]
+        for key in expired:
+            del self._entries[key]
+
+    def lookup(self, prompt: str) -> CachedAnswer | None:
+        return self.probe(prompt)[0]
+
+    def probe(self, prompt: str) -> tuple[CachedAnswer | None, np.ndarray | None]:
+        """
+        Look the prompt up. On a miss, also return the prompt's embedding,
+        which `store` can reuse instead of encoding the prompt again.
+        """
+        normalized = normalize_prompt(prompt)
+        now = time.time()
+
+        with self._lock:
+            self._expire(now)
+            entry = self._entries.get(normalized)
+            if entry is not None:
+                self._entries.move_to_end(normalized)
+                self.counts["exact_hits"] += 1
+                return CachedAnswer(entry.answer, "exact", 1.0), None
+
+            numbers = _numbers(normalized)
+            candidates = [(key, e) for key, e in self._entries.items() if e.numbers == numbers]
+
+        query = self._embed(normalized)
+        if not candidates:
+            with self._lock:
+                self.counts["misses"] += 1
+            return None, query
+
+        similarities = np.stack([e.embedding for _, e in candidates]) @ query
+        best = int(np.argmax(similarities))
+        similarity = float(similarities[best])
+
+        with self._lock:
+            if similarity >= self.threshold:
+                key, entry = candidates[best]
+                if key in self._entries:
+                    self._entries.move_to_end(key)
+                self.counts["semantic_hits"] += 1
+                return CachedAnswer(entry.answer, "semantic", similarity), query
+
+            self.counts["misses"] += 1
+            if similarity >= self.threshold - NEAR_MISS_MARGIN:
+                self.counts["near_misses"] += 1
+            return None, query
+
+    def store(self, prompt: str, answer: str, embedding: np.ndarray | None = None) -> None:
+        """Cache `answer`; pass the embedding from `probe` to skip encoding the prompt again."""
+        normalized = normalize_prompt(prompt)
+        if embedding is None:
+            embedding = self._embed(normalized)
+        entry = _Entry(answer, embedding, _numbers(normalized), time.time())
+
+        with self._lock:
+            self._entries[normalized] = entry
+            self._entries.move_to_end(normalized)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def record_bypass(self) -> None:
+        with self._lock:
+            self.counts["bypassed"] += 1
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            counts = dict(self.counts)
+            entries = len(self._entries)
+
+        lookups = counts["exact_hits"] + counts["semantic_hits"] + counts["misses"]
+        hits = counts["exact_hits"] + counts["semantic_hits"]
+        return {
+            **counts,
+            "entries": entries,
+            "threshold": self.threshold,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "exact_hit_rate": counts["exact_hits"] / lookups if lookups else 0.0,
+            "semantic_hit_rate": counts["semantic_hits"] / lookups if lookups else 0.0,
+        }
+
+
+answer_cache = AnswerCache(encode_text, ANSWER_CACHE_THRESHOLD, ANSWER_CACHE_TTL_SECONDS, ANSWER_CACHE_MAX_ENTRIES)
@@ -0,0 +1,232 @@
+"""
+Conversation history keyed by ChatRequest.id.
+
+Each conversation is stored as its message history (without the system
+prompt) plus a running summary of turns that no longer fit. History is bounded
+by turn count and estimated tokens; the oldest turns are folded into the
+summary, which is appended to the system prompt on the next request.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Callable, NamedTuple, Sequence
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, messages_from_dict, messages_to_dict
+
+from .token_budget import estimate_tokens
+
+CONVERSATION_STORE_BACKEND = os.getenv("CONVERSATION_STORE_BACKEND", "sqlite")
+CONVERSATION_STORE_PATH = os.getenv("CONVERSATION_STORE_PATH", ".cache/conversations.sqlite3")
+CONVERSATION_TTL_SECONDS = int(os.getenv("CONVERSATION_TTL_SECONDS", str(7 * 24 * 3600)))
+CONVERSATION_MAX_CONVERSATIONS = int(os.getenv("CONVERSATION_MAX_CONVERSATIONS", "10000"))
+CONVERSATION_MAX_TURNS = int(os.getenv("CONVERSATION_MAX_TURNS", "10"))
+CONVERSATION_MAX_TOKENS = int(os.getenv("CONVERSATION_MAX_TOKENS", "6000"))
+CONVERSATION_SUMMARY_MAX_TOKENS = int(os.getenv("CONVERSATION_SUMMARY_MAX_TOKENS", "500"))
+
+
+class Conversation(NamedTuple):
+    messages: list[BaseMessage]
+    summary: str
+
+
+def split_turns(messages: Sequence[BaseMessage]) -> list[list[BaseMessage]]:
+    """A turn starts at each HumanMessage and includes the tool calls and answer that follow it."""
+    turns: list[list[BaseMessage]] = []
+    for message in messages:
+        if isinstance(message, HumanMessage) or not turns:
+            turns.append([])
+        turns[-1].append(message)
+    return turns
+
+
+def summarize_turns(turns: Sequence[Sequence[BaseMessage]]) -> str:
+    """
+    Structural summary of dropped turns: what was asked, which tools were used
+    with which arguments, and the start of each answer. No LLM call needed.
+    """
+    lines = []
+    for turn in turns:
+        for message in turn:
+            if isinstance(message, HumanMessage):
+                lines.append(f"- User asked: {str(message.content)[:200]}")
+            elif isinstance(message, AIMessage) and message.tool_calls:
+                for call in message.tool_calls:
+                    lines.append(f"  - Looked up {call['name']}({json.dumps(call['args'], ensure_ascii=False)})")
+            elif isinstance(message, AIMessage) and message.content:
+                lines.append(f"  - Answered: {str(message.content)[:200]}")
+    return "\n".join(lines)
+
+
+def bound_history(
+    conversation: Conversation,
+    max_turns: int = CONVERSATION_MAX_TURNS,
+    max_tokens: int = CONVERSATION_MAX_TOKENS,
+    summarize: Callable[[Sequence[Sequence[BaseMessage]]], str] = summarize_turns,
+) -> Conversation:
+    """Drop whole turns from the front until both limits hold, folding them into the summary."""
+    turns = split_turns(conversation.messages)
+
+    def tokens(kept):
+        return sum(estimate_tokens(m.content) for turn in kept for m in turn)
+
+    dropped = []
+    while len(turns) > 1 and (len(turns) > max_turns or tokens(turns) > max_tokens):
+        dropped.append(turns.pop(0))
+
+    summary = conversation.summary
+    if dropped:
+        summary = "\n".join(s for s in (summary, summarize(dropped)) if s)
+        # Keep the most recent part of the summary when it outgrows its own budget
+        limit = CONVERSATION_SUMMARY_MAX_TOKENS * 4
+        if len(summary) > limit:
+            summary = summary[-limit:].split("\n", 1)[-1]
+
+    return Conversation([m for turn in turns for m in turn], summary)
+
+
+class ConversationStore(ABC):
+    """Backend interface. Implementations must be safe to call from worker threads."""
+
+    @abstractmethod
+    def load(self, conversation_id: str) -> Conversation:
+        """The stored conversation, or an empty one when missing or expired."""
+
+    @abstractmethod
+    def save(self, conversation_id: str, conversation: Conversation) -> None:
+        ...
+
+    @abstractmethod
+    def delete(self, conversation_id: str) -> None:
+        ...
+
+    def append_exchange(self, conversation_id: str, prompt: str, answer: str) -> None:
+        """Record a turn answered outside the agent (fast path, intent router)."""
+        conversation = self.load(conversation_id)
+        messages = [*conversation.messages, HumanMessage(content=prompt), AIMessage(content=answer)]
+        self.save(conversation_id, bound_history(Conversation(messages, conversation.summary)))
+
+
+class InMemoryConversationStore(ConversationStore):
+    def __init__(self, ttl_seconds: int = CONVERSATION_TTL_SECONDS, max_conversations: int = CONVERSATION_MAX_CONVERSATIONS):
+        self.ttl_seconds = ttl_seconds
+        self.max_conversations = max_conversations
+        self._conversations: OrderedDict[str, tuple[Conversation, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def load(self, conversation_id: str) -> Conversation:
+        with self._lock:
+            stored = self._conversations.get(conversation_id)
+            if stored is None or time.time() - stored[1] > self.ttl_seconds:
+                return Conversation([], "")
+            return stored[0]
+
+    def save(self, conversation_id: str, conversation: Conversation) -> None:
+        with self._lock:
+            self._conversations[conversation_id] = (conversation, time.time())
+            self._conversations.move_to_end(conversation_id)
+            while len(self._conversations) > self.max_conversations:
+                self._conversations.popitem(last=False)
+
+    def delete(self, conversation_id: str) -> None:
+        with self._lock:
+            self._conversations.pop(conversation_id, None)
+
+
+class SqliteConversationStore(ConversationStore):
+    def __init__(self, path: str = CONVERSATION_STORE_PATH, ttl_seconds: int = CONVERSATION_TTL_SECONDS,
+                 max_conversations: int = CONVERSATION_MAX_CONVERSATIONS):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_conversations = max_conversations
+        self._lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS conversations (
+                    id TEXT PRIMARY KEY,
+                    messages TEXT NOT NULL,
+                    summary TEXT NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+                """
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS conversations_updated_at ON conversations (updated_at)")
+            self._conn.commit()
+        return self._conn
+
+    def load(self, conversation_id: str) -> Conversation:
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT messages, summary, updated_at FROM conversations WHERE id = ?", (conversation_id,)
+            ).fetchone()
+        if row is None or time.time() - row[2] > self.ttl_seconds:
+            return Conversation([], "")
+        return Conversation(messages_from_dict(json.loads(row[0])), row[1])
+
+    def save(self, conversation_id: str, conversation: Conversation) -> None:
+        now = time.time()
+        payload = json.dumps(messages_to_dict(conversation.messages), ensure_ascii=False)
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO conversations (id, messages, summary, updated_at) VALUES (?, ?, ?, ?)",
+                (conversation_id, payload, conversation.summary, now),
+            )
+            conn.execute("DELETE FROM conversations WHERE updated_at < ?", (now - self.ttl_seconds,))
+            conn.execute(
+                """
+                DELETE FROM conversations WHERE id IN (
+                    SELECT id FROM conversations ORDER BY updated_at DESC LIMIT -1 OFFSET ?
+                )
+                """,
+                (self.max_conversations,),
+            )
+            conn.commit()
+
+    def delete(self, conversation_id: str) -> None:
+        with self._lock:
+            conn = self._connection()
+            conn.execute("DELETE FROM conversations WHERE id = ?", (conversation_id,))
+            conn.commit()
+
+
+CONVERSATION_STORE_BACKENDS: dict[str, Callable[[], ConversationStore]] = {
+    "memory": InMemoryConversationStore,
+    "sqlite": SqliteConversationStore,
+}
+
+
+def register_conversation_store(name: str, factory: Callable[[], ConversationStore]) -> None:
+    """Plug in another backend (e.g. Redis or Postgres) selectable via CONVERSATION_STORE_BACKEND."""
+    CONVERSATION_STORE_BACKENDS[name] = factory
+
+
+def create_conversation_store(backend: str = CONVERSATION_STORE_BACKEND) -> ConversationStore:
+    if backend not in CONVERSATION_STORE_BACKENDS:
+        raise ValueError(f"Unknown conversation store backend: {backend}")
+    return CONVERSATION_STORE_BACKENDS[backend]()
+
+
+_conversation_store: ConversationStore | None = None
+_conversation_store_lock = threading.Lock()
+
+
+def get_conversation_store() -> ConversationStore:
+    """The process-wide store, created on first use so backends registered at startup are honoured."""
+    global _conversation_store
+    with _conversation_store_lock:
+        if _conversation_store is None:
+            _conversation_store = create_conversation_store()
+        return _conversation_store
@@ -0,0 +1,57 @@
+"""
+Per-request deadline budget.
+
+`run_prompt` opens a deadline scope; everything downstream (graph nodes, tool
+threads, LLM calls) reads the remaining budget from a context variable, so a
+slow model response cannot hold a request past its deadline. Threads started
+on the request's behalf must run in a copy of the caller's context
+(`contextvars.copy_context().run`) to see it.
+"""
+import contextvars
+import os
+import time
+from contextlib import contextmanager
+
+AGENT_DEADLINE_SECONDS = float(os.getenv("AGENT_DEADLINE_SECONDS", "60"))
+
+_deadline: contextvars.ContextVar[float | None] = contextvars.ContextVar("request_deadline", default=None)
+
+
+class DeadlineExceeded(TimeoutError):
+    pass
+
+
+@contextmanager
+def deadline_scope(seconds: float | None):
+    """Set a deadline `seconds` from now; an enclosing, earlier deadline still wins."""
+    if seconds is None:
+        yield
+        return
+    deadline = time.monotonic() + seconds
+    current = _deadline.get()
+    token = _deadline.set(deadline if current is None else min(current, deadline))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining() -> float | None:
+    """Seconds left in the current request, or None when no deadline is set."""
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return max(0.0, deadline - time.monotonic())
+
+
+def budget(limit: float | None) -> float | None:
+    """The smaller of `limit` and the remaining request budget."""
+    left = remaining()
+    if left is None:
+        return limit
+    return left if limit is None else min(limit, left)
+
+
+def check(what: str = "request") -> None:
+    if remaining() == 0.0:
+        raise DeadlineExceeded(f"Deadline exceeded before {what}")
@@ -0,0 +1,94 @@
+"""
+Scripted chat model with latency injection, for exercising timeouts, hedging
+and fallback without calling Gemini. Selected with LLM_PROVIDER=fake, or
+constructed directly in benchmarks.
+"""
+import random
+import threading
+import time
+from typing import Any, Callable, Sequence
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from pydantic import PrivateAttr
+
+from .token_budget import estimate_tokens
+
+# A scripted response: a fixed message/string, or a function of the prompt messages
+FakeResponse = AIMessage | str | Callable[[Sequence[BaseMessage]], AIMessage]
+
+
+class FakeChatModel(BaseChatModel):
+    """
+    Returns `responses` in order (cycling), sleeping before each one.
+
+    The delay is `latency` plus up to `jitter`, or `slow_latency` for a
+    `slow_rate` fraction of calls; `latency_fn(call_index)` overrides both.
+    `bind_tools` is a no-op, so tool calls must be part of the script.
+    """
+
+    model: str = "fake"
+    responses: list[Any] = []
+    latency: float = 0.0
+    jitter: float = 0.0
+    slow_latency: float = 0.0
+    slow_rate: float = 0.0
+    latency_fn: Callable[[int], float] | None = None
+    seed: int | None = None
+
+    _calls: int = PrivateAttr(default=0)
+    _lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+    _random: random.Random = PrivateAttr(default=None)
+
+    def model_post_init(self, __context: Any) -> None:
+        self._random = random.Random(self.seed)
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat"
+
+    @property
+    def calls(self) -> int:
+        return self._calls
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    def _next(self) -> tuple[int, float]:
+        with self._lock:
+            index = self._calls
+            self._calls += 1
+            if self.latency_fn is not None:
+                delay = self.latency_fn(index)
+            elif self.slow_rate and self._random.random() < self.slow_rate:
+                delay = self.slow_latency
+            else:
+                delay = self.latency + self._random.uniform(0, self.jitter)
+        return index, delay
+
+    def _respond(self, index: int, messages: Sequence[BaseMessage]) -> AIMessage:
+        if not self.responses:
+            return AIMessage(content="fake answer")
+        response = self.responses[index % len(self.responses)]
+        if callable(response):
+            return response(messages)
+        if isinstance(response, str):
+            return AIMessage(content=response)
+        return response.model_copy()
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        index, delay = self._next()
+        if delay > 0:
+            time.sleep(delay)
+
+        message = self._respond(index, messages)
+        if message.usage_metadata is None:
+            input_tokens = sum(estimate_tokens(m.content) for m in messages)
+            output_tokens = estimate_tokens(message.content)
+            message.usage_metadata = {
+                "input_tokens": input_tokens,
+                "output_tokens": output_tokens,
+                "total_tokens": input_tokens + output_tokens,
+            }
+        return ChatResult(generations=[ChatGeneration(message=message)])
@@ -1,25 +1,195 @@
-from typing import Sequence, Annotated, TypedDict
-
-from langchain_core.messages import BaseMessage
+import json
+import logging
+import operator
+import os
+import time
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Any, Sequence, Annotated, TypedDict
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, ToolMessage
 from langgraph.graph import StateGraph, END
 from langgraph.graph.message import add_messages
-from langgraph.prebuilt import ToolNode
 
 from .agent_tools import agent_tools
-from .model import model
+from .deadline import remaining
+from .llm_policy import invoke_with_policy
+from .model import model, fallback_model
+from .token_budget import cap_tool_message, compact_messages, estimate_tokens
+from ..services.metrics import span, tool_memo_hits
+
+logger = logging.getLogger(__name__)
 
 # One LLM call per request, then (optionally) tools, then END.
 model_with_tools = model.bind_tools(agent_tools)
-tool_node = ToolNode(agent_tools)
+fallback_with_tools = fallback_model.bind_tools(agent_tools) if fallback_model is not None else None
+tools_by_name = {t.name: t for t in agent_tools}
+
+# Upper bound on tool calls from a single model turn that run at the same time
+TOOL_MAX_CONCURRENCY = int(os.getenv("TOOL_MAX_CONCURRENCY", "4"))
+
+
+def _merge_memo(left: dict, right: dict) -> dict:
+    return {**left, **right}
 
 
 class AgentState(TypedDict):
     messages: Annotated[Sequence[BaseMessage], add_messages]
+    # Per-LLM-turn and per-tool-call token accounting, see token_budget.usage_report
+    token_usage: Annotated[list[dict], operator.add]
+    # (tool, args) -> result content, so repeated calls within a request are free
+    tool_memo: Annotated[dict[str, Any], _merge_memo]
+    # One entry per executed tool call: tool name, seconds, memo hit, error
+    tool_timings: Annotated[list[dict], operator.add]
+
+
+def memo_key(name: str, args: dict) -> str:
+    return json.dumps([name, args], sort_keys=True, ensure_ascii=False, default=str)
+
+
+def memo_from_messages(messages: Sequence[BaseMessage]) -> dict[str, Any]:
+    """Seed the memo with tool results already present in the messages (e.g. prefetched lookups)."""
+    calls = {}
+    for message in messages:
+        if isinstance(message, AIMessage):
+            calls.update({call["id"]: call for call in message.tool_calls})
+
+    memo = {}
+    for message in messages:
+        call = calls.get(getattr(message, "tool_call_id", None))
+        if isinstance(message, ToolMessage) and call is not None and message.status != "error":
+            memo[memo_key(call["name"], call["args"])] = message.content
+    return memo
+
+
+def partial_answer(messages: Sequence[BaseMessage]) -> str:
+    """Answer from the tool results of the current turn when the deadline cuts the agent short."""
+    last_human = max((i for i, m in enumerate(messages) if isinstance(m, HumanMessage)), default=-1)
+    results = [
+        m for m in messages[last_human + 1:]
+        if isinstance(m, ToolMessage) and m.status != "error" and m.content
+    ]
+    if not results:
+        return "I ran out of time before I could answer this. Please try again."
+
+    sections = [f"### {m.name}\n{m.content}" for m in results]
+    return "I ran out of time before finishing a full answer. Here is what I found so far:\n\n" + "\n\n".join(sections)
 
 
 def agent_node(state: AgentState):
-    response = model_with_tools.invoke(state["messages"])
-    return {"messages": [response]}
+    messages, saved = compact_messages(state["messages"])
+    entry = {
+        "kind": "llm",
+        "estimated_prompt_tokens": sum(estimate_tokens(m.content) for m in messages),
+        "compaction_saved_tokens": saved,
+    }
+
+    try:
+        response, call = invoke_with_policy(model_with_tools, messages, fallback=fallback_with_tools)
+    except TimeoutError as e:
+        logger.warning("agent turn timed out, returning partial answer: %s", e)
+        entry["deadline_exceeded"] = True
+        return {"messages": [AIMessage(content=partial_answer(state["messages"]))], "token_usage": [entry]}
+
+    usage = getattr(response, "usage_metadata", None) or {}
+    entry.update({
+        "input_tokens": usage.get("input_tokens"),
+        "output_tokens": usage.get("output_tokens"),
+        "total_tokens": usage.get("total_tokens"),
+        **call,
+    })
+    return {"messages": [response], "token_usage": [entry]}
+
+
+def _run_tool_call(call: dict) -> tuple[ToolMessage, dict]:
+    start = time.perf_counter()
+    tool = tools_by_name.get(call["name"])
+    try:
+        if tool is None:
+            raise ValueError(f"{call['name']} is not a valid tool, try one of [{', '.join(tools_by_name)}].")
+        with span("tool", call["name"]):
+            message = tool.invoke({**call, "type": "tool_call"})
+        error = None
+    except Exception as e:
+        # Same recovery as langgraph's ToolNode: report the error to the model instead of failing the request
+        logger.exception("TOOL_ERROR!!! tool=%s", call["name"])
+        message = ToolMessage(
+            content=f"Error: {e!r}\n Please fix your mistakes.",
+            name=call["name"],
+            tool_call_id=call["id"],
+            status="error",
+        )
+        error = type(e).__name__
+
+    timing = {"tool": call["name"], "seconds": time.perf_counter() - start, "memo_hit": False, "error": error}
+    return message, timing
+
+
+def _timed_out(call: dict) -> tuple[ToolMessage, dict]:
+    message = ToolMessage(
+        content="Error: the request deadline passed before this tool finished.",
+        name=call["name"],
+        tool_call_id=call["id"],
+        status="error",
+    )
+    return message, {"tool": call["name"], "seconds": 0.0, "memo_hit": False, "error": "DeadlineExceeded"}
+
+
+def tools_node(state: AgentState):
+    tool_calls = state["messages"][-1].tool_calls
+    memo = state.get("tool_memo") or {}
+
+    results: list[tuple[ToolMessage, dict] | None] = [None] * len(tool_calls)
+    pending: dict[str, list[int]] = {}
+    for i, call in enumerate(tool_calls):
+        key = memo_key(call["name"], call["args"])
+        if key in memo:
+            message = ToolMessage(content=memo[key], name=call["name"], tool_call_id=call["id"])
+            tool_memo_hits.inc(call["name"])
+            results[i] = (message, {"tool": call["name"], "seconds": 0.0, "memo_hit": True, "error": None})
+        else:
+            # Duplicate calls within the same turn run once as well
+            pending.setdefault(key, []).append(i)
+
+    new_memo = {}
+    if pending:
+        leaders = [indexes[0] for indexes in pending.values()]
+        workers = max(1, min(TOOL_MAX_CONCURRENCY, len(leaders)))
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="agent-tool")
+        # Each tool thread runs in a copy of this context so it sees the request deadline
+        futures = [
+            executor.submit(contextvars.copy_context().run, _run_tool_call, tool_calls[i])
+            for i in leaders
+        ]
+        wait(futures, timeout=remaining())
+        # Tools still running at the deadline are abandoned, not joined
+        executor.shutdown(wait=False, cancel_futures=True)
+        executed = [
+            future.result() if future.done() and not future.cancelled() else _timed_out(tool_calls[i])
+            for i, future in zip(leaders, futures)
+        ]
+
+        for (key, indexes), (message, timing) in zip(pending.items(), executed):
+            results[indexes[0]] = (message, timing)
+            for i in indexes[1:]:
+                duplicate = message.model_copy(update={"tool_call_id": tool_calls[i]["id"]})
+                results[i] = (duplicate, {**timing, "seconds": 0.0, "memo_hit": True})
+            if message.status != "error":
+                new_memo[key] = message.content
+
+    messages = []
+    entries = []
+    for message, _ in results:
+        message, entry = cap_tool_message(message)
+        messages.append(message)
+        entries.append(entry)
+
+    return {
+        "messages": messages,
+        "token_usage": entries,
+        "tool_memo": new_memo,
+        "tool_timings": [timing for _, timing in results],
+    }
 
 
 def should_continue(state: AgentState):
@@ -35,7 +205,7 @@ def should_continue(state: AgentState):
 graph = StateGraph(AgentState)
 
 graph.add_node("agent", agent_node)
-graph.add_node("tools", tool_node)
+graph.add_node("tools", tools_node)
 
 graph.set_entry_point("agent")
 
@@ -0,0 +1,174 @@
+"""
+Rule-based intent routing for chat prompts that map onto a fixed tool chain.
+
+Prompts like "compare John 3:16 across translations" or "how many chapters in
+Isaiah" only need the model to pick a tool, so they are matched against
+patterns here and dispatched directly. Anything unmatched, or any dispatch
+whose tool reports a miss (e.g. an unknown book), falls back to the agent.
+"""
+import logging
+import re
+import threading
+from typing import Callable
+
+from .agent_tools import book_chapters, cross_translation_compare, keyword_search, list_chapters, scripture_lookup, semantic_search
+from ..schemas.scripture import DEFAULT_TRANSLATION
+from ..services.scripture_service import BOOK_PATTERN, TRANSLATION_PATTERN, find_scripture_references, normalize_book_name
+
+logger = logging.getLogger(__name__)
+
+_PREFIX = r"^\s*(?:please\s+)?(?:(?:can you\s+)?(?:show|give|find|get|list|search)(?:\s+me)?(?:\s+for)?\s+)?(?:all\s+|the\s+|some\s+)?"
+_SUFFIX = r"\s*(?:please)?\s*[?.!]*\s*$"
+# Books and translations come from scripture_service, so both sides agree on
+# multi-word books ("Song of Solomon"), aliases ("Psalm") and shortnames
+_IN_TRANSLATION = r"\s+(?:in\s+(?:the\s+)?)?\(?"
+_REF = r"(?:" + BOOK_PATTERN + r")\s+\d+(?::\d+)?(?:" + _IN_TRANSLATION + r"(?:" + TRANSLATION_PATTERN + r")\)?)?"
+_BOOK = r"(?P<book>" + BOOK_PATTERN + r")"
+_TRANSLATION = r"(?:" + _IN_TRANSLATION + r"(?P<translation>" + TRANSLATION_PATTERN + r")\)?)?"
+
+COMPARE_PATTERNS = [
+    re.compile(_PREFIX + r"compare\s+(?P<ref>" + _REF + r")(?:\s+(?:across|in|between)\s+(?:all\s+|the\s+|different\s+|every\s+)?(?:bible\s+)?translations)?" + _SUFFIX, re.IGNORECASE),
+    re.compile(_PREFIX + r"(?P<ref>" + _REF + r")\s+(?:across|in)\s+(?:all\s+|different\s+|every\s+)(?:bible\s+)?translations" + _SUFFIX, re.IGNORECASE),
+]
+
+CHAPTERS_PATTERNS = [
+    re.compile(_PREFIX + r"(?P<count>how\s+many)\s+chapters\s+(?:are\s+)?(?:in|does)\s+(?:the\s+book\s+of\s+)?" + _BOOK + r"(?:\s+have)?" + _TRANSLATION + _SUFFIX, re.IGNORECASE),
+    re.compile(_PREFIX + r"(?:what\s+are\s+the\s+)?chapters\s+(?:of|in)\s+(?:the\s+book\s+of\s+)?" + _BOOK + _TRANSLATION + _SUFFIX, re.IGNORECASE),
+]
+
+KEYWORD_PATTERNS = [
+    re.compile(_PREFIX + r"verses\s+(?:containing|that\s+contain|with|mentioning|that\s+mention)\s+(?:the\s+(?:word|phrase)\s+)?[\"'“‘](?P<query>[^\"'”’]+)[\"'”’]" + _TRANSLATION + _SUFFIX, re.IGNORECASE),
+    re.compile(_PREFIX + r"verses\s+(?:containing|that\s+contain|mentioning|that\s+mention)\s+(?:the\s+word\s+)?(?P<query>[A-Za-z]+)" + _SUFFIX, re.IGNORECASE),
+]
+
+SIMILAR_PATTERNS = [
+    re.compile(_PREFIX + r"(?:verses?|passages?)\s+(?:that\s+are\s+)?(?:similar\s+to|like|related\s+to)\s+(?P<ref>" + _REF + r")" + _SUFFIX, re.IGNORECASE),
+]
+
+# Tool output that means "no answer here" rather than a result to show the user
+_MISS = re.compile(r"(not found\.?$|^No |^Error)", re.IGNORECASE)
+
+
+def _ok(result) -> bool:
+    return isinstance(result, str) and bool(result) and not _MISS.search(result.strip())
+
+
+def _reference(match: re.Match):
+    references = find_scripture_references(match.group("ref"))
+    return references[0] if references else None
+
+
+def _compare(match: re.Match) -> str | None:
+    reference = _reference(match)
+    if reference is None:
+        return None
+    result = cross_translation_compare.invoke(
+        {"book": reference.book, "chapter": reference.chapter, "verse": reference.verse}
+    )
+    return result if _ok(result) else None
+
+
+def _chapters(match: re.Match) -> str | None:
+    book = normalize_book_name(match.group("book"))
+    translation = (match.group("translation") or DEFAULT_TRANSLATION).upper()
+    if match.groupdict().get("count"):
+        chapters = book_chapters(book, translation)
+        if isinstance(chapters, str):
+            return None
+        return f"{book} ({translation}) has {len(chapters)} chapter{'' if len(chapters) == 1 else 's'}."
+    result = list_chapters.invoke({"book": book, "translation": translation})
+    return result if _ok(result) else None
+
+
+def _keyword(match: re.Match) -> str | None:
+    groups = match.groupdict()
+    translation = (groups.get("translation") or DEFAULT_TRANSLATION).upper()
+    result = keyword_search.invoke({"query": groups["query"].strip(), "translation": translation})
+    return result if _ok(result) else None
+
+
+def _similar(match: re.Match) -> str | None:
+    reference = _reference(match)
+    if reference is None or reference.verse is None:
+        return None
+
+    verse_text = scripture_lookup.invoke({"query": reference.model_dump()})
+    if not _ok(verse_text):
+        return None
+
+    result = semantic_search.invoke({"verse_text": verse_text})
+    if not _ok(result):
+        return None
+
+    citation = f"({reference.translation}) {reference.book} {reference.chapter}:{reference.verse}"
+    return f"{citation} - {verse_text}\n\n{result}"
+
+
+INTENTS: list[tuple[str, list[re.Pattern], Callable[[re.Match], str | None]]] = [
+    ("cross_translation_compare", COMPARE_PATTERNS, _compare),
+    ("list_chapters", CHAPTERS_PATTERNS, _chapters),
+    ("keyword_search", KEYWORD_PATTERNS, _keyword),
+    ("similar_verses", SIMILAR_PATTERNS, _similar),
+]
+
+
+class IntentRouter:
+    def __init__(self, intents):
+        self.intents = intents
+        self._lock = threading.Lock()
+        self.counts: dict[str, int] = {"routed": 0, "fallback": 0, "unmatched": 0}
+        self.by_intent: dict[str, int] = {name: 0 for name, _, _ in intents}
+
+    def classify(self, prompt: str) -> tuple[str, Callable, re.Match] | None:
+        for name, patterns, handler in self.intents:
+            for pattern in patterns:
+                match = pattern.match(prompt)
+                if match:
+                    return name, handler, match
+        return None
+
+    def route(self, prompt: str) -> str | None:
+        """Answer the prompt without the LLM, or return None to fall back to the agent."""
+        return self.dispatch(self.classify(prompt))
+
+    def dispatch(self, classified: tuple[str, Callable, re.Match] | None) -> str | None:
+        """`route` for a prompt already passed through `classify`."""
+        if classified is None:
+            self._count("unmatched")
+            return None
+
+        name, handler, match = classified
+        try:
+            answer = handler(match)
+        except Exception:
+            logger.exception("intent_router dispatch failed intent=%s", name)
+            answer = None
+
+        if answer is None:
+            logger.info("intent_router fallback intent=%s", name)
+            self._count("fallback")
+            return None
+
+        logger.info("intent_router routed intent=%s", name)
+        self._count("routed", name)
+        return answer
+
+    def _count(self, outcome: str, intent: str | None = None) -> None:
+        with self._lock:
+            self.counts[outcome] += 1
+            if intent is not None:
+                self.by_intent[intent] += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            counts = dict(self.counts)
+            by_intent = dict(self.by_intent)
+        total = sum(counts.values())
+        return {
+            **counts,
+            "by_intent": by_intent,
+            "bypass_rate": counts["routed"] / total if total else 0.0,
+        }
+
+
+intent_router = IntentRouter(INTENTS)
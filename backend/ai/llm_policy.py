@@ -0,0 +1,187 @@
+"""
+Timeout, hedging and fallback for LLM calls.
+
+Every attempt is bounded by LLM_TIMEOUT_SECONDS and by the request deadline.
+When a call is still running after the model's recent latency percentile, one
+hedged duplicate is sent and whichever finishes first wins. If the primary
+model fails or times out and LLM_FALLBACK_MODEL is set, the fallback model gets
+its own LLM_TIMEOUT_SECONDS, capped by what is left of the request deadline, so
+a call that falls back can take up to twice LLM_TIMEOUT_SECONDS. Calls that
+lose a hedge race or are abandoned by a timeout are cancelled if they have not
+started yet; running ones keep their worker thread until the client's own
+transport timeout ends them.
+"""
+import contextvars
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Sequence
+
+from langchain_core.messages import BaseMessage
+
+from .deadline import DeadlineExceeded, budget, check, remaining
+from .model import LLM_FALLBACK_MODEL, LLM_TIMEOUT_SECONDS, MODEL_NAME
+from ..services.metrics import record_tokens, span
+
+logger = logging.getLogger(__name__)
+
+LLM_HEDGE_ENABLED = os.getenv("LLM_HEDGE_ENABLED", "true").lower() != "false"
+LLM_HEDGE_PERCENTILE = float(os.getenv("LLM_HEDGE_PERCENTILE", "0.95"))
+LLM_HEDGE_MIN_SAMPLES = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))
+LLM_HEDGE_MIN_DELAY_SECONDS = float(os.getenv("LLM_HEDGE_MIN_DELAY_SECONDS", "0.5"))
+LLM_MAX_CONCURRENT_CALLS = int(os.getenv("LLM_MAX_CONCURRENT_CALLS", "32"))
+
+_executor = ThreadPoolExecutor(max_workers=LLM_MAX_CONCURRENT_CALLS, thread_name_prefix="llm-call")
+
+
+class LatencyTracker:
+    """Recent successful call latencies per model, used to pick the hedge delay."""
+
+    def __init__(self, window: int = 200):
+        self.window = window
+        self._samples: dict[str, deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, name: str, seconds: float) -> None:
+        with self._lock:
+            self._samples.setdefault(name, deque(maxlen=self.window)).append(seconds)
+
+    def percentile(self, name: str, p: float) -> float | None:
+        with self._lock:
+            samples = sorted(self._samples.get(name, ()))
+        if len(samples) < LLM_HEDGE_MIN_SAMPLES:
+            return None
+        return samples[min(len(samples) - 1, int(p * len(samples)))]
+
+    def hedge_delay(self, name: str) -> float | None:
+        if not LLM_HEDGE_ENABLED:
+            return None
+        p = self.percentile(name, LLM_HEDGE_PERCENTILE)
+        return None if p is None else max(p, LLM_HEDGE_MIN_DELAY_SECONDS)
+
+
+latencies = LatencyTracker()
+
+_counts = {"calls": 0, "hedged": 0, "hedge_won": 0, "fallback": 0, "timeouts": 0, "errors": 0}
+_counts_lock = threading.Lock()
+
+
+def _count(name: str) -> None:
+    with _counts_lock:
+        _counts[name] += 1
+
+
+def stats() -> dict[str, Any]:
+    with _counts_lock:
+        return dict(_counts)
+
+
+def _submit(runnable, messages: Sequence[BaseMessage]) -> Future:
+    # Tools and callbacks inside the call see the request deadline
+    return _executor.submit(contextvars.copy_context().run, runnable.invoke, messages)
+
+
+def _attempt(runnable, messages: Sequence[BaseMessage], name: str, timeout: float) -> tuple[Any, bool, bool]:
+    """One call with an optional hedge. Returns (response, hedged, hedge_won)."""
+    start = time.monotonic()
+    end = start + timeout
+    hedge_after = latencies.hedge_delay(name)
+
+    started = {_submit(runnable, messages): start}
+    primary = next(iter(started))
+    hedged = False
+    error: Exception | None = None
+
+    try:
+        while started:
+            now = time.monotonic()
+            if now >= end:
+                break
+            if not hedged and hedge_after is not None and now - start >= hedge_after:
+                logger.info("llm hedge model=%s after=%.2fs", name, now - start)
+                started[_submit(runnable, messages)] = now
+                hedged = True
+                _count("hedged")
+                continue
+
+            wait_for = end - now
+            if not hedged and hedge_after is not None:
+                wait_for = min(wait_for, start + hedge_after - now)
+            done, _ = wait(started, timeout=wait_for, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                began = started.pop(future)
+                try:
+                    response = future.result()
+                except Exception as e:
+                    error = e
+                    continue
+                latencies.record(name, time.monotonic() - began)
+                return response, hedged, future is not primary
+    finally:
+        # Calls still queued on the shared executor would otherwise run for nobody
+        for future in started:
+            future.cancel()
+
+    if started:
+        raise TimeoutError(f"LLM call to {name} timed out after {timeout:.1f}s")
+    raise error
+
+
+def invoke_with_policy(
+    runnable,
+    messages: Sequence[BaseMessage],
+    *,
+    name: str = MODEL_NAME,
+    fallback=None,
+    fallback_name: str | None = LLM_FALLBACK_MODEL,
+    timeout: float = LLM_TIMEOUT_SECONDS,
+) -> tuple[Any, dict[str, Any]]:
+    """
+    Invoke `runnable` (a chat model, optionally with tools bound) under the
+    timeout/hedge/fallback policy. Returns the response and a report entry;
+    raises TimeoutError (DeadlineExceeded once the request budget is spent)
+    or the model's own error when every attempt failed.
+    """
+    with span("llm", name):
+        response, report = _invoke(runnable, messages, name, fallback, fallback_name, timeout)
+    record_tokens(report["model"], getattr(response, "usage_metadata", None))
+    return response, report
+
+
+def _invoke(runnable, messages, name, fallback, fallback_name, timeout) -> tuple[Any, dict[str, Any]]:
+    check("LLM call")
+    _count("calls")
+    start = time.monotonic()
+    try:
+        response, hedged, hedge_won = _attempt(runnable, messages, name, budget(timeout))
+        used, used_fallback = name, False
+    except Exception as e:
+        left = budget(timeout)
+        if fallback is None or not left:
+            _count("timeouts" if isinstance(e, TimeoutError) else "errors")
+            if isinstance(e, TimeoutError) and remaining() == 0.0:
+                raise DeadlineExceeded(str(e)) from e
+            raise
+        logger.warning("llm primary failed model=%s error=%r; falling back to %s", name, e, fallback_name)
+        _count("fallback")
+        try:
+            response, hedged, hedge_won = _attempt(fallback, messages, fallback_name, left)
+        except Exception as fallback_error:
+            _count("timeouts" if isinstance(fallback_error, TimeoutError) else "errors")
+            if isinstance(fallback_error, TimeoutError) and remaining() == 0.0:
+                raise DeadlineExceeded(str(fallback_error)) from fallback_error
+            raise
+        used, used_fallback = fallback_name, True
+
+    if hedge_won:
+        _count("hedge_won")
+    return response, {
+        "model": used,
+        "seconds": time.monotonic() - start,
+        "hedged": hedged,
+        "fallback": used_fallback,
+    }
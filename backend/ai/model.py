@@ -1,3 +1,36 @@
-from langchain_google_genai import ChatGoogleGenerativeAI
+import os
 
-model = ChatGoogleGenerativeAI(model="gemini-2.5-flash", temperature=0.7, max_tokens=1000)
+MODEL_NAME = os.getenv("LLM_MODEL", "gemini-2.5-flash")
+
+# "google" (Gemini) or "fake" (scripted, latency-injected; see fake_model.py)
+LLM_PROVIDER = os.getenv("LLM_PROVIDER", "google")
+# Optional second model used when the primary fails or times out
+LLM_FALLBACK_MODEL = os.getenv("LLM_FALLBACK_MODEL")
+# Upper bound for one LLM call (hedge included); the request deadline can lower it
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "30"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+
+
+def build_model(name: str):
+    if LLM_PROVIDER == "fake":
+        from .fake_model import FakeChatModel
+        return FakeChatModel(
+            model=name,
+            latency=float(os.getenv("FAKE_LLM_LATENCY_SECONDS", "0")),
+            jitter=float(os.getenv("FAKE_LLM_JITTER_SECONDS", "0")),
+            slow_latency=float(os.getenv("FAKE_LLM_SLOW_SECONDS", "0")),
+            slow_rate=float(os.getenv("FAKE_LLM_SLOW_RATE", "0")),
+        )
+
+    from langchain_google_genai import ChatGoogleGenerativeAI
+    return ChatGoogleGenerativeAI(
+        model=name,
+        temperature=0.7,
+        max_tokens=1000,
+        timeout=LLM_TIMEOUT_SECONDS,
+        max_retries=LLM_MAX_RETRIES,
+    )
+
+
+model = build_model(MODEL_NAME)
+fallback_model = build_model(LLM_FALLBACK_MODEL) if LLM_FALLBACK_MODEL else None
@@ -0,0 +1,90 @@
+"""
+Pre-agent reference resolution.
+
+The system prompt makes the agent call `scripture_lookup` before anything
+else, which costs a full LLM turn just to ask for verse text. When the prompt
+already names its references, they are resolved here in one batched query and
+injected as a completed `scripture_lookup` call, so the agent's first turn can
+go straight to commentary or semantic search.
+"""
+import logging
+import os
+import uuid
+
+from langchain_core.messages import AIMessage, BaseMessage, ToolMessage
+from sqlmodel import Session
+
+from .token_budget import cap_text, TOOL_OUTPUT_MAX_TOKENS
+from ..db_session import engine
+from ..schemas.scripture import ScriptureQuery
+from ..services.scripture_service import find_scripture_references
+from ..services.sql_service import get_verses_for_references
+
+logger = logging.getLogger(__name__)
+
+PREFETCH_ENABLED = os.getenv("PREFETCH_ENABLED", "true").lower() != "false"
+PREFETCH_MAX_REFERENCES = int(os.getenv("PREFETCH_MAX_REFERENCES", "5"))
+
+
+def _format_lookup(reference: ScriptureQuery, rows) -> str:
+    """Same output shape as the scripture_lookup tool."""
+    if reference.verse is not None:
+        return rows[0].verse_text
+    return "\n".join(
+        f"({row.translation_shortname}) {row.name} {row.chapter_num}:{row.verse_num}. {row.verse_text}"
+        for row in rows
+    )
+
+
+def _matches(reference: ScriptureQuery, row) -> bool:
+    return (
+        row.translation_shortname == reference.translation
+        and row.name == reference.book
+        and row.chapter_num == reference.chapter
+        and (reference.verse is None or row.verse_num == reference.verse)
+    )
+
+
+def prefetch_messages(prompt: str) -> list[BaseMessage]:
+    """
+    Resolve every reference in the prompt and return an AIMessage/ToolMessage
+    pair per found reference, or an empty list. References that do not resolve
+    (unknown book, out-of-range verse) are left for the agent to handle.
+    """
+    if not PREFETCH_ENABLED:
+        return []
+
+    references = find_scripture_references(prompt)[:PREFETCH_MAX_REFERENCES]
+    if not references:
+        return []
+
+    try:
+        with Session(engine) as session:
+            rows = get_verses_for_references(references, session)
+    except Exception:
+        logger.exception("prefetch failed prompt_references=%s", len(references))
+        return []
+
+    resolved = [(ref, [row for row in rows if _matches(ref, row)]) for ref in references]
+    resolved = [(ref, ref_rows) for ref, ref_rows in resolved if ref_rows]
+    if not resolved:
+        return []
+
+    # Ids must stay unique across the turns of a saved conversation
+    turn = uuid.uuid4().hex[:8]
+    tool_calls = [
+        {"name": "scripture_lookup", "args": {"query": ref.model_dump()}, "id": f"prefetch_{turn}_{i}", "type": "tool_call"}
+        for i, (ref, _) in enumerate(resolved)
+    ]
+    messages: list[BaseMessage] = [AIMessage(content="", tool_calls=tool_calls)]
+    messages.extend(
+        ToolMessage(
+            content=cap_text(_format_lookup(ref, ref_rows), TOOL_OUTPUT_MAX_TOKENS),
+            tool_call_id=call["id"],
+            name="scripture_lookup",
+        )
+        for (ref, ref_rows), call in zip(resolved, tool_calls)
+    )
+
+    logger.info("prefetch resolved references=%s", [call["args"]["query"] for call in tool_calls])
+    return messages
@@ -0,0 +1,44 @@
+"""
+Warm the LLM cache with a book overview for every book in the database, so
+get_book_context answers from cache instead of calling Gemini.
+
+    python -m backend.ai.pregenerate [--refresh]
+"""
+import argparse
+import logging
+
+from sqlmodel import Session
+
+from .agent_tools import generate_book_context
+from ..db_session import engine
+from ..services.llm_cache import llm_cache
+from ..services.sql_service import get_books
+
+logger = logging.getLogger(__name__)
+
+
+def pregenerate_book_contexts(refresh: bool = False) -> int:
+    with Session(engine) as session:
+        names = [b.name for b in get_books(session) if b.name]
+
+    generated = 0
+    for name in names:
+        try:
+            generate_book_context(name, refresh=refresh)
+            generated += 1
+            logger.info("pregenerated book context book=%s (%s/%s)", name, generated, len(names))
+        except Exception:
+            logger.exception("Failed to pregenerate book context book=%s", name)
+
+    return generated
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s [%(name)s] %(message)s")
+
+    parser = argparse.ArgumentParser(description="Pre-generate cached book overviews for get_book_context")
+    parser.add_argument("--refresh", action="store_true", help="regenerate entries that are already cached")
+    args = parser.parse_args()
+
+    count = pregenerate_book_contexts(refresh=args.refresh)
+    logger.info("Pre-generated %s book contexts; cache stats: %s", count, llm_cache.stats())
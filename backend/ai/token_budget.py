@@ -0,0 +1,108 @@
+"""
+Token budgeting for tool output in the agent graph.
+
+Tool results (a whole chapter, a chapter in every translation) land in
+`AgentState.messages` and are re-sent on every later LLM turn. They are capped
+when produced, and tool results from earlier turns are compacted further
+before each model call. Counts are estimates (about four characters per
+token), which is close enough for budgeting without a tokenizer dependency.
+"""
+import os
+from typing import Any, Sequence
+
+from langchain_core.messages import AIMessage, BaseMessage, ToolMessage
+
+TOOL_OUTPUT_MAX_TOKENS = int(os.getenv("TOOL_OUTPUT_MAX_TOKENS", "1500"))
+COMPACTED_TOOL_MAX_TOKENS = int(os.getenv("COMPACTED_TOOL_MAX_TOKENS", "150"))
+
+CHARS_PER_TOKEN = 4
+
+# Room left in a capped result for the "[... omitted ...]" note itself
+_NOTE_CHARS = 120
+
+
+def estimate_tokens(content: Any) -> int:
+    if content is None:
+        return 0
+    text = content if isinstance(content, str) else str(content)
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def cap_text(text: str, max_tokens: int) -> str:
+    """
+    Keep whole leading lines (verses) up to the budget and note how many were
+    dropped, so the model knows the result is partial and can ask for a
+    narrower passage.
+    """
+    if estimate_tokens(text) <= max_tokens:
+        return text
+
+    budget = max(max_tokens * CHARS_PER_TOKEN - _NOTE_CHARS, CHARS_PER_TOKEN)
+    lines = text.split("\n")
+    kept: list[str] = []
+    used = 0
+    for line in lines:
+        if used + len(line) + 1 > budget:
+            break
+        kept.append(line)
+        used += len(line) + 1
+
+    if not kept:
+        # A single huge line (e.g. commentary): cut it at the budget instead
+        return f"{text[:budget]}\n[... truncated to fit the token budget]"
+
+    omitted = len(lines) - len(kept)
+    return "\n".join(kept) + f"\n[... {omitted} more lines omitted; request a smaller range for the rest]"
+
+
+def cap_tool_message(message: ToolMessage, max_tokens: int = TOOL_OUTPUT_MAX_TOKENS) -> tuple[ToolMessage, dict]:
+    """Cap a fresh tool result and return it with an accounting entry."""
+    original = estimate_tokens(message.content)
+    if not isinstance(message.content, str) or original <= max_tokens:
+        return message, {"kind": "tool", "tool": message.name, "tokens": original, "capped_from": None}
+
+    capped = message.model_copy(update={"content": cap_text(message.content, max_tokens)})
+    return capped, {"kind": "tool", "tool": message.name, "tokens": estimate_tokens(capped.content), "capped_from": original}
+
+
+def compact_messages(messages: Sequence[BaseMessage], max_tokens: int = COMPACTED_TOOL_MAX_TOKENS) -> tuple[list[BaseMessage], int]:
+    """
+    Shrink tool results from earlier turns before a model call. Results after
+    the last AIMessage (the batch the model is about to read) stay intact.
+    Returns the compacted list and the number of tokens saved; the graph state
+    itself is left untouched.
+    """
+    last_ai = max((i for i, m in enumerate(messages) if isinstance(m, AIMessage)), default=-1)
+
+    compacted: list[BaseMessage] = []
+    saved = 0
+    for i, message in enumerate(messages):
+        if i < last_ai and isinstance(message, ToolMessage) and isinstance(message.content, str):
+            before = estimate_tokens(message.content)
+            if before > max_tokens:
+                message = message.model_copy(update={"content": cap_text(message.content, max_tokens)})
+                saved += before - estimate_tokens(message.content)
+        compacted.append(message)
+
+    return compacted, saved
+
+
+def usage_report(entries: Sequence[dict]) -> dict:
+    """Fold the per-turn / per-tool entries recorded in AgentState into one report."""
+    turns = [e for e in entries if e.get("kind") == "llm"]
+    tools = [e for e in entries if e.get("kind") == "tool"]
+    return {
+        "llm_turns": len(turns),
+        "input_tokens": sum(e.get("input_tokens") or 0 for e in turns),
+        "output_tokens": sum(e.get("output_tokens") or 0 for e in turns),
+        "total_tokens": sum(e.get("total_tokens") or 0 for e in turns),
+        "estimated_prompt_tokens": sum(e.get("estimated_prompt_tokens") or 0 for e in turns),
+        "compaction_saved_tokens": sum(e.get("compaction_saved_tokens") or 0 for e in turns),
+        "llm_seconds": sum(e.get("seconds") or 0 for e in turns),
+        "hedged_calls": sum(1 for e in turns if e.get("hedged")),
+        "fallback_calls": sum(1 for e in turns if e.get("fallback")),
+        "deadline_exceeded": any(e.get("deadline_exceeded") for e in turns),
+        "tool_output_tokens": sum(e.get("tokens") or 0 for e in tools),
+        "tool_outputs_capped": sum(1 for e in tools if e.get("capped_from")),
+        "tools": [{"tool": e.get("tool"), "tokens": e.get("tokens"), "capped_from": e.get("capped_from")} for e in tools],
+    }
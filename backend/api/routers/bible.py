@@ -1,41 +1,85 @@
+import os
 from typing import Annotated
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlmodel import Session
 
-from ...db_session import get_session
-from ...schemas.models import Translation
-from ...services.sql_service import get_book, get_translation, get_verse, get_verses
+from ...db_session import engine, get_session, run_in_session
+from ...schemas.models import Book, Translation
+from ...services.http_cache import (
+    StreamCompressor,
+    cache_headers,
+    cached_corpus_version,
+    compress,
+    make_etag,
+    matching_etag,
+    negotiate_encoding,
+    refresh_corpus_version,
+    response_encoding,
+)
+from ...services.response_cache import ResponseCache, dumps
+from ...services.single_flight import SINGLE_FLIGHT_TIMEOUT_SECONDS, AsyncSingleFlight, make_key
+from ...services.sql_service import get_book, get_books, get_translation, get_verse, get_verses, iter_verses
 
 router = APIRouter(prefix="/bible", tags=["bible"])
 
 SessionDep = Annotated[Session, Depends(get_session)]
 
+# Identical concurrent reads (e.g. a daily-verse push) share one DB round trip
+bible_flight = AsyncSingleFlight(timeout=SINGLE_FLIGHT_TIMEOUT_SECONDS)
 
-@router.get("/{translation}")
-async def api_get_translation(translation: str, session: SessionDep) -> Translation:
-    translation_obj = get_translation(translation, session=session)
+# Rendered JSON bodies keyed by (corpus version, payload builder, arguments)
+bible_responses = ResponseCache()
 
-    if not translation_obj:
-        raise HTTPException(status_code=404, detail="Translation not found")
+# NDJSON exports are sent in chunks of roughly this many (uncompressed) bytes
+EXPORT_CHUNK_BYTES = int(os.getenv("EXPORT_CHUNK_BYTES", "65536"))
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+# Range unit for resuming exports; its values are verse ids, not line positions
+EXPORT_RANGE_UNIT = "verse-id"
 
-    return translation_obj
 
+async def _coalesced(fn, *args):
+    """Run `fn(*args, session=...)` once for all concurrent requests with the same arguments."""
+    try:
+        return await bible_flight.do(
+            make_key(fn.__name__, *args),
+            lambda: run_in_threadpool(run_in_session, fn, *args),
+        )
+    except TimeoutError as e:
+        raise HTTPException(status_code=504, detail="Timed out waiting for scripture lookup") from e
 
-@router.get("/{translation}/{book}")
-async def get_translation_book(translation: str, book: str, session: SessionDep):
-    translation_obj = get_translation(translation, session=session)
-    if not translation_obj:
-        raise HTTPException(status_code=404, detail="Translation not found")
 
-    book_obj = get_book(book, session=session)
-    if not book_obj:
-        raise HTTPException(status_code=404, detail="Book not found")
+async def _cacheable(request: Request, fn, *args) -> Response:
+    """
+    Serve `fn`'s payload with a corpus-versioned ETag and Cache-Control. A
+    matching If-None-Match is answered with 304 before any lookup runs.
+    """
+    version = cached_corpus_version() or await run_in_threadpool(refresh_corpus_version)
+    etag = make_etag(version, fn.__name__, *args)
 
-    return {"translation": translation_obj, "book": book_obj}
+    matched = matching_etag(request.headers.get("if-none-match"), etag)
+    if matched is not None:
+        return Response(status_code=304, headers={**cache_headers(etag), "ETag": matched})
 
+    key = (version, fn.__name__, *args)
+    cached = bible_responses.get(key)
+    if cached is None:
+        cached = bible_responses.put(key, dumps(await _coalesced(fn, *args)))
 
-@router.get("/{translation}/{book}/{chapter:int}")
-async def get_translation_book_chapter(translation: str, book: str, chapter: int, session: SessionDep):
+    encoding = response_encoding(len(cached.body), request.headers.get("accept-encoding"))
+    # The first request per encoding compresses the body, which must not block the event loop
+    content = cached.ready(encoding)
+    if content is None:
+        content = await run_in_threadpool(cached.encoded, encoding, compress)
+    return Response(
+        content=content,
+        media_type="application/json",
+        headers=cache_headers(etag, encoding),
+    )
+
+
+def _translation_and_book(translation: str, book: str, session: Session):
     translation_obj = get_translation(translation, session=session)
     if not translation_obj:
         raise HTTPException(status_code=404, detail="Translation not found")
@@ -44,54 +88,174 @@ async def get_translation_book_chapter(translation: str, book: str, chapter: int
     if not book_obj:
         raise HTTPException(status_code=404, detail="Book not found")
 
+    return translation_obj, book_obj
+
+
+def _book_payload(translation: str, book: str, session: Session):
+    translation_obj, book_obj = _translation_and_book(translation, book, session)
+    return {"translation": translation_obj.model_dump(), "book": book_obj.model_dump()}
+
+
+def _verse_entry(verse) -> dict:
+    return {"verse_number": verse.verse_num, "verse_text": verse.verse_text}
+
+
+def _chapter_payload(translation: str, book: str, chapter: int, session: Session):
+    translation_obj, book_obj = _translation_and_book(translation, book, session)
+
     book_verses = get_verses(translation_obj, book_obj, chapter, session=session)
     if not book_verses:
         raise HTTPException(status_code=404, detail="Chapter not found")
 
-    merged_dict = {
-        "translation": translation_obj,
-        "book": book_obj,
-        "chapter": {}
+    # Plain dicts with string chapter keys: the same JSON FastAPI produced from the models
+    return {
+        "translation": translation_obj.model_dump(),
+        "book": book_obj.model_dump(),
+        "chapter": {str(chapter): [_verse_entry(verse) for verse in book_verses]},
     }
 
-    for verse in book_verses:
-        chapter_num: int | None = verse.chapter_num
-        if chapter_num not in merged_dict["chapter"]:
-            merged_dict["chapter"][chapter_num] = []
-        merged_dict["chapter"][chapter_num].append({
-            "verse_number": verse.verse_num,
-            "verse_text": verse.verse_text
-        })
 
-    return merged_dict
+def _verse_payload(translation: str, book: str, chapter: int, verse: int, session: Session):
+    translation_obj, book_obj = _translation_and_book(translation, book, session)
+
+    book_verse = get_verse(translation_obj, book_obj, chapter, verse, session=session)
+    if not book_verse:
+        raise HTTPException(status_code=404, detail="Verse not found")
+
+    return {
+        "translation": translation_obj.model_dump(),
+        "book": book_obj.model_dump(),
+        "chapter": {str(book_verse.chapter_num): [_verse_entry(book_verse)]},
+    }
+
 
+def _export_target(translation: str, book: str | None, session: Session) -> tuple[Translation, Book | None]:
+    if book is not None:
+        return _translation_and_book(translation, book, session)
 
-@router.get("/{translation}/{book}/{chapter:int}/{verse:int}")
-async def get_translation_verse(translation: str, book: str, chapter: int, verse: int, session: SessionDep):
     translation_obj = get_translation(translation, session=session)
     if not translation_obj:
         raise HTTPException(status_code=404, detail="Translation not found")
+    return translation_obj, None
 
-    book_obj = get_book(book, session=session)
-    if not book_obj:
-        raise HTTPException(status_code=404, detail="Book not found")
 
-    book_verse = get_verse(translation_obj, book_obj, chapter, verse, session=session)
-    if not book_verse:
-        raise HTTPException(status_code=404, detail="Verse not found")
+def _resume_from(request: Request, from_id: int) -> tuple[int, bool]:
+    """
+    First verse id to export, from `Range: verse-id=N-`, else from the `from`
+    query parameter. N is a verse id (the `id` field of an exported line), not
+    a 0-based position. `ordinal=N-`, the unit's old name, is still accepted.
+    Other range units are ignored, as RFC 9110 allows.
+    """
+    range_header = request.headers.get("range")
+    if range_header:
+        unit, _, spec = range_header.partition("=")
+        if unit.strip().lower() in (EXPORT_RANGE_UNIT, "ordinal"):
+            start, dash, end = spec.strip().partition("-")
+            if not dash or end or not start.isdigit():
+                raise HTTPException(
+                    status_code=416,
+                    detail=f"Range must be {EXPORT_RANGE_UNIT}=N-, where N is the first verse id to send",
+                    headers={"Accept-Ranges": EXPORT_RANGE_UNIT},
+                )
+            return int(start), True
+    return from_id, False
+
+
+def _export_lines(translation: Translation, book: Book | None, from_id: int, encoding: str | None):
+    """
+    Runs in the threadpool (StreamingResponse iterates sync generators there)
+    with its own session, held for the length of the stream.
+    """
+    compressor = StreamCompressor(encoding)
+    buffer = bytearray()
+    with Session(engine) as session:
+        book_names = {b.id: b.name for b in get_books(session)}
+        for verse in iter_verses(translation, session, book=book, from_id=from_id, batch_size=EXPORT_BATCH_SIZE):
+            buffer += dumps({
+                "id": verse.id,
+                "translation": translation.translation_shortname,
+                "book": book_names.get(verse.book_id),
+                "chapter": verse.chapter_num,
+                "verse": verse.verse_num,
+                "text": verse.verse_text,
+            })
+            buffer += b"\n"
+            if len(buffer) >= EXPORT_CHUNK_BYTES:
+                yield compressor.chunk(bytes(buffer))
+                buffer.clear()
+    yield compressor.chunk(bytes(buffer)) + compressor.finish()
+
+
+async def _export(request: Request, translation: str, book: str | None, from_id: int):
+    start, partial = _resume_from(request, from_id)
+
+    version = cached_corpus_version() or await run_in_threadpool(refresh_corpus_version)
+    etag = make_etag(version, "export", translation, book, start)
+    matched = matching_etag(request.headers.get("if-none-match"), etag)
+    if matched is not None:
+        return Response(status_code=304, headers={**cache_headers(etag), "ETag": matched})
+
+    translation_obj, book_obj = await run_in_threadpool(run_in_session, _export_target, translation, book)
+
+    encoding = negotiate_encoding(request.headers.get("accept-encoding"))
+    headers = {**cache_headers(etag, encoding), "Accept-Ranges": EXPORT_RANGE_UNIT}
+    if partial:
+        headers["Content-Range"] = f"{EXPORT_RANGE_UNIT} {start}-*/*"
+    return StreamingResponse(
+        _export_lines(translation_obj, book_obj, start, encoding),
+        status_code=206 if partial else 200,
+        media_type="application/x-ndjson",
+        headers=headers,
+    )
+
+
+# Export routes are registered first so "export" is not taken for a book name
+@router.get("/{translation}/export")
+async def export_translation(
+    translation: str,
+    request: Request,
+    from_id: Annotated[int, Query(alias="from", ge=0)] = 0,
+):
+    """
+    The whole translation as NDJSON, one verse per line in verse id order.
+    Resume an interrupted sync with `?from=<last id + 1>` or `Range: verse-id=<last id + 1>-`.
+    Both take a verse id, not a line count: ids are not contiguous within a
+    translation, so always resume from the last `id` received.
+    """
+    return await _export(request, translation, None, from_id)
+
+
+@router.get("/{translation}/{book}/export")
+async def export_book(
+    translation: str,
+    book: str,
+    request: Request,
+    from_id: Annotated[int, Query(alias="from", ge=0)] = 0,
+):
+    """One book as NDJSON; same line format and resume options as the translation export."""
+    return await _export(request, translation, book, from_id)
 
-    merged_dict = {
-        "translation": translation_obj,
-        "book": book_obj,
-        "chapter": {}
-    }
 
-    chapter_num: int | None = book_verse.chapter_num
-    if chapter_num not in merged_dict["chapter"]:
-        merged_dict["chapter"][chapter_num] = []
-    merged_dict["chapter"][chapter_num].append({
-        "verse_number": book_verse.verse_num,
-        "verse_text": book_verse.verse_text
-    })
+@router.get("/{translation}")
+async def api_get_translation(translation: str, session: SessionDep) -> Translation:
+    translation_obj = get_translation(translation, session=session)
+
+    if not translation_obj:
+        raise HTTPException(status_code=404, detail="Translation not found")
+
+    return translation_obj
 
-    return merged_dict
+
+@router.get("/{translation}/{book}")
+async def get_translation_book(translation: str, book: str, request: Request):
+    return await _cacheable(request, _book_payload, translation, book)
+
+
+@router.get("/{translation}/{book}/{chapter:int}")
+async def get_translation_book_chapter(translation: str, book: str, chapter: int, request: Request):
+    return await _cacheable(request, _chapter_payload, translation, book, chapter)
+
+
+@router.get("/{translation}/{book}/{chapter:int}/{verse:int}")
+async def get_translation_verse(translation: str, book: str, chapter: int, verse: int, request: Request):
+    return await _cacheable(request, _verse_payload, translation, book, chapter, verse)
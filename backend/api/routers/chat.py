@@ -1,34 +1,168 @@
 import logging
-from typing import Annotated
-from fastapi import APIRouter, Depends, HTTPException
-from sqlmodel import Session
+import os
+from typing import Annotated, Any
+from fastapi import APIRouter, Header, HTTPException, Response
+from fastapi.concurrency import run_in_threadpool
 
-from ...db_session import get_session
-from ...ai.agent import send_prompt
+from ...db_session import run_in_session
+from ...ai.agent import record_exchange, run_prompt
+from ...ai.answer_cache import answer_cache, normalize_prompt, ANSWER_CACHE_ENABLED
+from ...ai.intent_router import intent_router
 from ...schemas.chat import ChatRequest, ChatResponse
 from ...services.scripture_service import try_parse_scripture_query, wants_commentary, scripture_lookup_from_db
+from ...services.admission import AdmissionController, AdmissionRejected
+from ...services.metrics import span
+from ...services.single_flight import SINGLE_FLIGHT_TIMEOUT_SECONDS, AsyncSingleFlight, make_key
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/chat", tags=["chat"])
 
-SessionDep = Annotated[Session, Depends(get_session)]
+# Identical concurrent prompts share one lookup or agent run
+CHAT_SINGLE_FLIGHT_TIMEOUT_SECONDS = float(os.getenv("CHAT_SINGLE_FLIGHT_TIMEOUT_SECONDS", "120"))
+chat_flight = AsyncSingleFlight()
+
+# Bounded concurrency + bounded wait queue for agent runs on /api/chat
+chat_admission = AdmissionController(
+    max_concurrent=int(os.getenv("CHAT_MAX_CONCURRENT", "16")),
+    max_queue=int(os.getenv("CHAT_MAX_QUEUE", "64")),
+    queue_timeout=float(os.getenv("CHAT_QUEUE_TIMEOUT_SECONDS", "10")),
+    retry_after=int(os.getenv("CHAT_RETRY_AFTER_SECONDS", "2")),
+)
+# Reference lookups, routed intents and answer-cache hits get their own slots,
+# so their queue time never depends on long agent runs
+chat_fast_admission = AdmissionController(
+    max_concurrent=int(os.getenv("CHAT_FAST_MAX_CONCURRENT", "8")),
+    max_queue=int(os.getenv("CHAT_FAST_MAX_QUEUE", "64")),
+    queue_timeout=float(os.getenv("CHAT_FAST_QUEUE_TIMEOUT_SECONDS", "2")),
+    retry_after=int(os.getenv("CHAT_RETRY_AFTER_SECONDS", "2")),
+)
+
+
+def _answer_prompt(prompt: str, conversation_id: str | None, embedding=None) -> tuple[str, dict]:
+    answer, usage = run_prompt(prompt, conversation_id)
+    # Answers that depend on earlier turns are not reusable for other conversations,
+    # and degraded ones (cut short by the deadline or written by the fallback model) should not outlive this request
+    degraded = usage.get("deadline_exceeded") or usage.get("fallback_calls")
+    if ANSWER_CACHE_ENABLED and conversation_id is None and not degraded:
+        answer_cache.store(prompt, answer, embedding)
+    return answer, usage
+
+
+async def _record(req: ChatRequest, answer: str) -> ChatResponse:
+    if req.id is not None:
+        await run_in_threadpool(record_exchange, req.id, req.prompt, answer)
+    return ChatResponse(id=req.id, answer=answer)
 
 
 @router.post("", response_model=ChatResponse)
-async def chat(req: ChatRequest, session: SessionDep) -> ChatResponse:
-    parsed = try_parse_scripture_query(req.prompt)
+async def chat(
+    req: ChatRequest,
+    response: Response,
+    x_answer_cache: Annotated[str | None, Header()] = None,
+) -> ChatResponse:
+    with span("chat", "classify"):
+        parsed = try_parse_scripture_query(req.prompt)
+        if parsed is not None and wants_commentary(req.prompt):
+            parsed = None
+        classified = intent_router.classify(req.prompt) if parsed is None else None
 
+    try:
+        async with chat_fast_admission.admit():
+            answer, embedding = await _fast_answer(req, response, x_answer_cache, parsed, classified)
+        if answer is not None:
+            return answer
+        async with chat_admission.admit():
+            return await _agent_answer(req, embedding)
+    except AdmissionRejected as e:
+        logger.warning(
+            "chat rejected status=%s reason=%s fast=%s agent=%s",
+            e.status_code, e.reason, chat_fast_admission.stats(), chat_admission.stats(),
+        )
+        raise HTTPException(status_code=e.status_code, detail=e.reason, headers={"Retry-After": str(e.retry_after)}) from e
+
+
+async def _fast_answer(
+    req: ChatRequest, response: Response, x_answer_cache: str | None, parsed, classified,
+) -> tuple[ChatResponse | None, Any]:
+    """
+    An answer that needs no LLM call, or None to hand the prompt to the agent,
+    plus the prompt embedding from the answer-cache lookup (if one ran).
+    """
     # If it's a clean scripture reference AND no commentary requested,
     # bypass the agent entirely
-    if parsed is not None and not wants_commentary(req.prompt):
-        answer = scripture_lookup_from_db(parsed, session=session)
-        return ChatResponse(answer=answer)
+    if parsed is not None:
+        try:
+            with span("chat", "scripture_lookup"):
+                answer = await chat_flight.do(
+                    make_key("scripture_lookup_from_db", parsed.model_dump()),
+                    lambda: run_in_threadpool(run_in_session, scripture_lookup_from_db, parsed),
+                    timeout=SINGLE_FLIGHT_TIMEOUT_SECONDS,
+                )
+        except TimeoutError as e:
+            raise HTTPException(status_code=504, detail="Timed out waiting for scripture lookup") from e
+        return await _record(req, answer), None
+
+    # Prompts that map onto a fixed tool chain (compare, chapters, keyword, similar) skip the LLM
+    if classified is None:
+        intent_router.dispatch(None)
+    else:
+        try:
+            with span("chat", "intent_router"):
+                routed = await chat_flight.do(
+                    make_key("intent_router", req.prompt),
+                    lambda: run_in_threadpool(intent_router.dispatch, classified),
+                    timeout=SINGLE_FLIGHT_TIMEOUT_SECONDS,
+                )
+        except TimeoutError:
+            routed = None
+        if routed is not None:
+            return await _record(req, routed), None
 
-    # Otherwise use the agent (commentary, compare, etc.)
+    # Near-duplicate prompts reuse an earlier agent answer; "X-Answer-Cache: bypass" forces a fresh one.
+    # Follow-ups in a conversation (req.id) always go to the agent with their history.
+    use_cache = ANSWER_CACHE_ENABLED and req.id is None and (x_answer_cache or "").lower() != "bypass"
+    if use_cache:
+        with span("chat", "answer_cache"):
+            # Embedding the prompt is CPU-bound, so it stays off the event loop
+            cached, embedding = await run_in_threadpool(answer_cache.probe, req.prompt)
+        if cached is not None:
+            response.headers["X-Answer-Cache"] = f"hit-{cached.kind}"
+            return ChatResponse(answer=cached.answer), None
+        response.headers["X-Answer-Cache"] = "miss"
+        return None, embedding
+    if ANSWER_CACHE_ENABLED and req.id is None:
+        answer_cache.record_bypass()
+        response.headers["X-Answer-Cache"] = "bypass"
+    return None, None
+
+
+async def _agent_answer(req: ChatRequest, embedding=None) -> ChatResponse:
     try:
-        answer = send_prompt(req.prompt)
-        return ChatResponse(answer=answer)
+        with span("chat", "agent"):
+            answer, usage = await chat_flight.do(
+                make_key("send_prompt", normalize_prompt(req.prompt), req.id),
+                lambda: run_in_threadpool(_answer_prompt, req.prompt, req.id, embedding),
+                timeout=CHAT_SINGLE_FLIGHT_TIMEOUT_SECONDS,
+            )
+        return ChatResponse(id=req.id, answer=answer, usage=usage)
+    except TimeoutError as e:
+        raise HTTPException(status_code=504, detail="Timed out waiting for agent") from e
     except Exception as e:
         logger.exception("Agent error")
         raise HTTPException(status_code=500, detail="Agent error") from e
+
+
+@router.get("/cache/stats")
+async def chat_cache_stats():
+    return answer_cache.stats()
+
+
+@router.get("/intent/stats")
+async def chat_intent_stats():
+    return intent_router.stats()
+
+
+@router.get("/admission/stats")
+async def chat_admission_stats():
+    return {"fast": chat_fast_admission.stats(), "agent": chat_admission.stats()}
@@ -0,0 +1,48 @@
+from fastapi import APIRouter, Header, HTTPException, Query, Response
+from fastapi.responses import FileResponse
+from fastapi.concurrency import run_in_threadpool
+
+from . import bible, chat
+from ...ai import llm_policy
+from ...ai.agent_tools import tool_flight
+from ...ai.answer_cache import answer_cache
+from ...ai.intent_router import intent_router
+from ...services import log_pipeline, profiler
+from ...services.llm_cache import llm_cache
+from ...services.metrics import registry
+
+router = APIRouter(tags=["metrics"])
+
+registry.register_stats("llm_cache", llm_cache.stats)
+registry.register_stats("answer_cache", answer_cache.stats)
+registry.register_stats("intent_router", intent_router.stats)
+registry.register_stats("response_cache", bible.bible_responses.stats)
+registry.register_stats("chat_admission", chat.chat_admission.stats)
+registry.register_stats("chat_fast_admission", chat.chat_fast_admission.stats)
+registry.register_stats("llm_calls", llm_policy.stats)
+registry.register_stats("logging", log_pipeline.stats)
+registry.register_stats("single_flight_shared", lambda: {
+    "bible": bible.bible_flight.shared,
+    "chat": chat.chat_flight.shared,
+    "tools": tool_flight.shared,
+})
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics():
+    # Some stats (llm_cache) read SQLite, so render off the event loop
+    body = await run_in_threadpool(registry.render)
+    return Response(content=body, media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+@router.get("/debug/profiles/{profile_id}", include_in_schema=False)
+async def get_profile(
+    profile_id: str,
+    x_profile: str | None = Header(default=None),
+    profile: str | None = Query(default=None),
+):
+    """Collapsed stacks of a profiled request (see services/profiler.py); needs the same flag/token as capture."""
+    path = profiler.profile_path(profile_id) if profiler.authorized(x_profile or profile) else None
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, media_type="text/plain; charset=utf-8")
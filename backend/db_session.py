@@ -6,11 +6,20 @@ from sqlmodel import Session, create_engine
 load_dotenv()
 
 db_url = os.getenv("NEON_DB_URL")
-if not db_url:
+snapshot_path = os.getenv("CORPUS_SNAPSHOT_PATH")
+if not db_url and not snapshot_path:
     raise Exception("DATABASE URL IS NOT SET")
 
-engine = create_engine(db_url)
+# Snapshot-only deployments never open a database connection; sessions are
+# created unbound and ignored by the snapshot-backed query functions.
+engine = create_engine(db_url) if db_url else None
 
 def get_session():
     with Session(engine) as session:
-        yield session
\ No newline at end of file
+        yield session
+
+
+def run_in_session(fn, *args, **kwargs):
+    """Run `fn` with its own session, for shared work that must not depend on one request's session."""
+    with Session(engine) as session:
+        return fn(*args, session=session, **kwargs)
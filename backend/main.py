@@ -1,22 +1,33 @@
 import logging
+import os
+import time
 from contextlib import asynccontextmanager
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 
-from .api.routers import chat, bible
+from .ai.agent_tools import warm_embedding_store
+from .api.routers import chat, bible, metrics
+from .services import profiler
+from .services.log_pipeline import configure_logging, shutdown_logging
+from .services.metrics import accept_trace_id, http_duration, stage_totals, trace
 
 logger = logging.getLogger(__name__)
 
+TRACE_ID_HEADER = os.getenv("TRACE_ID_HEADER", "X-Trace-Id")
+TRACE_ID_HEADER_ENABLED = os.getenv("TRACE_ID_HEADER_ENABLED", "true").lower() != "false"
+# Requests slower than this get their per-stage breakdown logged
+TRACE_LOG_SLOW_SECONDS = float(os.getenv("TRACE_LOG_SLOW_SECONDS", "2"))
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    logging.basicConfig(
-        level=logging.INFO,
-        format="%(asctime)s %(levelname)s [%(name)s] %(message)s",
-    )
+    configure_logging()
     logger.info("Starting backend")
+    await run_in_threadpool(warm_embedding_store)
     yield
     logger.info("Shutting down backend")
+    shutdown_logging()
 
 
 def create_app() -> FastAPI:
@@ -31,10 +42,43 @@ def create_app() -> FastAPI:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=[TRACE_ID_HEADER, "X-Profile-Id"],
     )
 
+    @app.middleware("http")
+    async def trace_requests(request: Request, call_next):
+        # A valid caller-supplied trace id is kept so client and server logs line up
+        trace_id = accept_trace_id(request.headers.get(TRACE_ID_HEADER))
+        flag = request.headers.get(profiler.PROFILE_HEADER) or request.query_params.get(profiler.PROFILE_QUERY_PARAM)
+        profile = profiler.begin() if profiler.requested(request.url.path, flag) else None
+        start = time.perf_counter()
+        status = 500
+        with trace(trace_id) as current:
+            try:
+                response = await call_next(request)
+                status = response.status_code
+            finally:
+                seconds = time.perf_counter() - start
+                route = getattr(request.scope.get("route"), "path", "unmatched")
+                http_duration.observe(seconds, request.method, route, status)
+                if seconds >= TRACE_LOG_SLOW_SECONDS:
+                    logger.info(
+                        "slow request trace_id=%s route=%s status=%s seconds=%.3f stages=%s",
+                        trace_id, route, status, seconds,
+                        {k: round(v, 3) for k, v in stage_totals(current).items()},
+                    )
+                if profile is not None:
+                    profile_id = await run_in_threadpool(profiler.finish, profile)
+
+        if TRACE_ID_HEADER_ENABLED:
+            response.headers[TRACE_ID_HEADER] = trace_id
+        if profile is not None:
+            response.headers["X-Profile-Id"] = profile_id
+        return response
+
     app.include_router(chat.router)
     app.include_router(bible.router)
+    app.include_router(metrics.router)
 
     @app.get("/")
     async def root():
@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import Any, Optional
 from pydantic import BaseModel, Field
 
 class ChatRequest(BaseModel):
@@ -10,3 +10,5 @@ class ChatResponse(BaseModel):
     id: Optional[str] = None
     role: str = "assistant"
     answer: str
+    # Token accounting for agent answers (see ai.token_budget.usage_report)
+    usage: Optional[dict[str, Any]] = None
@@ -2,6 +2,8 @@ from pydantic import BaseModel, Field
 from typing import Optional
 
 DEFAULT_TRANSLATION = "BSB"
+# The one translation with verse embeddings; semantic search only covers it
+SEMANTIC_SEARCH_TRANSLATION = "BSB"
 
 class ScriptureQuery(BaseModel):
     book: str
@@ -0,0 +1,127 @@
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, status_code: int, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.status_code = status_code
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class _Waiter:
+    __slots__ = ("future", "enqueued_at")
+
+    def __init__(self, future: asyncio.Future):
+        self.future = future
+        self.enqueued_at = time.perf_counter()
+
+    @property
+    def granted(self) -> bool:
+        return self.future.done() and not self.future.cancelled()
+
+
+class AdmissionController:
+    """
+    Bounded concurrency with a bounded FIFO wait queue.
+
+    Up to `max_concurrent` requests run at once. Others wait in arrival order
+    for at most `queue_timeout` seconds. When the queue is full, a new request
+    is rejected straight away (429). A request still queued at its deadline
+    gets a 503. Both carry a Retry-After hint. Work with different latency
+    needs gets its own controller rather than sharing one queue.
+
+    All methods must be called from the event loop thread.
+    """
+
+    def __init__(self, max_concurrent: int, max_queue: int, queue_timeout: float, retry_after: int = 1):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+        self.in_flight = 0
+        self._queue: deque[_Waiter] = deque()
+        self._recent_waits: deque[float] = deque(maxlen=1024)
+        self.counts = {"admitted": 0, "queued": 0, "rejected_queue_full": 0, "rejected_timeout": 0}
+        self.wait_seconds_total = 0.0
+
+    @property
+    def queue_depth(self) -> int:
+        return sum(1 for w in self._queue if not w.future.done())
+
+    def _record_wait(self, seconds: float) -> None:
+        self._recent_waits.append(seconds)
+        self.wait_seconds_total += seconds
+
+    async def acquire(self) -> None:
+        if self.in_flight < self.max_concurrent and not self.queue_depth:
+            self.in_flight += 1
+            self.counts["admitted"] += 1
+            self._record_wait(0.0)
+            return
+
+        if self.queue_depth >= self.max_queue:
+            self.counts["rejected_queue_full"] += 1
+            raise AdmissionRejected(429, "Server busy", self.retry_after)
+
+        waiter = _Waiter(asyncio.get_running_loop().create_future())
+        self._queue.append(waiter)
+        self.counts["queued"] += 1
+
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.future), self.queue_timeout)
+        except TimeoutError:
+            # A slot handed over just as the deadline passed is kept
+            if not waiter.future.done():
+                waiter.future.cancel()
+                self.counts["rejected_timeout"] += 1
+                self._record_wait(time.perf_counter() - waiter.enqueued_at)
+                raise AdmissionRejected(503, "Timed out waiting for capacity", self.retry_after)
+        except asyncio.CancelledError:
+            if waiter.granted:
+                self.release()
+            else:
+                waiter.future.cancel()
+            raise
+
+        self.counts["admitted"] += 1
+        self._record_wait(time.perf_counter() - waiter.enqueued_at)
+
+    def release(self) -> None:
+        while self._queue:
+            waiter = self._queue.popleft()
+            if not waiter.future.done():
+                # Hand the slot straight to the next waiter; in_flight stays the same
+                waiter.future.set_result(True)
+                return
+        self.in_flight -= 1
+
+    @asynccontextmanager
+    async def admit(self):
+        await self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    def stats(self) -> dict[str, Any]:
+        waits = sorted(self._recent_waits)
+
+        def percentile(p: float) -> float:
+            return waits[min(len(waits) - 1, int(p * len(waits)))] if waits else 0.0
+
+        return {
+            **self.counts,
+            "in_flight": self.in_flight,
+            "queue_depth": self.queue_depth,
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+            "wait_seconds_total": self.wait_seconds_total,
+            "wait_seconds_p50": percentile(0.50),
+            "wait_seconds_p95": percentile(0.95),
+            "wait_seconds_max": waits[-1] if waits else 0.0,
+        }
@@ -0,0 +1,277 @@
+import hashlib
+import json
+import mmap
+import os
+import struct
+from typing import Iterable, NamedTuple
+
+import numpy as np
+
+SNAPSHOT_MAGIC = b"BIBLSNAP"
+SNAPSHOT_FORMAT_VERSION = 1
+
+# magic, format version, header length
+_PREAMBLE = struct.Struct("<8sII")
+_ALIGN = 64
+
+# Sections are stored row-aligned and sorted by (translation, book, chapter, verse),
+# so a verse's ordinal is its row index and every chapter is a contiguous range.
+_SECTIONS = {
+    "ids": np.int64,
+    "keys": np.int64,
+    "translation_ids": np.int32,
+    "book_ids": np.int32,
+    "chapters": np.int16,
+    "verses": np.int16,
+    "text_offsets": np.uint64,
+    "text": np.uint8,
+    "id_order": np.int64,
+    "embeddings": np.float32,
+}
+
+
+# Field widths in verse_key. A stored verse must stay below each limit; the
+# limit itself is still accepted as the exclusive end of a range.
+MAX_TRANSLATION_ID = (1 << 31) - 1
+MAX_BOOK_ID = 1 << 8
+MAX_CHAPTER = 1 << 12
+MAX_VERSE = 1 << 12
+
+
+def verse_key(translation_id: int, book_id: int, chapter: int = 0, verse: int = 0) -> int:
+    """
+    Composite sort key; chapters and verses each fit in 12 bits, books in 8.
+    Raises ValueError for a field outside its width, which would otherwise
+    carry into the next field and collide with another verse's key.
+    """
+    if not (0 <= translation_id <= MAX_TRANSLATION_ID and 0 <= book_id <= MAX_BOOK_ID
+            and 0 <= chapter <= MAX_CHAPTER and 0 <= verse <= MAX_VERSE):
+        raise ValueError(f"verse key out of range: {(translation_id, book_id, chapter, verse)}")
+    # Added rather than OR-ed, so a field at its limit carries into the next one
+    return (translation_id << 32) + (book_id << 24) + (chapter << 12) + verse
+
+
+def _stored_key(v: "SnapshotVerse") -> int:
+    if (v.translation_id >= MAX_TRANSLATION_ID or v.book_id >= MAX_BOOK_ID
+            or v.chapter_num >= MAX_CHAPTER or v.verse_num >= MAX_VERSE):
+        raise ValueError(f"verse {v.id} does not fit the snapshot key: {v[1:5]}")
+    return verse_key(v.translation_id, v.book_id, v.chapter_num, v.verse_num)
+
+
+class SnapshotVerse(NamedTuple):
+    id: int
+    translation_id: int
+    book_id: int
+    chapter_num: int
+    verse_num: int
+    verse_text: str
+    verse_embedding: list[float] | None = None
+
+
+def _pad(fh, position: int) -> int:
+    padding = (-position) % _ALIGN
+    fh.write(b"\0" * padding)
+    return position + padding
+
+
+def write_snapshot(
+    path: str,
+    translations: list[dict],
+    books: list[dict],
+    verses: Iterable[SnapshotVerse],
+    verse_count: int | None = None,
+    dims: int = 384,
+) -> str:
+    """
+    Write a memory-mappable corpus snapshot and return its corpus version.
+
+    `verses` must already be ordered by (translation, book, chapter, verse).
+    With `verse_count` they are streamed into preallocated arrays, so only one
+    row is held as Python objects at a time; without it they are read into a
+    list first to count them.
+
+    Layout: preamble | JSON header (catalog + section table) | 64-byte aligned
+    sections. Everything after the header is raw little-endian arrays, so a
+    reader can `np.frombuffer` straight out of the mmap.
+    """
+    if verse_count is None:
+        verses = list(verses)
+        verse_count = len(verses)
+
+    ids = np.empty(verse_count, dtype=np.int64)
+    keys = np.empty(verse_count, dtype=np.int64)
+    translation_ids = np.empty(verse_count, dtype=np.int32)
+    book_ids = np.empty(verse_count, dtype=np.int32)
+    chapters = np.empty(verse_count, dtype=np.int16)
+    verse_nums = np.empty(verse_count, dtype=np.int16)
+    text_offsets = np.zeros(verse_count + 1, dtype=np.uint64)
+    text = bytearray()
+    # Dropped as soon as one verse has no embedding
+    embeddings = np.empty((verse_count, dims), dtype=np.float32) if verse_count else None
+
+    count = 0
+    for v in verses:
+        if count == verse_count:
+            raise ValueError(f"more than the expected {verse_count} verses")
+        key = _stored_key(v)
+        if count and key <= keys[count - 1]:
+            raise ValueError(f"verses must be ordered by (translation, book, chapter, verse) without duplicates; got {v[1:5]}")
+
+        ids[count] = v.id
+        keys[count] = key
+        translation_ids[count] = v.translation_id
+        book_ids[count] = v.book_id
+        chapters[count] = v.chapter_num
+        verse_nums[count] = v.verse_num
+        text += v.verse_text.encode("utf-8")
+        text_offsets[count + 1] = len(text)
+        if embeddings is not None:
+            if v.verse_embedding is None:
+                embeddings = None
+            else:
+                embeddings[count] = v.verse_embedding
+        count += 1
+    if count != verse_count:
+        raise ValueError(f"expected {verse_count} verses, got {count}")
+
+    arrays = {
+        "ids": ids,
+        "keys": keys,
+        "translation_ids": translation_ids,
+        "book_ids": book_ids,
+        "chapters": chapters,
+        "verses": verse_nums,
+        "text_offsets": text_offsets,
+        "text": np.frombuffer(bytes(text), dtype=np.uint8),
+        "id_order": np.argsort(ids, kind="stable").astype(np.int64),
+    }
+
+    if embeddings is not None:
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        embeddings /= norms
+        arrays["embeddings"] = embeddings
+
+    digest = hashlib.sha256()
+    for name in _SECTIONS:
+        if name in arrays:
+            digest.update(arrays[name].tobytes())
+    corpus_version = digest.hexdigest()[:16]
+
+    # Section offsets depend on the header length, so lay them out relative to
+    # the first aligned byte after the header and fix up once the header is sized.
+    relative = {}
+    position = 0
+    for name in _SECTIONS:
+        if name not in arrays:
+            continue
+        position += (-position) % _ALIGN
+        relative[name] = position
+        position += arrays[name].nbytes
+
+    header = {
+        "format_version": SNAPSHOT_FORMAT_VERSION,
+        "corpus_version": corpus_version,
+        "verse_count": verse_count,
+        "dims": dims if "embeddings" in arrays else 0,
+        "translations": translations,
+        "books": books,
+        "sections": {},
+    }
+
+    # Offsets are padded to a fixed width so the header length does not change
+    # while they are being filled in.
+    def encode_header(base: int) -> bytes:
+        header["sections"] = {
+            name: {"offset": f"{base + offset:016d}", "shape": list(arrays[name].shape)}
+            for name, offset in relative.items()
+        }
+        return json.dumps(header).encode("utf-8")
+
+    header_len = len(encode_header(0))
+    base = _PREAMBLE.size + header_len
+    base += (-base) % _ALIGN
+    header_bytes = encode_header(base)
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as fh:
+        fh.write(_PREAMBLE.pack(SNAPSHOT_MAGIC, SNAPSHOT_FORMAT_VERSION, len(header_bytes)))
+        fh.write(header_bytes)
+        written = _pad(fh, _PREAMBLE.size + len(header_bytes))
+        for name in _SECTIONS:
+            if name not in arrays:
+                continue
+            written = _pad(fh, written)
+            fh.write(arrays[name].tobytes())
+            written += arrays[name].nbytes
+    os.replace(tmp_path, path)
+
+    return corpus_version
+
+
+class CorpusSnapshot:
+    """
+    Read-only view over a snapshot file. All arrays are zero-copy views into a
+    shared mmap, so every worker process opening the same file shares its pages.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as fh:
+            self._mmap = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, format_version, header_len = _PREAMBLE.unpack_from(self._mmap, 0)
+        if magic != SNAPSHOT_MAGIC:
+            raise ValueError(f"{path} is not a corpus snapshot")
+        if format_version != SNAPSHOT_FORMAT_VERSION:
+            raise ValueError(f"Unsupported snapshot format version {format_version} in {path}")
+
+        header = json.loads(self._mmap[_PREAMBLE.size:_PREAMBLE.size + header_len])
+        self.corpus_version: str = header["corpus_version"]
+        self.verse_count: int = header["verse_count"]
+        self.dims: int = header["dims"]
+        self.translations: list[dict] = header["translations"]
+        self.books: list[dict] = header["books"]
+
+        self._text_base = int(header["sections"]["text"]["offset"])
+        self._arrays: dict[str, np.ndarray] = {}
+        for name, section in header["sections"].items():
+            dtype = np.dtype(_SECTIONS[name])
+            shape = tuple(section["shape"])
+            count = int(np.prod(shape)) if shape else 0
+            self._arrays[name] = np.frombuffer(
+                self._mmap, dtype=dtype, count=count, offset=int(section["offset"])
+            ).reshape(shape)
+
+    def __getattr__(self, name: str) -> np.ndarray:
+        arrays = self.__dict__.get("_arrays", {})
+        if name in arrays:
+            return arrays[name]
+        raise AttributeError(name)
+
+    @property
+    def has_embeddings(self) -> bool:
+        return "embeddings" in self._arrays
+
+    def key_range(self, low_key: int, high_key: int) -> tuple[int, int]:
+        """Ordinal range [start, stop) of rows whose key falls in [low_key, high_key)."""
+        keys = self._arrays["keys"]
+        return int(np.searchsorted(keys, low_key, "left")), int(np.searchsorted(keys, high_key, "left"))
+
+    def text(self, ordinal: int) -> str:
+        offsets = self._arrays["text_offsets"]
+        start = self._text_base + int(offsets[ordinal])
+        stop = self._text_base + int(offsets[ordinal + 1])
+        return self._mmap[start:stop].decode("utf-8")
+
+    def ordinal_for_id(self, verse_id: int) -> int | None:
+        ids = self._arrays["ids"]
+        order = self._arrays["id_order"]
+        position = int(np.searchsorted(ids, verse_id, sorter=order))
+        if position < len(order) and ids[order[position]] == verse_id:
+            return int(order[position])
+        return None
+
+    def close(self) -> None:
+        self._arrays.clear()
+        self._mmap.close()
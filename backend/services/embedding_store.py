@@ -0,0 +1,142 @@
+import numpy as np
+
+EMBEDDING_STORAGE_MODES = ("float32", "float16", "int8", "binary")
+
+# Rows scored per matmul when the codes have to be widened to float32 first,
+# so the temporary never grows to the size of the whole corpus.
+_CHUNK_ROWS = 65536
+
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+class EmbeddingStore:
+    """
+    In-memory verse embedding index with a selectable storage precision:
+      - float32: full precision (baseline)
+      - float16: half precision, scored exactly after widening
+      - int8: per-dimension scalar quantization
+      - binary: one sign bit per dimension, ranked by Hamming distance
+
+    Vectors are L2-normalized on encode so dot products are cosine similarities,
+    matching pgvector's `<=>` ordering. `translation` records which
+    translation's verse ids the store holds (None for stores saved without it).
+    """
+
+    def __init__(self, mode: str, ids: np.ndarray, codes: np.ndarray, dims: int, scale: np.ndarray | None = None,
+                 translation: str | None = None):
+        if mode not in EMBEDDING_STORAGE_MODES:
+            raise ValueError(f"Unknown embedding storage mode: {mode}")
+        self.mode = mode
+        self.ids = np.asarray(ids, dtype=np.int64)
+        self.codes = codes
+        self.dims = dims
+        self.scale = scale
+        self.translation = translation
+
+    @classmethod
+    def encode(cls, ids, embeddings, mode: str = "float32", translation: str | None = None) -> "EmbeddingStore":
+        matrix = _normalize(embeddings)
+        dims = matrix.shape[1]
+        scale = None
+
+        if mode == "float32":
+            codes = matrix
+        elif mode == "float16":
+            codes = matrix.astype(np.float16)
+        elif mode == "int8":
+            scale = np.abs(matrix).max(axis=0) / 127.0
+            scale[scale == 0] = 1.0
+            codes = np.clip(np.rint(matrix / scale), -127, 127).astype(np.int8)
+            scale = scale.astype(np.float32)
+        elif mode == "binary":
+            codes = np.packbits(matrix > 0, axis=1)
+        else:
+            raise ValueError(f"Unknown embedding storage mode: {mode}")
+
+        return cls(mode, ids, codes, dims, scale, translation)
+
+    @classmethod
+    def load(cls, path: str) -> "EmbeddingStore":
+        with np.load(path) as data:
+            scale = data["scale"] if data["scale"].size else None
+            translation = str(data["translation"]) if "translation" in data.files else ""
+            return cls(str(data["mode"]), data["ids"], data["codes"], int(data["dims"]), scale, translation or None)
+
+    def save(self, path: str) -> None:
+        np.savez(
+            path,
+            mode=np.array(self.mode),
+            ids=self.ids,
+            codes=self.codes,
+            dims=np.array(self.dims),
+            scale=self.scale if self.scale is not None else np.empty(0, dtype=np.float32),
+            translation=np.array(self.translation or ""),
+        )
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def nbytes(self) -> int:
+        total = self.ids.nbytes + self.codes.nbytes
+        if self.scale is not None:
+            total += self.scale.nbytes
+        return total
+
+    def _scores(self, query: np.ndarray) -> np.ndarray:
+        """Approximate cosine similarity of the query against every stored vector."""
+        if self.mode == "float32":
+            return self.codes @ query
+
+        if self.mode == "binary":
+            query_bits = np.packbits(query > 0)
+            scores = np.empty(len(self.codes), dtype=np.float32)
+            for start in range(0, len(self.codes), _CHUNK_ROWS):
+                chunk = self.codes[start:start + _CHUNK_ROWS]
+                distance = _POPCOUNT[chunk ^ query_bits].sum(axis=1, dtype=np.int32)
+                scores[start:start + len(chunk)] = 1.0 - distance / self.dims
+            return scores
+
+        # int8 codes are scored against a pre-scaled query: (c * s) . q == c . (s * q)
+        weights = query * self.scale if self.mode == "int8" else query
+        scores = np.empty(len(self.codes), dtype=np.float32)
+        for start in range(0, len(self.codes), _CHUNK_ROWS):
+            chunk = self.codes[start:start + _CHUNK_ROWS]
+            scores[start:start + len(chunk)] = chunk.astype(np.float32) @ weights
+        return scores
+
+    def candidates(self, query, k: int) -> tuple[np.ndarray, np.ndarray]:
+        """Return the ids and approximate scores of the top-k stored vectors, best first."""
+        query = _normalize(query)
+        scores = self._scores(query)
+        k = min(k, len(scores))
+        if k <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return self.ids[top], scores[top]
+
+    def search(self, query, limit: int = 20, vectors=None, rerank_factor: int = 10) -> list[tuple[int, float]]:
+        """
+        Return (id, score) pairs for the `limit` nearest verses.
+
+        When `vectors` is given (a callable mapping an array of ids to their
+        full-precision embeddings), the top `limit * rerank_factor` candidates
+        are re-ranked exactly; binary codes should always be re-ranked.
+        """
+        if vectors is None:
+            ids, scores = self.candidates(query, limit)
+            return list(zip(ids.tolist(), scores.tolist()))
+
+        ids, _ = self.candidates(query, limit * rerank_factor)
+        exact = _normalize(vectors(ids)) @ _normalize(query)
+        order = np.argsort(-exact, kind="stable")[:limit]
+        return list(zip(ids[order].tolist(), exact[order].tolist()))
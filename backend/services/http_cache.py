@@ -0,0 +1,166 @@
+"""
+HTTP caching helpers for scripture routes whose responses only change when ETL runs.
+
+ETags are derived from a corpus version: CORPUS_VERSION when set, otherwise
+the snapshot's version or a fingerprint of the database, re-read every
+CORPUS_VERSION_REFRESH_SECONDS. Compression is per route rather than global
+middleware, so chat responses and the 304 path never pay for it.
+"""
+import gzip
+import hashlib
+import os
+import threading
+import time
+import zlib
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+from ..db_session import run_in_session
+from .sql_service import get_corpus_version
+
+CORPUS_VERSION = os.getenv("CORPUS_VERSION")
+CORPUS_VERSION_REFRESH_SECONDS = float(os.getenv("CORPUS_VERSION_REFRESH_SECONDS", "300"))
+SCRIPTURE_CACHE_CONTROL = os.getenv(
+    "SCRIPTURE_CACHE_CONTROL",
+    "public, max-age=3600, s-maxage=86400, stale-while-revalidate=86400",
+)
+HTTP_COMPRESSION_MIN_BYTES = int(os.getenv("HTTP_COMPRESSION_MIN_BYTES", "1024"))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "5"))
+
+_version: str | None = CORPUS_VERSION
+_version_checked_at = 0.0
+_version_lock = threading.Lock()
+
+
+def cached_corpus_version() -> str | None:
+    """The corpus version if it is known and fresh, without touching the database."""
+    if CORPUS_VERSION:
+        return CORPUS_VERSION
+    if _version is not None and time.monotonic() - _version_checked_at < CORPUS_VERSION_REFRESH_SECONDS:
+        return _version
+    return None
+
+
+def refresh_corpus_version() -> str:
+    """Blocking; call from a worker thread."""
+    global _version, _version_checked_at
+    with _version_lock:
+        cached = cached_corpus_version()
+        if cached is not None:
+            return cached
+        _version = run_in_session(get_corpus_version)
+        _version_checked_at = time.monotonic()
+        return _version
+
+
+def make_etag(version: str, *parts) -> str:
+    digest = hashlib.sha256(":".join(str(p) for p in (version, *parts)).encode()).hexdigest()[:20]
+    return f'"{digest}"'
+
+
+def _encoded_etag(etag: str, encoding: str | None) -> str:
+    # Each content-coding is a different representation and needs its own strong ETag
+    return etag if encoding is None else f'{etag[:-1]}-{encoding}"'
+
+
+def matching_etag(if_none_match: str | None, etag: str) -> str | None:
+    """
+    The If-None-Match entry that matches `etag` or one of its encoded
+    variants (weak comparison, as RFC 9110 requires), or None.
+    """
+    if not if_none_match:
+        return None
+    base = etag.strip('"')
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return etag
+        tag = candidate.removeprefix("W/").strip('"')
+        if tag == base or tag.startswith(f"{base}-"):
+            return f'"{tag}"'
+    return None
+
+
+def negotiate_encoding(accept_encoding: str | None) -> str | None:
+    """Pick br (when the brotli package is installed) or gzip from Accept-Encoding."""
+    if not accept_encoding:
+        return None
+    accepted = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[name.strip().lower()] = q
+
+    for encoding in ("br", "gzip"):
+        if encoding == "br" and brotli is None:
+            continue
+        if accepted.get(encoding, accepted.get("*", 0.0)) > 0:
+            return encoding
+    return None
+
+
+def compress(body: bytes, encoding: str | None) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+    return body
+
+
+def cache_headers(etag: str, encoding: str | None = None) -> dict[str, str]:
+    """Headers for a 200 (or, with the matched tag and no encoding, a 304)."""
+    headers = {
+        "ETag": _encoded_etag(etag, encoding),
+        "Cache-Control": SCRIPTURE_CACHE_CONTROL,
+        "Vary": "Accept-Encoding",
+    }
+    if encoding is not None:
+        headers["Content-Encoding"] = encoding
+    return headers
+
+
+def response_encoding(size: int, accept_encoding: str | None) -> str | None:
+    """The content-coding to use for a body of `size` bytes; small bodies are sent as-is."""
+    if size < HTTP_COMPRESSION_MIN_BYTES:
+        return None
+    return negotiate_encoding(accept_encoding)
+
+
+class StreamCompressor:
+    """
+    Incremental gzip/br for streamed bodies. Each chunk is flushed, so clients
+    can decode (and persist) everything received before a dropped connection.
+    """
+
+    def __init__(self, encoding: str | None):
+        self.encoding = encoding
+        if encoding == "br":
+            self._compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+        elif encoding == "gzip":
+            self._compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        else:
+            self._compressor = None
+
+    def chunk(self, data: bytes) -> bytes:
+        if self.encoding == "br":
+            return self._compressor.process(data) + self._compressor.flush()
+        if self.encoding == "gzip":
+            return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+        return data
+
+    def finish(self) -> bytes:
+        if self.encoding == "br":
+            return self._compressor.finish()
+        if self.encoding == "gzip":
+            return self._compressor.flush(zlib.Z_FINISH)
+        return b""
@@ -0,0 +1,151 @@
+"""
+Queue-backed logging.
+
+Request threads only filter and enqueue log records. A QueueListener thread
+formats and writes them, so string formatting and stream I/O stay off the
+request path. INFO and DEBUG records from high-volume loggers (the agent
+tools by default) are sampled before they are enqueued. Formatted messages are
+capped at LOG_MAX_MESSAGE_CHARS, and records are dropped (and counted) rather
+than blocking when the queue is full. Each line carries the request's trace
+id from backend.services.metrics.
+"""
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import threading
+
+from .metrics import current_trace_id
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_ASYNC = os.getenv("LOG_ASYNC", "true").lower() != "false"
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+LOG_MAX_MESSAGE_CHARS = int(os.getenv("LOG_MAX_MESSAGE_CHARS", "2000"))
+# "logger.prefix=rate,..." applied to records below WARNING
+LOG_SAMPLE_RATES = os.getenv("LOG_SAMPLE_RATES", "backend.ai.tools=0.1")
+
+LOG_FORMAT = "%(asctime)s %(levelname)s [%(name)s] trace=%(trace_id)s %(message)s"
+
+
+def parse_sample_rates(spec: str) -> dict[str, float]:
+    rates = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        prefix, _, rate = item.partition("=")
+        rates[prefix.strip()] = float(rate)
+    return rates
+
+
+class TraceIdFilter(logging.Filter):
+    """Stamp the trace id while still on the request's thread/context."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.trace_id = current_trace_id() or "-"
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Keep a fraction of sub-WARNING records from the configured logger prefixes; the longest prefix wins."""
+
+    def __init__(self, rates: dict[str, float]):
+        super().__init__()
+        self.rates = sorted(rates.items(), key=lambda item: len(item[0]), reverse=True)
+        self.dropped = 0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        for prefix, rate in self.rates:
+            if record.name == prefix or record.name.startswith(prefix + "."):
+                if rate >= 1.0 or random.random() < rate:
+                    return True
+                self.dropped += 1
+                return False
+        return True
+
+
+class TruncatingFormatter(logging.Formatter):
+    def __init__(self, fmt: str, max_chars: int):
+        super().__init__(fmt)
+        self.max_chars = max_chars
+
+    def formatMessage(self, record: logging.LogRecord) -> str:
+        if len(record.message) > self.max_chars:
+            omitted = len(record.message) - self.max_chars
+            record.message = f"{record.message[:self.max_chars]}...(+{omitted} chars)"
+        return super().formatMessage(record)
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    Enqueue records as they are. The stock QueueHandler formats the message on
+    the calling thread so records can be pickled. These never leave the
+    process, so formatting is left to the listener.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+_listener: logging.handlers.QueueListener | None = None
+_queue_handler: DeferredQueueHandler | None = None
+_sampler: SamplingFilter | None = None
+_lock = threading.Lock()
+
+
+def _install(handler: logging.Handler) -> None:
+    handler.addFilter(_sampler)
+    handler.addFilter(TraceIdFilter())
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(LOG_LEVEL)
+
+
+def configure_logging() -> None:
+    """Install the pipeline on the root logger. Safe to call more than once."""
+    global _listener, _queue_handler, _sampler
+    with _lock:
+        if _listener is not None:
+            return
+        stream = logging.StreamHandler(sys.stderr)
+        stream.setFormatter(TruncatingFormatter(LOG_FORMAT, LOG_MAX_MESSAGE_CHARS))
+        _sampler = _sampler or SamplingFilter(parse_sample_rates(LOG_SAMPLE_RATES))
+        if not LOG_ASYNC:
+            _install(stream)
+            return
+        _queue_handler = DeferredQueueHandler(queue.Queue(LOG_QUEUE_SIZE))
+        _listener = logging.handlers.QueueListener(_queue_handler.queue, stream, respect_handler_level=True)
+        _listener.start()
+        _install(_queue_handler)
+
+
+def shutdown_logging() -> None:
+    """Drain the queue and log synchronously from here on; call on application shutdown."""
+    global _listener
+    with _lock:
+        if _listener is None:
+            return
+        _listener.stop()
+        _install(_listener.handlers[0])
+        _listener = None
+
+
+def stats() -> dict[str, int]:
+    return {
+        "sampled_out": _sampler.dropped if _sampler else 0,
+        "dropped_queue_full": _queue_handler.dropped if _queue_handler else 0,
+        "queue_depth": _queue_handler.queue.qsize() if _queue_handler else 0,
+    }
@@ -0,0 +1,254 @@
+"""
+In-process latency tracing and Prometheus text exposition, stdlib only.
+
+`span(stage, name)` times a block into the `bible_stage_duration_seconds`
+histogram and, when a request trace is active, into that trace's stage list.
+Traces are started by the HTTP middleware in main.py and carried in a context
+variable, so spans in worker threads (run_in_threadpool, tool and LLM threads
+started with copy_context) land on the right request. Cache and queue
+components expose their existing `stats()` dicts through `register_stats`.
+"""
+import contextvars
+import functools
+import math
+import os
+import re
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Callable, Iterable, Sequence
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() != "false"
+
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[Any], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _number(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values: dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels: Any, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} counter"
+        with self._lock:
+            values = dict(self._values)
+        for labels, value in sorted(values.items()):
+            yield f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}"
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> (per-bucket counts, sum, count)
+        self._values: dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: Any) -> None:
+        with self._lock:
+            entry = self._values.get(labels)
+            if entry is None:
+                entry = self._values[labels] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry[0][i] += 1
+                    break
+            entry[1] += value
+            entry[2] += 1
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        with self._lock:
+            values = {labels: (list(counts), total, count) for labels, (counts, total, count) in self._values.items()}
+        for labels, (counts, total, count) in sorted(values.items()):
+            cumulative = 0
+            for bound, n in zip(self.buckets, counts):
+                cumulative += n
+                le = 'le="%s"' % _number(bound)
+                yield f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {cumulative}"
+            yield f"{self.name}_bucket{_labels(self.labelnames, labels, 'le="+Inf"')} {count}"
+            yield f"{self.name}_sum{_labels(self.labelnames, labels)} {_number(total)}"
+            yield f"{self.name}_count{_labels(self.labelnames, labels)} {count}"
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: list[Counter | Histogram] = []
+        self._stats: list[tuple[str, Callable[[], dict]]] = []
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def register_stats(self, prefix: str, stats: Callable[[], dict]) -> None:
+        """Expose the numeric fields of a component's stats() dict as gauges named bible_<prefix>_<field>."""
+        with self._lock:
+            self._stats.append((prefix, stats))
+
+    def _render_stats(self, prefix: str, stats: Callable[[], dict]) -> Iterable[str]:
+        try:
+            values = stats()
+        except Exception as e:
+            yield f"# bible_{prefix} stats unavailable: {_escape(repr(e))}"
+            return
+        for field, value in values.items():
+            name = f"bible_{prefix}_{field}"
+            if isinstance(value, bool) or not isinstance(value, (int, float, dict)):
+                continue
+            yield f"# TYPE {name} gauge"
+            if isinstance(value, dict):
+                # e.g. intent_router's by_intent: one series per key
+                for key, item in sorted(value.items()):
+                    if isinstance(item, (int, float)) and not isinstance(item, bool):
+                        yield f'{name}{{key="{_escape(key)}"}} {_number(item)}'
+            else:
+                yield f"{name} {_number(value)}"
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics)
+            stats = list(self._stats)
+        lines: list[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        for prefix, fn in stats:
+            lines.extend(self._render_stats(prefix, fn))
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+stage_duration = registry.register(Histogram(
+    "bible_stage_duration_seconds", "Time spent per pipeline stage", ("stage", "name"),
+))
+stage_errors = registry.register(Counter(
+    "bible_stage_errors_total", "Stage executions that raised", ("stage", "name"),
+))
+http_duration = registry.register(Histogram(
+    "bible_http_request_duration_seconds", "HTTP handler latency by route template", ("method", "route", "status"),
+))
+llm_tokens = registry.register(Counter(
+    "bible_llm_tokens_total", "LLM tokens reported by the provider", ("model", "direction"),
+))
+tool_memo_hits = registry.register(Counter(
+    "bible_tool_memo_hits_total", "Tool calls answered from the per-request memo", ("tool",),
+))
+
+
+# --- request traces --------------------------------------------------------
+
+_trace: contextvars.ContextVar[dict | None] = contextvars.ContextVar("request_trace", default=None)
+
+
+# Caller-supplied ids end up in response headers and log lines, so only short plain tokens are kept
+_TRACE_ID = re.compile(r"[0-9A-Za-z-]{1,64}")
+
+
+def new_trace_id() -> str:
+    return uuid.uuid4().hex[:16]
+
+
+def accept_trace_id(supplied: str | None) -> str:
+    """`supplied` if it is a valid trace id, else a freshly minted one."""
+    if supplied and _TRACE_ID.fullmatch(supplied):
+        return supplied
+    return new_trace_id()
+
+
+@contextmanager
+def trace(trace_id: str):
+    """Collect the spans of one request; yields the trace dict (id, spans)."""
+    current = {"id": trace_id, "spans": []}
+    token = _trace.set(current)
+    try:
+        yield current
+    finally:
+        _trace.reset(token)
+
+
+def current_trace_id() -> str | None:
+    current = _trace.get()
+    return current["id"] if current else None
+
+
+def stage_totals(current: dict) -> dict[str, float]:
+    """Seconds per stage:name for a finished trace (summed over repeats)."""
+    totals: dict[str, float] = {}
+    for stage, name, seconds in current["spans"]:
+        key = f"{stage}:{name}"
+        totals[key] = totals.get(key, 0.0) + seconds
+    return totals
+
+
+@contextmanager
+def span(stage: str, name: str):
+    if not METRICS_ENABLED:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        stage_errors.inc(stage, name)
+        raise
+    finally:
+        seconds = time.perf_counter() - start
+        stage_duration.observe(seconds, stage, name)
+        current = _trace.get()
+        if current is not None:
+            current["spans"].append((stage, name, seconds))
+
+
+def traced(stage: str, name: str | None = None):
+    """Decorator form of `span`."""
+    def decorator(fn):
+        label = name or fn.__name__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(stage, label):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def record_tokens(model: str, usage: dict | None) -> None:
+    if not usage:
+        return
+    for direction in ("input", "output"):
+        count = usage.get(f"{direction}_tokens")
+        if count:
+            llm_tokens.inc(model, direction, amount=count)
@@ -0,0 +1,149 @@
+"""
+Opt-in sampling profiler for single requests, stdlib only.
+
+With PROFILING_ENABLED=true, a /api/chat or /bible request that sends
+`X-Profile: 1` (or `?profile=1`) is profiled. If PROFILING_TOKEN is set, the
+flag value must equal the token. A sampler thread reads
+`sys._current_frames()` every PROFILE_INTERVAL_SECONDS until the handler
+returns. Stacks are written to PROFILE_DIR in collapsed format
+("frame;frame;frame count" per line), which flamegraph.pl and speedscope read
+directly. The response carries a random X-Profile-Id, and
+/debug/profiles/{id} serves the file to callers presenting the same flag.
+
+Request work is spread over the event loop, the threadpool, and the tool and
+LLM threads, so every thread is sampled and the thread name is the root frame.
+Idle threads (blocked in a wait, a selector or an empty work queue) are
+skipped. Other requests in flight at the same time show up in the profile, so
+profile on a quiet instance. Only one profile runs at a time. For streaming
+responses, the profile ends when the headers are sent.
+"""
+import hmac
+import logging
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "false").lower() == "true"
+PROFILING_TOKEN = os.getenv("PROFILING_TOKEN", "")
+PROFILE_PATH_PREFIXES = tuple(p for p in os.getenv("PROFILE_PATH_PREFIXES", "/api/chat,/bible").split(",") if p)
+PROFILE_INTERVAL_SECONDS = float(os.getenv("PROFILE_INTERVAL_SECONDS", "0.005"))
+PROFILE_MAX_SECONDS = float(os.getenv("PROFILE_MAX_SECONDS", "120"))
+PROFILE_DIR = Path(os.getenv("PROFILE_DIR", ".cache/profiles"))
+
+PROFILE_HEADER = "X-Profile"
+PROFILE_QUERY_PARAM = "profile"
+
+# Innermost frames that mean "this thread is parked, not working"
+_IDLE_FRAMES = {
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("selectors.py", "select"),
+    ("thread.py", "_worker"),
+    ("queue.py", "get"),
+    ("_base.py", "wait"),
+    ("handlers.py", "dequeue"),
+}
+
+_active = threading.Lock()
+
+
+def authorized(flag: str | None) -> bool:
+    """Whether `flag` (the X-Profile header or ?profile= value) unlocks profiling."""
+    if not PROFILING_ENABLED or not flag:
+        return False
+    if PROFILING_TOKEN:
+        return hmac.compare_digest(flag, PROFILING_TOKEN)
+    return flag.lower() in ("1", "true", "yes")
+
+
+def requested(path: str, flag: str | None) -> bool:
+    """Whether a request at `path` with profile flag `flag` should be profiled."""
+    return path.startswith(PROFILE_PATH_PREFIXES) and authorized(flag)
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})".replace(";", ":")
+
+
+def _idle(frame) -> bool:
+    return (os.path.basename(frame.f_code.co_filename), frame.f_code.co_name) in _IDLE_FRAMES
+
+
+class SamplingProfiler:
+    def __init__(self, interval: float = PROFILE_INTERVAL_SECONDS, max_seconds: float = PROFILE_MAX_SECONDS):
+        self.interval = interval
+        self.max_seconds = max_seconds
+        self.stacks: Counter[str] = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def _sample(self) -> None:
+        me = threading.get_ident()
+        names = {t.ident: t.name for t in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == me or _idle(frame):
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame))
+                frame = frame.f_back
+            stack.append(names.get(ident, f"thread-{ident}"))
+            self.stacks[";".join(reversed(stack))] += 1
+        self.samples += 1
+
+    def _run(self) -> None:
+        end = time.monotonic() + self.max_seconds
+        while not self._stop.wait(self.interval) and time.monotonic() < end:
+            self._sample()
+
+    def start(self) -> "SamplingProfiler":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+def begin() -> SamplingProfiler | None:
+    """Start a profile, or return None when one is already running."""
+    if not _active.acquire(blocking=False):
+        return None
+    try:
+        return SamplingProfiler().start()
+    except Exception:
+        _active.release()
+        raise
+
+
+def finish(profiler: SamplingProfiler) -> str:
+    """Stop `profiler`, write its collapsed stacks and return the new profile id."""
+    # Always server-generated: trace ids come from callers and could name an existing profile
+    profile_id = uuid.uuid4().hex
+    try:
+        profiler.stop()
+    finally:
+        _active.release()
+    PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+    path = PROFILE_DIR / f"{profile_id}.collapsed"
+    path.write_text(profiler.collapsed(), encoding="utf-8")
+    logger.info("profile written id=%s samples=%s path=%s", profile_id, profiler.samples, path)
+    return profile_id
+
+
+def profile_path(profile_id: str) -> Path | None:
+    if len(profile_id) != 32 or any(c not in "0123456789abcdef" for c in profile_id):
+        return None
+    path = PROFILE_DIR / f"{profile_id}.collapsed"
+    return path if path.is_file() else None
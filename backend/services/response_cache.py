@@ -0,0 +1,98 @@
+"""
+Pre-serialized JSON bodies for the immutable scripture routes.
+
+A chapter or verse is rendered to bytes once, with orjson when it is
+installed, and kept in a bounded LRU keyed by corpus version and request
+arguments. Compressed variants are produced lazily and kept with the body,
+so a repeat read is a dict lookup plus a raw `Response`.
+"""
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Hashable
+
+try:
+    import orjson
+except ImportError:  # optional: stdlib json fallback
+    orjson = None
+
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "4096"))
+
+
+def dumps(payload: Any) -> bytes:
+    """Compact JSON bytes. Payloads must already be plain dicts/lists/str/int/None."""
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+class CachedBody:
+    __slots__ = ("body", "_encoded", "_lock")
+
+    def __init__(self, body: bytes):
+        self.body = body
+        self._encoded: dict[str, bytes] = {}
+        self._lock = threading.Lock()
+
+    def encoded(self, encoding: str | None, compress: Callable[[bytes, str], bytes]) -> bytes:
+        if encoding is None:
+            return self.body
+        with self._lock:
+            if encoding not in self._encoded:
+                self._encoded[encoding] = compress(self.body, encoding)
+            return self._encoded[encoding]
+
+    def ready(self, encoding: str | None) -> bytes | None:
+        """The body in `encoding` if it needs no compressing, else None."""
+        if encoding is None:
+            return self.body
+        # No lock: it can be held for a whole compression, and a dict read is atomic
+        return self._encoded.get(encoding)
+
+    @property
+    def nbytes(self) -> int:
+        return len(self.body) + sum(len(b) for b in self._encoded.values())
+
+
+class ResponseCache:
+    def __init__(self, max_entries: int = RESPONSE_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[Hashable, CachedBody] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> CachedBody | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key: Hashable, body: bytes) -> CachedBody:
+        entry = CachedBody(body)
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": sum(e.nbytes for e in self._entries.values()),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
@@ -62,6 +62,109 @@ def try_parse_scripture_query(text: str) -> Optional[ScriptureQuery]:
     )
 
 
+BIBLE_BOOKS = [
+    "Genesis", "Exodus", "Leviticus", "Numbers", "Deuteronomy", "Joshua", "Judges", "Ruth",
+    "1 Samuel", "2 Samuel", "1 Kings", "2 Kings", "1 Chronicles", "2 Chronicles", "Ezra", "Nehemiah",
+    "Esther", "Job", "Psalms", "Proverbs", "Ecclesiastes", "Song of Solomon", "Isaiah", "Jeremiah",
+    "Lamentations", "Ezekiel", "Daniel", "Hosea", "Joel", "Amos", "Obadiah", "Jonah", "Micah", "Nahum",
+    "Habakkuk", "Zephaniah", "Haggai", "Zechariah", "Malachi",
+    "Matthew", "Mark", "Luke", "John", "Acts", "Romans", "1 Corinthians", "2 Corinthians", "Galatians",
+    "Ephesians", "Philippians", "Colossians", "1 Thessalonians", "2 Thessalonians", "1 Timothy",
+    "2 Timothy", "Titus", "Philemon", "Hebrews", "James", "1 Peter", "2 Peter", "1 John", "2 John",
+    "3 John", "Jude", "Revelation",
+]
+
+# Translation shortnames recognised after a reference, in any case
+KNOWN_TRANSLATIONS = {"ASV", "BSB", "CSB", "ESV", "KJV", "NASB", "NIV", "NKJV", "NLT", "NRSV", "RSV", "WEB", "YLT"}
+
+
+def _book_key(book: str) -> str:
+    return re.sub(r"^([1-3])\s*", r"\1 ", " ".join(book.lower().split()))
+
+
+# Other names people use for a book, mapped to its name in the books table
+BOOK_ALIASES = {
+    "Psalm": "Psalms",
+    "Song of Songs": "Song of Solomon",
+    "Canticles": "Song of Solomon",
+    "Revelations": "Revelation",
+    "Revelation of John": "Revelation",
+}
+
+_BOOK_LOOKUP = {
+    **{_book_key(alias): name for alias, name in BOOK_ALIASES.items()},
+    **{_book_key(name): name for name in BIBLE_BOOKS},
+}
+
+# Book names that are also everyday words ("my job 3 days ago", "mark 2 verses").
+# In free text they only count as a book when capitalized or followed by chapter:verse.
+AMBIGUOUS_BOOKS = {"Job", "Mark", "Acts", "Numbers", "Judges", "Lamentations"}
+
+
+def _book_pattern(names) -> str:
+    # Longest first, so "1 John" wins over "John" and "Song of Solomon" over any prefix
+    alternatives = sorted(names, key=len, reverse=True)
+    return "|".join(
+        r"\s*".join(re.escape(part) for part in name.split(" ", 1)) if name[0].isdigit()
+        else r"\s+".join(re.escape(part) for part in name.split())
+        for name in alternatives
+    )
+
+
+# Group-free alternations, for other patterns that need to match a book or translation
+BOOK_PATTERN = _book_pattern(_BOOK_LOOKUP)
+TRANSLATION_PATTERN = "|".join(sorted(KNOWN_TRANSLATIONS, key=len, reverse=True))
+
+# A reference anywhere in free text: "John 3:16", "1 John 2", "romans 8:28 (kjv)", "Psalm 23 in the KJV".
+# Only known book names match, so "Explain 1 John 4:8" is 1 John rather than "Explain 1" + John.
+REFERENCE_PATTERN = re.compile(
+    rf"""
+    (?<![\w:])
+    (?P<book>{BOOK_PATTERN})
+    \s+
+    (?P<chapter>\d+)
+    (?:
+        :
+        (?P<verse>\d+)
+    )?
+    (?:
+        \s+(?:in\s+(?:the\s+)?)?
+        \(?(?P<translation>{TRANSLATION_PATTERN})\)?
+        (?!\w)
+    )?
+    (?![\w:])
+    """,
+    re.VERBOSE | re.IGNORECASE,
+)
+
+
+def normalize_book_name(book: str) -> str:
+    """'1john' / '1 john' / 'psalm' -> '1 John' / 'Psalms', matching the books table."""
+    key = _book_key(book)
+    if key in _BOOK_LOOKUP:
+        return _BOOK_LOOKUP[key]
+    return " ".join(part.capitalize() for part in key.split(" "))
+
+
+def find_scripture_references(text: str) -> list[ScriptureQuery]:
+    """Every reference-shaped span in `text`, in order, without duplicates."""
+    references: list[ScriptureQuery] = []
+    for match in REFERENCE_PATTERN.finditer(text):
+        groups = match.groupdict()
+        book = normalize_book_name(groups["book"])
+        if book in AMBIGUOUS_BOOKS and groups["verse"] is None and not groups["book"][0].isupper():
+            continue
+        reference = ScriptureQuery(
+            book=book,
+            chapter=int(groups["chapter"]),
+            verse=int(groups["verse"]) if groups["verse"] else None,
+            translation=(groups["translation"] or DEFAULT_TRANSLATION).upper(),
+        )
+        if reference not in references:
+            references.append(reference)
+    return references
+
+
 def scripture_lookup_from_db(parsed: ScriptureQuery, session: Session) -> str:
     translation = get_translation(parsed.translation, session=session)
     if not translation:
@@ -0,0 +1,108 @@
+import asyncio
+import functools
+import json
+import os
+import threading
+from typing import Any, Awaitable, Callable, Hashable
+
+# How long a caller waits on a shared DB lookup (bible routes, chat lookups and routed intents)
+SINGLE_FLIGHT_TIMEOUT_SECONDS = float(os.getenv("SINGLE_FLIGHT_TIMEOUT_SECONDS", "30"))
+
+
+def make_key(name: str, *args: Any, **kwargs: Any) -> str:
+    """
+    Coalescing key for a call. Arguments are compared exactly (book lookups are
+    case-sensitive), only keyword order is normalized.
+    """
+    return json.dumps([name, list(args), dict(sorted(kwargs.items()))], ensure_ascii=False, default=str)
+
+
+class AsyncSingleFlight:
+    """
+    Coalesces concurrent coroutine calls that share a key: the first caller
+    starts the computation as a task, later callers await the same task, and
+    every caller gets its result or exception. The entry is dropped as soon as
+    the task finishes, so nothing (including errors) is cached afterwards.
+
+    The shared task is shielded from cancellation of any single caller, and
+    each caller waits at most `timeout` seconds before getting a TimeoutError.
+    """
+
+    def __init__(self, timeout: float | None = None):
+        self.timeout = timeout
+        self._tasks: dict[Hashable, asyncio.Task] = {}
+        self.shared = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]], timeout: float | None = None) -> Any:
+        task = self._tasks.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._tasks[key] = task
+            task.add_done_callback(lambda t: self._forget(key, t))
+        else:
+            self.shared += 1
+
+        return await asyncio.wait_for(asyncio.shield(task), timeout or self.timeout)
+
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+        # Retrieve the exception so an error nobody is waiting on any more is not logged as unhandled
+        if not task.cancelled():
+            task.exception()
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException | None = None
+
+
+class SingleFlight:
+    """
+    Thread-based counterpart of AsyncSingleFlight for synchronous code such as
+    agent tools, which run on worker threads. The leader runs `fn` on its own
+    thread; followers block until it finishes or their timeout expires.
+    """
+
+    def __init__(self, timeout: float | None = None):
+        self.timeout = timeout
+        self._calls: dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+        self.shared = 0
+
+    def do(self, key: Hashable, fn: Callable[[], Any], timeout: float | None = None) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+            else:
+                self.shared += 1
+
+        if leader:
+            try:
+                call.result = fn()
+            except BaseException as e:
+                call.error = e
+            finally:
+                with self._lock:
+                    del self._calls[key]
+                call.done.set()
+        elif not call.done.wait(timeout or self.timeout):
+            raise TimeoutError(f"Timed out waiting for in-flight call {key}")
+
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    def wrap(self, name: str, timeout: float | None = None):
+        """Decorator coalescing concurrent calls to `fn` with equal arguments."""
+        def decorator(fn):
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                return self.do(make_key(name, *args, **kwargs), lambda: fn(*args, **kwargs), timeout)
+            return wrapper
+        return decorator
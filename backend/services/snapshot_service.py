@@ -0,0 +1,248 @@
+"""
+Snapshot-backed implementations of the `sql_service` query functions.
+
+When CORPUS_SNAPSHOT_PATH is set, `sql_service` re-exports these instead of its
+SQL versions, so routers and agent tools read from a shared read-only mmap and
+never touch Neon. Signatures (including the unused `session`) and return types
+match `sql_service` exactly.
+"""
+import json
+import os
+import threading
+from typing import Any, Iterator, NamedTuple, Sequence
+
+import numpy as np
+
+from .corpus_snapshot import CorpusSnapshot, verse_key
+from ..schemas.models import Translation, Book, Verse
+from ..schemas.scripture import SEMANTIC_SEARCH_TRANSLATION
+
+CORPUS_SNAPSHOT_PATH = os.getenv("CORPUS_SNAPSHOT_PATH")
+
+_snapshot: CorpusSnapshot | None = None
+_snapshot_lock = threading.Lock()
+
+
+class VerseRow(NamedTuple):
+    id: int
+    chapter_num: int
+    verse_num: int
+    verse_text: str
+    translation_shortname: str
+    name: str
+
+
+class EmbeddingRow(NamedTuple):
+    id: int
+    verse_embedding: str
+
+
+def get_snapshot() -> CorpusSnapshot:
+    global _snapshot
+    with _snapshot_lock:
+        if _snapshot is None:
+            if not CORPUS_SNAPSHOT_PATH:
+                raise Exception("CORPUS SNAPSHOT PATH IS NOT SET")
+            _snapshot = CorpusSnapshot(CORPUS_SNAPSHOT_PATH)
+        return _snapshot
+
+
+def _translations_by_id() -> dict[int, dict]:
+    return {t["id"]: t for t in get_snapshot().translations}
+
+
+def _books_by_id() -> dict[int, dict]:
+    return {b["id"]: b for b in get_snapshot().books}
+
+
+def _verse(snapshot: CorpusSnapshot, ordinal: int) -> Verse:
+    return Verse(
+        id=int(snapshot.ids[ordinal]),
+        book_id=int(snapshot.book_ids[ordinal]),
+        translation_id=int(snapshot.translation_ids[ordinal]),
+        chapter_num=int(snapshot.chapters[ordinal]),
+        verse_num=int(snapshot.verses[ordinal]),
+        verse_text=snapshot.text(ordinal),
+    )
+
+
+def _verse_row(snapshot: CorpusSnapshot, ordinal: int, translations: dict, books: dict) -> VerseRow:
+    return VerseRow(
+        id=int(snapshot.ids[ordinal]),
+        chapter_num=int(snapshot.chapters[ordinal]),
+        verse_num=int(snapshot.verses[ordinal]),
+        verse_text=snapshot.text(ordinal),
+        translation_shortname=translations[int(snapshot.translation_ids[ordinal])]["translation_shortname"],
+        name=books[int(snapshot.book_ids[ordinal])]["name"],
+    )
+
+
+def _translation_range(snapshot: CorpusSnapshot, translation_id: int) -> tuple[int, int]:
+    return snapshot.key_range(verse_key(translation_id, 0), verse_key(translation_id + 1, 0))
+
+
+def _reference_range(snapshot: CorpusSnapshot, translation_id: int, book_id: int, chapter: int, verse: int | None = None) -> tuple[int, int]:
+    """Ordinal range of one chapter or verse; empty for numbers the verse key cannot hold."""
+    try:
+        if verse is None:
+            return snapshot.key_range(verse_key(translation_id, book_id, chapter), verse_key(translation_id, book_id, chapter + 1))
+        return snapshot.key_range(
+            verse_key(translation_id, book_id, chapter, verse), verse_key(translation_id, book_id, chapter, verse + 1)
+        )
+    except ValueError:
+        return 0, 0
+
+
+def _normalized(embedding_list: list[float]) -> np.ndarray:
+    query = np.asarray(embedding_list, dtype=np.float32)
+    return query / (np.linalg.norm(query) or 1.0)
+
+
+def _top(scores: np.ndarray, limit: int) -> np.ndarray:
+    """Indices of the `limit` highest scores, best first."""
+    limit = min(limit, len(scores))
+    if limit <= 0:
+        return np.empty(0, dtype=np.int64)
+    top = np.argpartition(-scores, limit - 1)[:limit]
+    return top[np.argsort(-scores[top], kind="stable")]
+
+
+def get_semantic_similar_verses(embedding_list: list[float], session, limit: int = 20) -> Sequence[Any]:
+    snapshot = get_snapshot()
+    translation = get_translation(SEMANTIC_SEARCH_TRANSLATION, session)
+    if translation is None or not snapshot.has_embeddings:
+        return []
+
+    start, stop = _translation_range(snapshot, translation.id)
+    # A slice of the mmap is a view, so scoring never copies the translation's embeddings
+    ordinals = start + _top(snapshot.embeddings[start:stop] @ _normalized(embedding_list), limit)
+    translations, books = _translations_by_id(), _books_by_id()
+    return [_verse_row(snapshot, int(o), translations, books) for o in ordinals]
+
+
+def get_verse_embeddings(translation_shortname: str, session) -> Sequence[Any]:
+    snapshot = get_snapshot()
+    translation = get_translation(translation_shortname, session)
+    if translation is None or not snapshot.has_embeddings:
+        return []
+
+    start, stop = _translation_range(snapshot, translation.id)
+    return [
+        EmbeddingRow(id=int(snapshot.ids[o]), verse_embedding=json.dumps(snapshot.embeddings[o].tolist()))
+        for o in range(start, stop)
+    ]
+
+
+def get_semantic_similar_verses_among(embedding_list: list[float], verse_ids: list[int], session, limit: int = 20) -> Sequence[Any]:
+    snapshot = get_snapshot()
+    if not snapshot.has_embeddings:
+        return []
+
+    ordinals = [snapshot.ordinal_for_id(verse_id) for verse_id in verse_ids]
+    ordinals = np.array([o for o in ordinals if o is not None], dtype=np.int64)
+    top = ordinals[_top(snapshot.embeddings[ordinals] @ _normalized(embedding_list), limit)]
+    translations, books = _translations_by_id(), _books_by_id()
+    return [_verse_row(snapshot, int(o), translations, books) for o in top]
+
+
+def get_verses_by_ids(verse_ids: list[int], session) -> Sequence[Any]:
+    snapshot = get_snapshot()
+    translations, books = _translations_by_id(), _books_by_id()
+    rows = []
+    for verse_id in verse_ids:
+        ordinal = snapshot.ordinal_for_id(verse_id)
+        if ordinal is not None:
+            rows.append(_verse_row(snapshot, ordinal, translations, books))
+    return rows
+
+
+def get_verses_for_references(references: Sequence[Any], session) -> Sequence[Any]:
+    snapshot = get_snapshot()
+    translations, books = _translations_by_id(), _books_by_id()
+    rows = []
+    for ref in references:
+        translation = get_translation(ref.translation, session)
+        book = get_book(ref.book, session)
+        if translation is None or book is None:
+            continue
+        start, stop = _reference_range(snapshot, translation.id, book.id, ref.chapter, ref.verse)
+        rows.extend(_verse_row(snapshot, ordinal, translations, books) for ordinal in range(start, stop))
+    return rows
+
+
+def keyword_search_verses(query: str, translation: Translation, session, book: Book = None, limit: int = 10) -> Sequence[Any]:
+    snapshot = get_snapshot()
+    if book:
+        start, stop = snapshot.key_range(verse_key(translation.id, book.id), verse_key(translation.id, book.id + 1))
+    else:
+        start, stop = _translation_range(snapshot, translation.id)
+
+    needle = query.casefold()
+    translations, books = _translations_by_id(), _books_by_id()
+    rows = []
+    for ordinal in range(start, stop):
+        if needle in snapshot.text(ordinal).casefold():
+            rows.append(_verse_row(snapshot, ordinal, translations, books))
+            if len(rows) >= limit:
+                break
+    return rows
+
+
+def get_translation(translation_shortname: str, session) -> Translation | None:
+    for t in get_snapshot().translations:
+        if t["translation_shortname"] == translation_shortname:
+            return Translation(**t)
+    return None
+
+
+def list_translations(session) -> Sequence[Any]:
+    return [Translation(**t) for t in get_snapshot().translations]
+
+
+def get_book(book: str, session) -> Book | None:
+    for b in get_snapshot().books:
+        if b["name"] == book:
+            return Book(**b)
+    return None
+
+
+def get_books(session) -> list[Book]:
+    return [Book(**b) for b in get_snapshot().books]
+
+
+def get_book_chapters(translation: Translation, book: Book, session):
+    snapshot = get_snapshot()
+    start, stop = snapshot.key_range(verse_key(translation.id, book.id), verse_key(translation.id, book.id + 1))
+    return [int(c) for c in np.unique(snapshot.chapters[start:stop])]
+
+
+def get_verses(translation: Translation, book: Book, chapter: int, session) -> list[Verse]:
+    snapshot = get_snapshot()
+    start, stop = _reference_range(snapshot, translation.id, book.id, chapter)
+    return [_verse(snapshot, ordinal) for ordinal in range(start, stop)]
+
+
+def get_verse(translation: Translation, book: Book, chapter: int, verse: int, session) -> Verse | None:
+    snapshot = get_snapshot()
+    start, stop = _reference_range(snapshot, translation.id, book.id, chapter, verse)
+    return _verse(snapshot, start) if stop > start else None
+
+
+def iter_verses(translation: Translation, session, book: Book | None = None, from_id: int = 0, batch_size: int = 1000) -> Iterator[Verse]:
+    snapshot = get_snapshot()
+    if book is not None:
+        start, stop = snapshot.key_range(verse_key(translation.id, book.id), verse_key(translation.id, book.id + 1))
+    else:
+        start, stop = _translation_range(snapshot, translation.id)
+
+    # Only the requested key range is read; ids within it are put in id order
+    # so resuming from from_id matches the SQL export
+    ids = snapshot.ids[start:stop]
+    ordinals = start + np.argsort(ids, kind="stable")
+    ordinals = ordinals[snapshot.ids[ordinals] >= from_id]
+    for ordinal in ordinals:
+        yield _verse(snapshot, int(ordinal))
+
+
+def get_corpus_version(session) -> str:
+    return get_snapshot().corpus_version
@@ -1,9 +1,14 @@
-from typing import Any, Sequence
+import hashlib
+import os
+from typing import Any, Iterator, Sequence
 
+from dotenv import load_dotenv
 from sqlmodel import select, Session
 
-from sqlalchemy import text as sql_text
+from sqlalchemy import and_, or_, text as sql_text
+from .metrics import traced
 from ..schemas.models import Translation, Book, Verse
+from ..schemas.scripture import SEMANTIC_SEARCH_TRANSLATION
 
 
 def get_semantic_similar_verses(embedding_list: list[float], session: Session, limit: int = 20) -> Sequence[Any]:
@@ -19,15 +24,74 @@ def get_semantic_similar_verses(embedding_list: list[float], session: Session, l
                       ON v.translation_id = t.id
                  JOIN books AS b
                       ON v.book_id = b.id
-        WHERE t.translation_shortname = 'BSB'
+        WHERE t.translation_shortname = :translation
         ORDER BY v.verse_embedding <=> CAST(:embedding AS vector)
         LIMIT :limit;
         """
-    ).bindparams(embedding=str(embedding_list), limit=limit)
+    ).bindparams(embedding=str(embedding_list), limit=limit, translation=SEMANTIC_SEARCH_TRANSLATION)
 
     return session.exec(sql).fetchall()
 
 
+def get_verse_embeddings(translation_shortname: str, session: Session) -> Sequence[Any]:
+    sql = sql_text(
+        """
+        SELECT v.id,
+               v.verse_embedding::text AS verse_embedding
+        FROM verses AS v
+                 JOIN translations AS t
+                      ON v.translation_id = t.id
+        WHERE t.translation_shortname = :translation
+        ORDER BY v.id;
+        """
+    ).bindparams(translation=translation_shortname)
+
+    return session.exec(sql).fetchall()
+
+
+def get_semantic_similar_verses_among(embedding_list: list[float], verse_ids: list[int], session: Session, limit: int = 20) -> Sequence[Any]:
+    """Exact re-ranking of a pre-filtered candidate set by pgvector cosine distance."""
+    sql = sql_text(
+        """
+        SELECT t.translation_shortname,
+               b.name,
+               v.chapter_num,
+               v.verse_num,
+               v.verse_text
+        FROM verses AS v
+                 JOIN translations AS t
+                      ON v.translation_id = t.id
+                 JOIN books AS b
+                      ON v.book_id = b.id
+        WHERE v.id = ANY(:verse_ids)
+        ORDER BY v.verse_embedding <=> CAST(:embedding AS vector)
+        LIMIT :limit;
+        """
+    ).bindparams(embedding=str(embedding_list), verse_ids=list(verse_ids), limit=limit)
+
+    return session.exec(sql).fetchall()
+
+
+def get_verses_by_ids(verse_ids: list[int], session: Session) -> Sequence[Any]:
+    """Fetch verse rows for the given ids, preserving the order of `verse_ids`."""
+    stmt = (
+        select(
+            Verse.id,
+            Verse.chapter_num,
+            Verse.verse_num,
+            Verse.verse_text,
+            Translation.translation_shortname,
+            Book.name
+        )
+        .join(Translation, Verse.translation_id == Translation.id)
+        .join(Book, Verse.book_id == Book.id)
+        .where(Verse.id.in_(verse_ids))
+    )
+
+    rows = {row.id: row for row in session.exec(stmt).all()}
+    return [rows[verse_id] for verse_id in verse_ids if verse_id in rows]
+
+
 def keyword_search_verses(query: str, translation: Translation, session: Session, book: Book = None, limit: int = 10) -> Sequence[Any]:
     stmt = (
         select(
@@ -50,6 +114,42 @@ def keyword_search_verses(query: str, translation: Translation, session: Session
     return session.exec(stmt).all()
 
 
+def get_verses_for_references(references: Sequence[Any], session: Session) -> Sequence[Any]:
+    """
+    Resolve many (translation, book, chapter[, verse]) references in one query.
+    `references` are ScriptureQuery-like objects; rows come back in canonical order.
+    """
+    if not references:
+        return []
+
+    conditions = []
+    for ref in references:
+        condition = and_(
+            Translation.translation_shortname == ref.translation,
+            Book.name == ref.book,
+            Verse.chapter_num == ref.chapter,
+        )
+        if ref.verse is not None:
+            condition = and_(condition, Verse.verse_num == ref.verse)
+        conditions.append(condition)
+
+    stmt = (
+        select(
+            Verse.chapter_num,
+            Verse.verse_num,
+            Verse.verse_text,
+            Translation.translation_shortname,
+            Book.name
+        )
+        .join(Translation, Verse.translation_id == Translation.id)
+        .join(Book, Verse.book_id == Book.id)
+        .where(or_(*conditions))
+        .order_by(Translation.translation_shortname, Verse.book_id, Verse.chapter_num, Verse.verse_num)
+    )
+
+    return session.exec(stmt).all()
+
+
 def get_translation(translation_shortname: str, session) -> Translation | None:
     stmt = (select(Translation)
             .where(Translation.translation_shortname == translation_shortname))
@@ -101,3 +201,82 @@ def get_verse(translation: Translation, book: Book, chapter: int, verse: int, se
             .where(Verse.verse_num == verse))
 
     return session.exec(stmt).first()
+
+
+def iter_verses(translation: Translation, session, book: Book | None = None, from_id: int = 0, batch_size: int = 1000) -> Iterator[Verse]:
+    """
+    Every verse of a translation (or one book of it) with id >= from_id, in id
+    order, streamed through a server-side cursor so memory stays flat.
+    """
+    stmt = (select(Verse)
+            .where(Verse.translation_id == translation.id)
+            .where(Verse.id >= from_id)
+            .order_by(Verse.id)
+            .execution_options(yield_per=batch_size))
+    if book is not None:
+        stmt = stmt.where(Verse.book_id == book.id)
+
+    yield from session.exec(stmt)
+
+
+def get_corpus_version(session) -> str:
+    """
+    Cheap fingerprint of the loaded corpus (row counts and highest ids), which
+    changes whenever ETL adds or reloads data. Set CORPUS_VERSION explicitly if
+    text is ever edited in place.
+    """
+    sql = sql_text(
+        """
+        SELECT (SELECT count(*) FROM translations),
+               (SELECT coalesce(max(id), 0) FROM translations),
+               (SELECT count(*) FROM books),
+               (SELECT count(*) FROM verses),
+               (SELECT coalesce(max(id), 0) FROM verses);
+        """
+    )
+    row = session.exec(sql).one()
+    return hashlib.sha256(":".join(str(value) for value in row).encode()).hexdigest()[:16]
+
+
+load_dotenv()
+
+# Read-only deployments serve everything from a memory-mapped corpus snapshot
+# (see etl/snapshot.py) instead of Neon.
+if os.getenv("CORPUS_SNAPSHOT_PATH"):
+    from .snapshot_service import (  # noqa: F811
+        get_semantic_similar_verses,
+        get_verse_embeddings,
+        get_semantic_similar_verses_among,
+        get_verses_by_ids,
+        get_verses_for_references,
+        keyword_search_verses,
+        get_translation,
+        list_translations,
+        get_book,
+        get_books,
+        get_book_chapters,
+        get_verses,
+        get_verse,
+        get_corpus_version,
+        iter_verses,
+    )
+
+# Time every query function as a "sql" stage, whichever backend serves it.
+# iter_verses is a generator and is left as-is: wrapping it would only time its creation.
+for _name in (
+    "get_semantic_similar_verses",
+    "get_verse_embeddings",
+    "get_semantic_similar_verses_among",
+    "get_verses_by_ids",
+    "get_verses_for_references",
+    "keyword_search_verses",
+    "get_translation",
+    "list_translations",
+    "get_book",
+    "get_books",
+    "get_book_chapters",
+    "get_verses",
+    "get_verse",
+    "get_corpus_version",
+):
+    globals()[_name] = traced("sql", _name)(globals()[_name])
@@ -0,0 +1,110 @@
+"""
+Requests/sec for chapter responses: the old path vs pre-serialized bodies.
+
+    python -m benchmarks.chapter_serialization
+    python -m benchmarks.chapter_serialization --verses 176 --requests 5000
+
+The old path returns the nested dict of SQLModel objects and lets FastAPI
+run jsonable_encoder + JSONResponse on every request. The fast path serves
+the body cached by `backend.services.response_cache` as a raw Response. Both
+run in-process over ASGI on a synthetic chapter (Psalm 119 has 176 verses),
+so the numbers measure serialization and framework overhead, not the database.
+"""
+import argparse
+import asyncio
+import json
+import time
+
+import httpx
+from fastapi import FastAPI, Response
+
+from backend.schemas.models import Book, Translation, Verse
+from backend.services.response_cache import ResponseCache, dumps, orjson
+
+
+def _chapter(verses: int) -> tuple[Translation, Book, list[Verse]]:
+    translation = Translation(id=1, translation_shortname="BSB", year_written_in=2016, translation_type="formal")
+    book = Book(id=19, name="Psalms")
+    text = "Blessed are those whose way is blameless, who walk in the Law of the LORD. "
+    rows = [
+        Verse(id=i, book_id=19, translation_id=1, chapter_num=119, verse_num=i, verse_text=text * 2)
+        for i in range(1, verses + 1)
+    ]
+    return translation, book, rows
+
+
+def _legacy_app(translation: Translation, book: Book, rows: list[Verse]) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/chapter")
+    async def chapter():
+        merged_dict = {"translation": translation, "book": book, "chapter": {}}
+        for verse in rows:
+            merged_dict["chapter"].setdefault(verse.chapter_num, []).append(
+                {"verse_number": verse.verse_num, "verse_text": verse.verse_text}
+            )
+        return merged_dict
+
+    return app
+
+
+def _fast_app(translation: Translation, book: Book, rows: list[Verse]) -> FastAPI:
+    app = FastAPI()
+    cache = ResponseCache()
+
+    @app.get("/chapter")
+    async def chapter():
+        cached = cache.get("chapter")
+        if cached is None:
+            payload = {
+                "translation": translation.model_dump(),
+                "book": book.model_dump(),
+                "chapter": {"119": [{"verse_number": v.verse_num, "verse_text": v.verse_text} for v in rows]},
+            }
+            cached = cache.put("chapter", dumps(payload))
+        return Response(content=cached.body, media_type="application/json")
+
+    return app
+
+
+async def _requests_per_second(app: FastAPI, requests: int, concurrency: int) -> tuple[float, bytes]:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        body = (await client.get("/chapter")).content
+
+        async def worker(n: int):
+            for _ in range(n):
+                response = await client.get("/chapter")
+                response.raise_for_status()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(requests // concurrency) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    return (requests // concurrency * concurrency) / elapsed, body
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--verses", type=int, default=176)
+    parser.add_argument("--requests", type=int, default=3000)
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+
+    translation, book, rows = _chapter(args.verses)
+    print(f"verses={args.verses} requests={args.requests} concurrency={args.concurrency} "
+          f"encoder={'orjson' if orjson is not None else 'json'}")
+    print(f"{'path':<8} {'req/s':>10} {'bytes':>8}")
+
+    results = {}
+    for name, factory in (("legacy", _legacy_app), ("fast", _fast_app)):
+        rps, body = asyncio.run(_requests_per_second(factory(translation, book, rows), args.requests, args.concurrency))
+        results[name] = (rps, body)
+        print(f"{name:<8} {rps:>10.0f} {len(body):>8}")
+
+    if json.loads(results["legacy"][1]) != json.loads(results["fast"][1]):
+        raise SystemExit("Response bodies differ between paths")
+    print(f"speedup  {results['fast'][0] / results['legacy'][0]:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
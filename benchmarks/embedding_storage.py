@@ -0,0 +1,84 @@
+"""
+Memory / latency / recall@k harness for the compressed embedding storage modes.
+
+    python -m benchmarks.embedding_storage --store verses_float32.npz
+    python -m benchmarks.embedding_storage --synthetic 31102
+
+`--store` takes a float32 store written by `etl.write_embedding_store` (or by the
+backend with EMBEDDING_STORAGE=float32). Queries are corpus vectors with added
+noise, so every mode is measured against the exact float32 ranking.
+"""
+import argparse
+import time
+
+import numpy as np
+
+from backend.services.embedding_store import EMBEDDING_STORAGE_MODES, EmbeddingStore
+
+
+def _load_baseline(args) -> tuple[np.ndarray, np.ndarray]:
+    if args.store:
+        store = EmbeddingStore.load(args.store)
+        if store.mode != "float32":
+            raise SystemExit(f"Baseline store must be float32, got {store.mode}")
+        return store.ids, store.codes
+
+    rng = np.random.default_rng(args.seed)
+    return np.arange(args.synthetic, dtype=np.int64), rng.standard_normal((args.synthetic, args.dims), dtype=np.float32)
+
+
+def _recall(expected: list[set[int]], actual: list[list[int]]) -> float:
+    hits = sum(len(e & set(a)) for e, a in zip(expected, actual))
+    return hits / sum(len(e) for e in expected)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--store", help="float32 embedding store (.npz) to use as the baseline corpus")
+    parser.add_argument("--synthetic", type=int, default=31102, help="random corpus size when --store is not given")
+    parser.add_argument("--dims", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=20)
+    parser.add_argument("--rerank-factor", type=int, default=10)
+    parser.add_argument("--noise", type=float, default=0.5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    ids, embeddings = _load_baseline(args)
+    rng = np.random.default_rng(args.seed)
+    sample = rng.choice(len(ids), size=min(args.queries, len(ids)), replace=False)
+    queries = embeddings[sample] + args.noise * rng.standard_normal(embeddings[sample].shape, dtype=np.float32)
+
+    baseline = EmbeddingStore.encode(ids, embeddings, mode="float32")
+    id_to_row = {verse_id: row for row, verse_id in enumerate(baseline.ids.tolist())}
+
+    def full_vectors(candidate_ids: np.ndarray) -> np.ndarray:
+        return baseline.codes[[id_to_row[i] for i in candidate_ids.tolist()]]
+
+    expected = [{i for i, _ in baseline.search(q, limit=args.k)} for q in queries]
+
+    print(f"corpus={len(ids)} dims={embeddings.shape[1]} queries={len(queries)} k={args.k}")
+    print(f"{'mode':<8} {'MB':>8} {'ratio':>6} {'ms/q':>8} {'recall@k':>9} {'rerank ms/q':>12} {'rerank recall@k':>16}")
+
+    for mode in EMBEDDING_STORAGE_MODES:
+        store = EmbeddingStore.encode(ids, embeddings, mode=mode)
+
+        start = time.perf_counter()
+        raw = [[i for i, _ in store.search(q, limit=args.k)] for q in queries]
+        raw_ms = (time.perf_counter() - start) * 1000 / len(queries)
+
+        start = time.perf_counter()
+        reranked = [
+            [i for i, _ in store.search(q, limit=args.k, vectors=full_vectors, rerank_factor=args.rerank_factor)]
+            for q in queries
+        ]
+        rerank_ms = (time.perf_counter() - start) * 1000 / len(queries)
+
+        print(
+            f"{mode:<8} {store.nbytes / 1e6:>8.2f} {baseline.nbytes / store.nbytes:>6.1f} {raw_ms:>8.2f} "
+            f"{_recall(expected, raw):>9.3f} {rerank_ms:>12.2f} {_recall(expected, reranked):>16.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
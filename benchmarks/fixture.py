@@ -0,0 +1,125 @@
+"""
+Offline corpus for benchmarks: a corpus snapshot seeded from a fixture translation.
+
+    python -m benchmarks.fixture .cache/bench/fixture.snap
+    python -m benchmarks.fixture .cache/bench/fixture.snap --chapters-per-book 50
+
+The snapshot (see backend/services/corpus_snapshot.py) is the embedded
+stand-in for Neon: with CORPUS_SNAPSHOT_PATH pointing at it, every
+sql_service query runs locally. Real KJV passages from
+fixtures/kjv_sample.json are padded with deterministic synthetic verses to a
+realistic size. Psalm 119 is always padded to 176 verses, so serialization
+benchmarks have a worst-case chapter. Embeddings come from the real
+all-MiniLM-L6-v2 model.
+
+Semantic search is pinned to BSB, so the fixture text is loaded under both
+KJV and BSB. The BSB copy is a stand-in, not BSB text.
+"""
+import argparse
+import json
+import random
+from pathlib import Path
+from typing import Callable, Sequence
+
+from backend.services.corpus_snapshot import SnapshotVerse, write_snapshot
+
+FIXTURE_PATH = Path(__file__).parent / "fixtures" / "kjv_sample.json"
+
+TRANSLATIONS = [
+    {"id": 1, "translation_shortname": "BSB", "year_written_in": None, "translation_type": "fixture stand-in"},
+    {"id": 2, "translation_shortname": "KJV", "year_written_in": 1611, "translation_type": "fixture"},
+]
+
+# Chapter with the most verses in the Bible; padded so there is always one large payload
+LONGEST_CHAPTER = ("Psalms", 119, 176)
+
+
+def load_fixture(path: Path = FIXTURE_PATH) -> dict[str, dict[int, dict[int, str]]]:
+    with open(path, encoding="utf-8") as fh:
+        data = json.load(fh)
+    return {
+        book["name"]: {
+            int(chapter): {int(verse): text for verse, text in verses.items()}
+            for chapter, verses in book["chapters"].items()
+        }
+        for book in data["books"]
+    }
+
+
+def fixture_verses(
+    chapters_per_book: int = 10,
+    verses_per_chapter: int = 25,
+    seed: int = 0,
+    path: Path = FIXTURE_PATH,
+) -> list[tuple[str, int, int, str]]:
+    """(book, chapter, verse, text) rows: fixture text first, gaps filled with synthetic verses."""
+    fixture = load_fixture(path)
+    rng = random.Random(seed)
+    vocabulary = sorted({word for chapters in fixture.values() for verses in chapters.values()
+                         for text in verses.values() for word in text.split()})
+
+    def synthetic() -> str:
+        return " ".join(rng.choice(vocabulary) for _ in range(rng.randint(8, 30))).capitalize().rstrip(",;:") + "."
+
+    rows = []
+    for book, chapters in fixture.items():
+        chapter_numbers = sorted(set(chapters) | set(range(1, chapters_per_book + 1)))
+        if book == LONGEST_CHAPTER[0]:
+            chapter_numbers = sorted(set(chapter_numbers) | {LONGEST_CHAPTER[1]})
+        for chapter in chapter_numbers:
+            verses = chapters.get(chapter, {})
+            count = LONGEST_CHAPTER[2] if (book, chapter) == LONGEST_CHAPTER[:2] else verses_per_chapter
+            for verse in sorted(set(verses) | set(range(1, count + 1))):
+                rows.append((book, chapter, verse, verses.get(verse) or synthetic()))
+    return rows
+
+
+def _default_encoder() -> Callable[[Sequence[str]], Sequence[Sequence[float]]]:
+    from sentence_transformers import SentenceTransformer
+
+    model = SentenceTransformer("all-MiniLM-L6-v2")
+    return lambda texts: model.encode(list(texts), batch_size=64, show_progress_bar=False)
+
+
+def build_fixture_snapshot(
+    path: str,
+    chapters_per_book: int = 10,
+    verses_per_chapter: int = 25,
+    seed: int = 0,
+    encode: Callable[[Sequence[str]], Sequence[Sequence[float]]] | None = None,
+) -> str:
+    """Write the fixture snapshot to `path` and return its corpus version."""
+    rows = fixture_verses(chapters_per_book, verses_per_chapter, seed)
+    books = [{"id": i, "name": name} for i, name in enumerate(dict.fromkeys(book for book, *_ in rows), start=1)]
+    book_ids = {b["name"]: b["id"] for b in books}
+
+    # Both translations share the text, so each verse is embedded once
+    embeddings = (encode or _default_encoder())([text for *_, text in rows])
+
+    verses = []
+    verse_id = 0
+    for translation in TRANSLATIONS:
+        for (book, chapter, verse, text), embedding in zip(rows, embeddings):
+            verse_id += 1
+            verses.append(SnapshotVerse(
+                verse_id, translation["id"], book_ids[book], chapter, verse, text, [float(x) for x in embedding],
+            ))
+
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    return write_snapshot(path, TRANSLATIONS, books, verses)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path", help="where to write the snapshot")
+    parser.add_argument("--chapters-per-book", type=int, default=10)
+    parser.add_argument("--verses-per-chapter", type=int, default=25)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    version = build_fixture_snapshot(args.path, args.chapters_per_book, args.verses_per_chapter, args.seed)
+    print(f"wrote {args.path} corpus_version={version}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,364 @@
+"""
+Offline benchmark and load-test suite. Needs neither Neon nor Gemini.
+
+    python -m benchmarks.offline                    # micro + load; exit 1 on regression vs benchmarks/baseline.json
+    python -m benchmarks.offline --output results.json
+    python -m benchmarks.offline --save-baseline    # re-record benchmarks/baseline.json
+    python -m benchmarks.offline --no-baseline      # report only
+
+The backend runs in-process with:
+- the fixture snapshot from benchmarks/fixture.py as its database
+  (built on first run)
+- FakeChatModel, scripted to call keyword_search and semantic_search and then
+  answer, with --llm-latency/--llm-jitter injected per turn
+- the real embedding model
+
+The LLM and answer caches are off, so repeated prompts measure real work.
+Micro-benchmarks time single operations. The load driver sends concurrent
+requests through the ASGI app (or to --url). Both report p50/p95/p99 and
+throughput. Each benchmark runs --repeat times and the best run is kept; a
+recorded baseline keeps the median run instead.
+
+Results are compared with the committed baseline, which was built from the
+kjv_sample fixture with the default options. A scenario regresses when its p95
+rises, or its throughput falls, by more than --tolerance and by more than
+--min-delta-ms per request. Scenarios timed mostly by the embedding model
+(encode, semantic search, agent chat) are left out of saved baselines, since
+the model's speed varies far more between installs than the code under test.
+Absolute numbers depend on the machine, so a baseline recorded with different
+run settings or hardware is reported but does not fail the run unless
+--strict is given; re-record it on the machine that runs the check.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import os
+import platform
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Callable
+
+DEFAULT_FIXTURE = ".cache/bench/fixture.snap"
+DEFAULT_BASELINE = str(Path(__file__).parent / "baseline.json")
+# Run settings that must match the baseline's for the comparison to mean anything
+COMPARABLE_META = (
+    "python", "machine", "cpu_count", "llm_latency", "llm_jitter", "concurrency", "requests", "iterations", "repeat",
+)
+# Timed mostly by the embedding model, so never written to a baseline
+MODEL_BOUND_BENCHMARKS = ("embedding_encode", "semantic_search", "load_chat_agent")
+
+CHAT_AGENT_PROMPTS = [
+    "What does the Bible say about fear and courage?",
+    "Help me understand trusting God when I am anxious",
+    "Verses that talk about light overcoming darkness",
+    "What does scripture teach about patience in trials?",
+]
+CHAT_REFERENCE_PROMPTS = ["John 3:16 KJV", "Psalms 23 KJV", "Genesis 1:3 KJV", "Romans 8:28 KJV"]
+CHAT_ROUTED_PROMPTS = ["How many chapters in John (KJV)?", "Compare John 3:16 across translations"]
+
+
+# --- reporting ---------------------------------------------------------------
+
+def summarize(samples: list[float], elapsed: float, errors: int = 0) -> dict:
+    """Latency percentiles (ms) and throughput (per second) for one benchmark."""
+    ordered = sorted(samples)
+
+    def percentile(p: float) -> float:
+        return ordered[min(len(ordered) - 1, int(p * len(ordered)))] * 1000 if ordered else 0.0
+
+    return {
+        "count": len(ordered),
+        "errors": errors,
+        "p50_ms": percentile(0.50),
+        "p95_ms": percentile(0.95),
+        "p99_ms": percentile(0.99),
+        "throughput": len(ordered) / elapsed if elapsed else 0.0,
+    }
+
+
+def print_report(results: dict[str, dict]) -> None:
+    print(f"{'benchmark':<28} {'n':>6} {'err':>4} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'per sec':>10}")
+    for name, r in results.items():
+        print(f"{name:<28} {r['count']:>6} {r['errors']:>4} {r['p50_ms']:>9.2f} {r['p95_ms']:>9.2f} "
+              f"{r['p99_ms']:>9.2f} {r['throughput']:>10.1f}")
+
+
+def best_of(runs: list[dict[str, dict]]) -> dict[str, dict]:
+    """Per benchmark, the repeat with the lowest p95; scheduler noise only ever makes a run slower."""
+    return {name: min((run[name] for run in runs), key=lambda r: r["p95_ms"]) for name in runs[0]}
+
+
+def median_of(runs: list[dict[str, dict]]) -> dict[str, dict]:
+    """Per benchmark, the median repeat by p95. Baselines use this so one lucky run cannot set the bar."""
+    return {name: sorted((run[name] for run in runs), key=lambda r: r["p95_ms"])[len(runs) // 2] for name in runs[0]}
+
+
+def _slower(base_ms: float, ms: float, tolerance: float, min_delta_ms: float) -> bool:
+    return ms > base_ms * (1 + tolerance) and ms - base_ms > min_delta_ms
+
+
+def compare(results: dict[str, dict], baseline: dict[str, dict], tolerance: float, min_delta_ms: float = 0.0) -> list[str]:
+    """Regressions beyond both the relative tolerance and an absolute floor (which keeps sub-ms noise out)."""
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        if _slower(base["p95_ms"], result["p95_ms"], tolerance, min_delta_ms):
+            regressions.append(f"{name}: p95 {base['p95_ms']:.2f}ms -> {result['p95_ms']:.2f}ms")
+        # Throughput compared as time per request, so the same floor applies
+        if result["throughput"] and base["throughput"] and _slower(
+            1000 / base["throughput"], 1000 / result["throughput"], tolerance, min_delta_ms,
+        ):
+            regressions.append(f"{name}: throughput {base['throughput']:.1f}/s -> {result['throughput']:.1f}/s")
+        if result["errors"] > base.get("errors", 0):
+            regressions.append(f"{name}: errors {base.get('errors', 0)} -> {result['errors']}")
+    return regressions
+
+
+# --- environment -------------------------------------------------------------
+
+def configure_environment(args) -> None:
+    """Must run before anything under `backend` is imported: settings are read at import time."""
+    if not os.path.exists(args.fixture) or args.rebuild_fixture:
+        from .fixture import build_fixture_snapshot
+        print(f"building fixture snapshot {args.fixture} ...", file=sys.stderr)
+        build_fixture_snapshot(args.fixture, args.chapters_per_book, args.verses_per_chapter)
+
+    os.environ.update({
+        "CORPUS_SNAPSHOT_PATH": args.fixture,
+        # Present-but-empty, so a developer .env cannot point the run at Neon
+        "NEON_DB_URL": "",
+        "LLM_PROVIDER": "fake",
+        "FAKE_LLM_LATENCY_SECONDS": str(args.llm_latency),
+        "FAKE_LLM_JITTER_SECONDS": str(args.llm_jitter),
+        "LLM_CACHE_ENABLED": "false",
+        "ANSWER_CACHE_ENABLED": "false",
+        "CONVERSATION_STORE_BACKEND": "memory",
+        "TRACE_LOG_SLOW_SECONDS": "1e9",
+    })
+    logging.basicConfig(level=logging.WARNING)
+
+
+def scripted_agent(messages):
+    """Fake model script: one turn of keyword + semantic search, then an answer built from the results."""
+    from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+
+    human = max(i for i, m in enumerate(messages) if isinstance(m, HumanMessage))
+    turn = messages[human + 1:]
+    searched = any(
+        isinstance(m, AIMessage) and m.tool_calls and not m.tool_calls[0]["id"].startswith("prefetch_")
+        for m in turn
+    )
+    if not searched:
+        prompt = str(messages[human].content)
+        keyword = max(prompt.strip("?.!").split(), key=len)
+        return AIMessage(content="", tool_calls=[
+            {"name": "keyword_search", "args": {"query": keyword, "translation": "KJV"}, "id": "bench_keyword", "type": "tool_call"},
+            {"name": "semantic_search", "args": {"verse_text": prompt}, "id": "bench_semantic", "type": "tool_call"},
+        ])
+
+    results = [str(m.content)[:300] for m in turn if isinstance(m, ToolMessage)]
+    return AIMessage(content=f"Found {len(results)} tool results.\n" + "\n\n".join(results))
+
+
+# --- micro-benchmarks --------------------------------------------------------
+
+def _time(fn: Callable[[], object], iterations: int, warmup: int) -> dict:
+    for _ in range(warmup):
+        fn()
+    samples = []
+    start = time.perf_counter()
+    for _ in range(iterations):
+        t = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t)
+    return summarize(samples, time.perf_counter() - start)
+
+
+def micro_benchmarks(iterations: int, warmup: int) -> dict[str, dict]:
+    from backend.ai.agent_tools import encode_text, keyword_search, semantic_search
+    from backend.api.routers.bible import _chapter_payload
+    from backend.db_session import run_in_session
+    from backend.services import sql_service
+    from backend.services.response_cache import dumps
+    from backend.services.scripture_service import find_scripture_references, try_parse_scripture_query
+
+    kjv = run_in_session(sql_service.get_translation, "KJV")
+    john = run_in_session(sql_service.get_book, "John")
+    references = itertools.cycle(["John 3:16", "Psalms 23 (KJV)", "1 Corinthians 13:4", "Romans 8", "not a reference"])
+    prompts = itertools.cycle(["Explain John 3:16 and Romans 8:28 in the KJV", "compare Psalms 23 with Isaiah 41:10"])
+    texts = itertools.cycle(["The LORD is my shepherd", "Be strong and of a good courage", "peace which passeth understanding"])
+    words = itertools.cycle(["light", "fear", "LORD", "patience", "world"])
+    psalm_119 = run_in_session(_chapter_payload, "KJV", "Psalms", 119)
+
+    cases = {
+        "parse_reference": lambda: try_parse_scripture_query(next(references)),
+        "find_references": lambda: find_scripture_references(next(prompts)),
+        "lookup_chapter": lambda: run_in_session(sql_service.get_verses, kjv, john, 1),
+        "lookup_verse": lambda: run_in_session(sql_service.get_verse, kjv, john, 3, 16),
+        "keyword_search": lambda: keyword_search.invoke({"query": next(words), "translation": "KJV"}),
+        "embedding_encode": lambda: encode_text(next(texts)),
+        "semantic_search": lambda: semantic_search.invoke({"verse_text": next(texts)}),
+        "serialize_psalm_119": lambda: dumps(psalm_119),
+    }
+    return {name: _time(fn, iterations, warmup) for name, fn in cases.items()}
+
+
+# --- load driver -------------------------------------------------------------
+
+def _load_scenarios(args) -> dict[str, Callable[[], tuple[str, str, dict | None]]]:
+    from .fixture import fixture_verses
+
+    rng = random.Random(args.seed)
+    rows = fixture_verses(args.chapters_per_book, args.verses_per_chapter)
+    chapters = sorted({(book, chapter) for book, chapter, _, _ in rows})
+
+    def chapter_request():
+        book, chapter = rng.choice(chapters)
+        return "GET", f"/bible/KJV/{book}/{chapter}", None
+
+    def chat(prompts):
+        return lambda: ("POST", "/api/chat", {"prompt": rng.choice(prompts)})
+
+    return {
+        "load_bible_chapter": chapter_request,
+        "load_chat_reference": chat(CHAT_REFERENCE_PROMPTS),
+        "load_chat_routed": chat(CHAT_ROUTED_PROMPTS),
+        "load_chat_agent": chat(CHAT_AGENT_PROMPTS),
+    }
+
+
+async def _drive(client, make_request: Callable[[], tuple[str, str, dict | None]], requests: int, concurrency: int) -> dict:
+    samples: list[float] = []
+    errors = 0
+    remaining = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for _ in remaining:
+            method, path, body = make_request()
+            start = time.perf_counter()
+            try:
+                response = await client.request(method, path, json=body)
+                ok = response.status_code < 400
+            except Exception:
+                ok = False
+            samples.append(time.perf_counter() - start)
+            errors += not ok
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(samples, time.perf_counter() - start, errors)
+
+
+async def load_test(args) -> dict[str, dict]:
+    import httpx
+
+    if args.url:
+        client = httpx.AsyncClient(base_url=args.url, timeout=120)
+    else:
+        from backend.main import app
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=120)
+
+    results = {}
+    async with client:
+        for name, make_request in _load_scenarios(args).items():
+            # Agent requests are far slower; keep the run length comparable across scenarios
+            count = max(args.concurrency, args.requests // 5) if name == "load_chat_agent" else args.requests
+            results[name] = await _drive(client, make_request, count, args.concurrency)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fixture", default=DEFAULT_FIXTURE, help="fixture snapshot path (built if missing)")
+    parser.add_argument("--rebuild-fixture", action="store_true")
+    parser.add_argument("--chapters-per-book", type=int, default=10)
+    parser.add_argument("--verses-per-chapter", type=int, default=25)
+    parser.add_argument("--only", choices=("micro", "load"))
+    parser.add_argument("--iterations", type=int, default=200, help="iterations per micro-benchmark")
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--requests", type=int, default=500, help="requests per load scenario")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="fake model seconds per turn")
+    parser.add_argument("--llm-jitter", type=float, default=0.05)
+    parser.add_argument("--url", help="drive a running server instead of the in-process app (load only)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write results as JSON")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="baseline JSON to compare against; exit 1 on regression")
+    parser.add_argument("--no-baseline", dest="baseline", action="store_const", const=None, help="skip the comparison")
+    parser.add_argument("--save-baseline", nargs="?", const=DEFAULT_BASELINE, help="write these results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="allowed relative p95/throughput change")
+    parser.add_argument("--min-delta-ms", type=float, default=1.0, help="ignore regressions smaller than this")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per benchmark; the best one is reported")
+    parser.add_argument("--strict", action="store_true", help="fail on regressions even when the baseline's run settings differ")
+    args = parser.parse_args()
+
+    configure_environment(args)
+    from backend.ai.model import model
+    model.responses = [scripted_agent]
+
+    runs = []
+    for _ in range(max(1, args.repeat)):
+        run: dict[str, dict] = {}
+        if args.only in (None, "micro") and not args.url:
+            run.update(micro_benchmarks(args.iterations, args.warmup))
+        if args.only in (None, "load"):
+            run.update(asyncio.run(load_test(args)))
+        runs.append(run)
+    results = median_of(runs) if args.save_baseline else best_of(runs)
+
+    print_report(results)
+    document = {
+        "meta": {
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "cpu_count": os.cpu_count(),
+            "llm_latency": args.llm_latency,
+            "llm_jitter": args.llm_jitter,
+            "concurrency": args.concurrency,
+            "requests": args.requests,
+            "iterations": args.iterations,
+            "repeat": args.repeat,
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as fh:
+            json.dump(document, fh, indent=2)
+            fh.write("\n")
+    if args.save_baseline:
+        recorded = {name: r for name, r in results.items() if name not in MODEL_BOUND_BENCHMARKS}
+        with open(args.save_baseline, "w") as fh:
+            json.dump({**document, "results": recorded}, fh, indent=2)
+            fh.write("\n")
+
+    if args.baseline and not args.save_baseline:
+        if not os.path.exists(args.baseline):
+            print(f"\nbaseline {args.baseline} not found; record one with --save-baseline", file=sys.stderr)
+            raise SystemExit(1)
+        with open(args.baseline) as fh:
+            baseline = json.load(fh)
+        differing = [k for k in COMPARABLE_META if baseline["meta"].get(k) != document["meta"][k]]
+        if differing:
+            print(f"\nwarning: baseline recorded with different {', '.join(differing)}; "
+                  "re-record it with --save-baseline on this machine", file=sys.stderr)
+        regressions = compare(results, baseline["results"], args.tolerance, args.min_delta_ms)
+        if regressions:
+            print("\nREGRESSIONS (tolerance {:.0%}):".format(args.tolerance))
+            for line in regressions:
+                print(f"  {line}")
+            if differing and not args.strict:
+                print("not failing: the baseline is from different run settings (use --strict to fail anyway)")
+                return
+            raise SystemExit(1)
+        print(f"\nno regressions against {args.baseline} (tolerance {args.tolerance:.0%})")
+
+
+if __name__ == "__main__":
+    main()
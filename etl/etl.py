@@ -135,17 +135,39 @@ def insert_data_to_db(df):
                 )
                     for _, row in df.iterrows()
                 ]
-                execute_values(cur,
-                               "INSERT INTO verses (book_id, chapter_num, verse_num, verse_text, translation_id, verse_embedding) VALUES %s",
-                               row_data
+                inserted = execute_values(cur,
+                               "INSERT INTO verses (book_id, chapter_num, verse_num, verse_text, translation_id, verse_embedding) VALUES %s RETURNING id",
+                               row_data,
+                               fetch=True
                 )
 
                 conn.commit()
                 print("Inserted data into database")
+                return [row[0] for row in inserted]
     except Exception as e:
         print(f"Error inserting data into database: {e}")
         print(e.with_traceback())
 
+def write_embedding_store(df, verse_ids, path: str, mode: str = "float32"):
+    """
+    Write the compressed verse index used by the backend's semantic_search
+    (EMBEDDING_STORAGE / EMBEDDING_STORE_PATH). Semantic search only covers one
+    translation, so other translations are skipped rather than overwriting its
+    store. Run the ETL from the repo root (`python -m etl.etl`) so the backend
+    package is importable.
+    """
+    from backend.services.embedding_store import EmbeddingStore
+    from backend.schemas.scripture import SEMANTIC_SEARCH_TRANSLATION
+
+    translation = df["translation"].unique()[0]
+    if translation != SEMANTIC_SEARCH_TRANSLATION:
+        print(f"Skipping embedding store: semantic search uses {SEMANTIC_SEARCH_TRANSLATION}, not {translation}")
+        return
+
+    store = EmbeddingStore.encode(verse_ids, df["verse_embedding"].tolist(), mode=mode, translation=translation)
+    store.save(path)
+    print(f"Wrote {mode} embedding store with {len(store)} verses ({store.nbytes} bytes) to {path}")
+
 def insert_translation(conn, translation: str = TRANSLATION_ID.strip()):
     with conn.cursor() as cur:
         cur.execute("SELECT id FROM translations WHERE translation_shortname = %s", [(translation,)])
@@ -172,4 +194,9 @@ if __name__ == "__main__":
 
     generate_embeddings(pd_data)
 
-    insert_data_to_db(pd_data)
+    verse_ids = insert_data_to_db(pd_data)
+
+    # Optional compressed embedding storage (float16 | int8 | binary)
+    store_path = os.getenv("EMBEDDING_STORE_PATH")
+    if store_path and verse_ids:
+        write_embedding_store(pd_data, verse_ids, store_path, os.getenv("EMBEDDING_STORAGE", "float32"))
@@ -0,0 +1,78 @@
+import argparse
+import json
+import os
+
+import psycopg2
+from dotenv import load_dotenv
+
+from backend.services.corpus_snapshot import SnapshotVerse, write_snapshot
+
+# Rows pulled per round trip from the server-side cursor
+FETCH_SIZE: int = 10000
+
+
+def fetch_catalog(conn):
+    with conn.cursor() as cur:
+        cur.execute("SELECT id, translation_shortname, year_written_in, translation_type FROM translations ORDER BY id")
+        translations = [
+            {"id": r[0], "translation_shortname": r[1], "year_written_in": r[2], "translation_type": r[3]}
+            for r in cur.fetchall()
+        ]
+
+        cur.execute("SELECT id, name FROM books ORDER BY id")
+        books = [{"id": r[0], "name": r[1]} for r in cur.fetchall()]
+
+    return translations, books
+
+
+def count_verses(conn) -> int:
+    with conn.cursor() as cur:
+        cur.execute("SELECT count(*) FROM verses")
+        return cur.fetchone()[0]
+
+
+def iter_verses(conn, include_embeddings: bool = True):
+    embedding_column = "verse_embedding::text" if include_embeddings else "NULL"
+    # Named cursor = server-side, so the whole corpus is never buffered client-side at once
+    with conn.cursor(name="snapshot_verses") as cur:
+        cur.itersize = FETCH_SIZE
+        cur.execute(
+            f"SELECT id, translation_id, book_id, chapter_num, verse_num, verse_text, {embedding_column} FROM verses "
+            "ORDER BY translation_id, book_id, chapter_num, verse_num"
+        )
+        for row in cur:
+            yield SnapshotVerse(
+                id=row[0],
+                translation_id=row[1],
+                book_id=row[2],
+                chapter_num=row[3],
+                verse_num=row[4],
+                verse_text=row[5] or "",
+                verse_embedding=json.loads(row[6]) if row[6] else None,
+            )
+
+
+def export_snapshot(path: str, include_embeddings: bool = True):
+    load_dotenv()
+    db_url = os.getenv("NEON_DB_URL")
+    with psycopg2.connect(db_url) as conn:
+        # One consistent view, so the count matches the rows streamed afterwards
+        conn.set_session(isolation_level="REPEATABLE READ", readonly=True)
+        print("Connected to database")
+        translations, books = fetch_catalog(conn)
+        corpus_version = write_snapshot(
+            path, translations, books, iter_verses(conn, include_embeddings), verse_count=count_verses(conn),
+        )
+
+    print(f"Wrote corpus snapshot {corpus_version} to {path} ({os.path.getsize(path)} bytes)")
+    return corpus_version
+
+
+if __name__ == "__main__":
+    # Run from the repo root: python -m etl.snapshot corpus.snap
+    parser = argparse.ArgumentParser(description="Export the corpus to a memory-mapped snapshot file")
+    parser.add_argument("path", help="output snapshot file (served via CORPUS_SNAPSHOT_PATH)")
+    parser.add_argument("--no-embeddings", action="store_true", help="omit the embedding matrix")
+    args = parser.parse_args()
+
+    export_snapshot(args.path, include_embeddings=not args.no_embeddings)
@@ -0,0 +1,10 @@
+import os
+import tempfile
+
+# Settings are read at import time, so point everything at throwaway paths and
+# the offline model before any backend module is imported.
+_cache_dir = tempfile.mkdtemp(prefix="bible-io-tests-")
+os.environ.setdefault("CORPUS_SNAPSHOT_PATH", os.path.join(_cache_dir, "corpus.snap"))
+os.environ.setdefault("LLM_PROVIDER", "fake")
+os.environ.setdefault("LLM_CACHE_PATH", os.path.join(_cache_dir, "llm_cache.sqlite3"))
+os.environ.setdefault("CONVERSATION_STORE_PATH", os.path.join(_cache_dir, "conversations.sqlite3"))
@@ -0,0 +1,105 @@
+import asyncio
+
+import pytest
+
+from backend.services.admission import AdmissionController, AdmissionRejected
+
+
+def _controller(max_concurrent=1, max_queue=1, queue_timeout=1.0):
+    return AdmissionController(max_concurrent=max_concurrent, max_queue=max_queue, queue_timeout=queue_timeout, retry_after=3)
+
+
+def test_full_queue_rejects_with_429():
+    async def scenario():
+        controller = _controller()
+        await controller.acquire()
+        queued = asyncio.ensure_future(controller.acquire())
+        await asyncio.sleep(0)
+
+        with pytest.raises(AdmissionRejected) as rejected:
+            await controller.acquire()
+        assert (rejected.value.status_code, rejected.value.retry_after) == (429, 3)
+        assert controller.counts["rejected_queue_full"] == 1
+
+        controller.release()
+        await queued
+        controller.release()
+        assert controller.in_flight == 0
+
+    asyncio.run(scenario())
+
+
+def test_queue_timeout_rejects_with_503():
+    async def scenario():
+        controller = _controller(queue_timeout=0.05)
+        await controller.acquire()
+
+        with pytest.raises(AdmissionRejected) as rejected:
+            await controller.acquire()
+        assert rejected.value.status_code == 503
+        assert controller.counts["rejected_timeout"] == 1
+        assert controller.queue_depth == 0
+
+        # The timed-out waiter must not receive the slot
+        controller.release()
+        assert controller.in_flight == 0
+
+    asyncio.run(scenario())
+
+
+def test_cancel_while_queued_gives_up_its_place():
+    async def scenario():
+        controller = _controller(max_queue=2)
+        await controller.acquire()
+        cancelled = asyncio.ensure_future(controller.acquire())
+        waiting = asyncio.ensure_future(controller.acquire())
+        await asyncio.sleep(0)
+        assert controller.queue_depth == 2
+
+        cancelled.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await cancelled
+        assert controller.queue_depth == 1
+
+        controller.release()
+        await waiting
+        assert controller.in_flight == 1
+        controller.release()
+        assert controller.in_flight == 0
+
+    asyncio.run(scenario())
+
+
+def test_release_hands_slot_to_waiters_in_order():
+    async def scenario():
+        controller = _controller(max_queue=2)
+        order = []
+
+        async def request(name):
+            async with controller.admit():
+                order.append(name)
+                await asyncio.sleep(0.01)
+
+        await asyncio.gather(request("first"), request("second"), request("third"))
+        assert order == ["first", "second", "third"]
+        assert controller.in_flight == 0
+        assert controller.counts["admitted"] == 3 and controller.counts["queued"] == 2
+
+    asyncio.run(scenario())
+
+
+def test_slot_granted_then_cancelled_is_released():
+    async def scenario():
+        controller = _controller()
+        await controller.acquire()
+        waiting = asyncio.ensure_future(controller.acquire())
+        await asyncio.sleep(0)
+
+        # The slot is handed over, but the waiter is cancelled before it resumes
+        controller.release()
+        waiting.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiting
+        assert controller.in_flight == 0
+
+    asyncio.run(scenario())
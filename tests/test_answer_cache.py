@@ -0,0 +1,50 @@
+import numpy as np
+
+from backend.ai.answer_cache import AnswerCache
+
+
+class CountingEncoder:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, text):
+        self.calls += 1
+        # Prompts about the same topic share a direction
+        vector = np.zeros(8, dtype=np.float32)
+        vector[hash(text.split()[-1]) % 8] = 1.0
+        vector[0] += 0.1
+        return vector
+
+
+def make_cache(encode):
+    return AnswerCache(encode, threshold=0.9, ttl_seconds=3600, max_entries=10)
+
+
+def test_miss_then_store_encodes_once():
+    encode = CountingEncoder()
+    cache = make_cache(encode)
+
+    cached, embedding = cache.probe("What does the Bible say about hope?")
+    assert cached is None and embedding is not None
+    cache.store("What does the Bible say about hope?", "answer", embedding)
+
+    assert encode.calls == 1
+
+
+def test_exact_and_semantic_hits():
+    encode = CountingEncoder()
+    cache = make_cache(encode)
+    cache.store("What does the Bible say about hope", "hope answer")
+
+    cached, _ = cache.probe("what does the bible say about hope?")
+    assert cached.kind == "exact"
+
+    cached, _ = cache.probe("Tell me scripture on hope")
+    assert cached.kind == "semantic" and cached.answer == "hope answer"
+
+
+def test_different_verse_numbers_never_match():
+    cache = make_cache(CountingEncoder())
+    cache.store("Explain John 3:16", "3:16 answer")
+    cached, embedding = cache.probe("Explain John 3:17")
+    assert cached is None and embedding is not None
@@ -0,0 +1,36 @@
+import pytest
+
+from backend.ai.answer_cache import AnswerCache
+from backend.api.routers import chat
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    cache = AnswerCache(lambda text: [1.0, 0.0], threshold=0.9, ttl_seconds=60, max_entries=10)
+    monkeypatch.setattr(chat, "answer_cache", cache)
+    monkeypatch.setattr(chat, "ANSWER_CACHE_ENABLED", True)
+    return cache
+
+
+def _agent_returns(monkeypatch, **usage):
+    report = {"deadline_exceeded": False, "fallback_calls": 0, **usage}
+    monkeypatch.setattr(chat, "run_prompt", lambda prompt, conversation_id: ("answer", report))
+
+
+def test_complete_answer_is_cached(cache, monkeypatch):
+    _agent_returns(monkeypatch)
+    chat._answer_prompt("Who was Moses?", None)
+    assert cache.lookup("Who was Moses?").answer == "answer"
+
+
+@pytest.mark.parametrize("usage", [{"deadline_exceeded": True}, {"fallback_calls": 1}])
+def test_degraded_answer_is_not_cached(cache, monkeypatch, usage):
+    _agent_returns(monkeypatch, **usage)
+    chat._answer_prompt("Who was Moses?", None)
+    assert cache.lookup("Who was Moses?") is None
+
+
+def test_conversation_answer_is_not_cached(cache, monkeypatch):
+    _agent_returns(monkeypatch)
+    chat._answer_prompt("And his brother?", "conversation-1")
+    assert cache.lookup("And his brother?") is None
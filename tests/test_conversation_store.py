@@ -0,0 +1,30 @@
+import pytest
+
+from backend.ai.conversation_store import (
+    Conversation,
+    ConversationStore,
+    InMemoryConversationStore,
+    SqliteConversationStore,
+)
+
+
+def test_incomplete_backend_fails_at_construction():
+    class LoadOnly(ConversationStore):
+        def load(self, conversation_id):
+            return Conversation([], "")
+
+    with pytest.raises(TypeError):
+        LoadOnly()
+
+
+@pytest.mark.parametrize("make_store", [
+    InMemoryConversationStore,
+    lambda: SqliteConversationStore(path=":memory:"),
+])
+def test_append_exchange_round_trip(make_store):
+    store = make_store()
+    store.append_exchange("c1", "John 3:16", "For God so loved the world")
+    messages = store.load("c1").messages
+    assert [m.content for m in messages] == ["John 3:16", "For God so loved the world"]
+    store.delete("c1")
+    assert store.load("c1") == Conversation([], "")
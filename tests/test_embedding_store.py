@@ -0,0 +1,23 @@
+import numpy as np
+import pytest
+
+from backend.services.embedding_store import EMBEDDING_STORAGE_MODES, EmbeddingStore
+
+
+@pytest.mark.parametrize("mode", EMBEDDING_STORAGE_MODES)
+def test_save_load_keeps_translation(tmp_path, mode):
+    rng = np.random.default_rng(0)
+    store = EmbeddingStore.encode([10, 11, 12], rng.standard_normal((3, 16)), mode=mode, translation="BSB")
+    path = str(tmp_path / "store.npz")
+    store.save(path)
+
+    loaded = EmbeddingStore.load(path)
+    assert (loaded.mode, loaded.translation) == (mode, "BSB")
+    assert loaded.ids.tolist() == [10, 11, 12]
+
+
+def test_store_saved_without_translation_loads_as_unknown(tmp_path):
+    path = str(tmp_path / "legacy.npz")
+    np.savez(path, mode=np.array("float32"), ids=np.arange(2), codes=np.eye(2, dtype=np.float32),
+             dims=np.array(2), scale=np.empty(0, dtype=np.float32))
+    assert EmbeddingStore.load(path).translation is None
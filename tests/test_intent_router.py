@@ -0,0 +1,50 @@
+import pytest
+
+from backend.ai.intent_router import intent_router
+from backend.services import snapshot_service
+from backend.services.corpus_snapshot import CorpusSnapshot, SnapshotVerse, write_snapshot
+
+
+@pytest.fixture(autouse=True)
+def snapshot(tmp_path, monkeypatch):
+    verses = [
+        SnapshotVerse(4, 1, 19, 23, 1, "The LORD is my shepherd"),
+        SnapshotVerse(5, 1, 22, 1, 1, "The song of songs, which is Solomon's"),
+        SnapshotVerse(6, 1, 22, 2, 1, "I am the rose of Sharon"),
+        SnapshotVerse(1, 1, 43, 1, 1, "In the beginning was the Word"),
+        SnapshotVerse(2, 1, 43, 2, 1, "And the third day there was a marriage"),
+        SnapshotVerse(3, 1, 43, 3, 16, "For God so loved the world"),
+    ]
+    path = str(tmp_path / "corpus.snap")
+    write_snapshot(
+        path,
+        translations=[{"id": 1, "translation_shortname": "KJV"}, {"id": 2, "translation_shortname": "BSB"}],
+        books=[{"id": 19, "name": "Psalms"}, {"id": 22, "name": "Song of Solomon"}, {"id": 43, "name": "John"}],
+        verses=verses,
+    )
+    snapshot = CorpusSnapshot(path)
+    monkeypatch.setattr(snapshot_service, "_snapshot", snapshot)
+    yield snapshot
+    snapshot.close()
+
+
+@pytest.mark.parametrize("prompt, answer", [
+    ("How many chapters in John (KJV)?", "John (KJV) has 3 chapters."),
+    ("how many chapters does psalm have in kjv", "Psalms (KJV) has 1 chapter."),
+    ("How many chapters in Song of Solomon (KJV)?", "Song of Solomon (KJV) has 2 chapters."),
+    ("how many chapters are in the book of song of songs in the KJV", "Song of Solomon (KJV) has 2 chapters."),
+])
+def test_how_many_chapters_answers_with_count(prompt, answer):
+    assert intent_router.route(prompt) == answer
+
+
+def test_chapters_of_lists_them():
+    assert intent_router.route("chapters of John in KJV") == "John (KJV) has chapters: 1, 2, 3"
+
+
+def test_unknown_book_falls_back_to_agent():
+    assert intent_router.route("how many chapters in Jasher (KJV)?") is None
+
+
+def test_unknown_uppercase_word_is_not_a_translation():
+    assert intent_router.classify("chapters of John AND") is None
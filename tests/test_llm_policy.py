@@ -0,0 +1,156 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langchain_core.tools import tool
+
+from backend.ai import graph as agent_graph
+from backend.ai import llm_policy
+from backend.ai.deadline import deadline_scope
+from backend.ai.fake_model import FakeChatModel
+from backend.ai.token_budget import usage_report
+
+
+@tool
+def fast_lookup(reference: str) -> str:
+    """Return verse text immediately."""
+    return "In the beginning God created the heaven and the earth."
+
+
+@tool
+def slow_lookup(reference: str) -> str:
+    """Return verse text after the deadline has passed."""
+    time.sleep(1.0)
+    return "too late"
+
+
+def _tool_call(name: str, call_id: str) -> AIMessage:
+    return AIMessage(content="", tool_calls=[{"name": name, "args": {"reference": "Genesis 1:1"}, "id": call_id}])
+
+
+def _fail(messages):
+    raise RuntimeError("primary model unavailable")
+
+
+@pytest.fixture
+def hedge_after_50ms(monkeypatch):
+    tracker = llm_policy.LatencyTracker()
+    for _ in range(llm_policy.LLM_HEDGE_MIN_SAMPLES):
+        tracker.record(llm_policy.MODEL_NAME, 0.05)
+    monkeypatch.setattr(llm_policy, "latencies", tracker)
+    monkeypatch.setattr(llm_policy, "LLM_HEDGE_ENABLED", True)
+    monkeypatch.setattr(llm_policy, "LLM_HEDGE_MIN_DELAY_SECONDS", 0.05)
+
+
+@pytest.fixture
+def agent(monkeypatch):
+    monkeypatch.setattr(agent_graph, "tools_by_name", {"fast_lookup": fast_lookup, "slow_lookup": slow_lookup})
+    return agent_graph.graph.compile()
+
+
+def _run(agent, prompt="Explain Genesis 1:1"):
+    return agent.invoke({
+        "messages": [HumanMessage(content=prompt)],
+        "token_usage": [],
+        "tool_memo": {},
+        "tool_timings": [],
+    })
+
+
+def test_hedge_fires_after_delay_and_first_response_wins(hedge_after_50ms):
+    # The first call stalls; the hedged duplicate (second call) answers quickly
+    primary = FakeChatModel(responses=["slow answer", "hedged answer"], latency_fn=lambda i: 0.5 if i == 0 else 0.0)
+    before = llm_policy.stats()["hedge_won"]
+
+    start = time.monotonic()
+    response, report = llm_policy.invoke_with_policy(primary, [HumanMessage(content="hi")], name=llm_policy.MODEL_NAME)
+
+    assert response.content == "hedged answer"
+    assert report["hedged"] and not report["fallback"]
+    assert primary.calls == 2
+    assert time.monotonic() - start < 0.4
+    assert llm_policy.stats()["hedge_won"] == before + 1
+
+
+def test_queued_hedge_is_cancelled_on_timeout(hedge_after_50ms, monkeypatch):
+    # With one worker the hedge queues behind the stalled primary and must never run
+    executor = ThreadPoolExecutor(max_workers=1)
+    monkeypatch.setattr(llm_policy, "_executor", executor)
+    primary = FakeChatModel(responses=["late answer"], latency=0.3)
+
+    with pytest.raises(TimeoutError):
+        llm_policy.invoke_with_policy(primary, [HumanMessage(content="hi")], name=llm_policy.MODEL_NAME, timeout=0.15)
+
+    executor.shutdown(wait=True)
+    assert primary.calls == 1
+
+
+def test_no_hedge_without_latency_history():
+    primary = FakeChatModel(responses=["only answer"], latency=0.05)
+    response, report = llm_policy.invoke_with_policy(primary, [HumanMessage(content="hi")], name="unseen-model")
+    assert response.content == "only answer"
+    assert not report["hedged"]
+    assert primary.calls == 1
+
+
+def test_fallback_on_primary_error():
+    primary = FakeChatModel(responses=[_fail])
+    fallback = FakeChatModel(responses=["backup answer"])
+
+    response, report = llm_policy.invoke_with_policy(
+        primary, [HumanMessage(content="hi")], name="primary", fallback=fallback, fallback_name="backup",
+    )
+
+    assert response.content == "backup answer"
+    assert report["fallback"] and report["model"] == "backup"
+
+
+def test_primary_error_without_fallback_raises():
+    with pytest.raises(RuntimeError):
+        llm_policy.invoke_with_policy(FakeChatModel(responses=[_fail]), [HumanMessage(content="hi")], name="primary")
+
+
+def test_deadline_returns_partial_answer(agent, monkeypatch):
+    # One tool finishes, the other is still running when the deadline passes
+    calls = AIMessage(content="", tool_calls=[
+        {"name": "fast_lookup", "args": {"reference": "Genesis 1:1"}, "id": "fast"},
+        {"name": "slow_lookup", "args": {"reference": "Genesis 1:1"}, "id": "slow"},
+    ])
+    monkeypatch.setattr(agent_graph, "model_with_tools", FakeChatModel(responses=[calls, "never reached"]))
+
+    with deadline_scope(0.3):
+        result = _run(agent)
+
+    tool_messages = {m.tool_call_id: m for m in result["messages"] if isinstance(m, ToolMessage)}
+    assert tool_messages["slow"].status == "error"
+    assert "deadline passed" in tool_messages["slow"].content
+    assert tool_messages["fast"].status != "error"
+
+    answer = result["messages"][-1].content
+    assert answer.startswith("I ran out of time")
+    assert "In the beginning" in answer and "too late" not in answer
+
+    report = usage_report(result["token_usage"])
+    assert report["deadline_exceeded"] is True
+    assert report["hedged_calls"] == 0 and report["fallback_calls"] == 0
+
+
+def test_usage_counts_hedged_and_fallback_turns(agent, monkeypatch, hedge_after_50ms):
+    # Turn 1: call 0 stalls and its hedge (call 1) returns the tool call.
+    # Turn 2: call 2 fails and the fallback model writes the answer.
+    primary = FakeChatModel(
+        responses=[_tool_call("fast_lookup", "a"), _tool_call("fast_lookup", "a"), _fail],
+        latency_fn=lambda i: 0.5 if i == 0 else 0.0,
+    )
+    monkeypatch.setattr(agent_graph, "model_with_tools", primary)
+    monkeypatch.setattr(agent_graph, "fallback_with_tools", FakeChatModel(responses=["final answer"]))
+
+    result = _run(agent)
+
+    assert result["messages"][-1].content == "final answer"
+    report = usage_report(result["token_usage"])
+    assert report["llm_turns"] == 2
+    assert report["hedged_calls"] == 1
+    assert report["fallback_calls"] == 1
+    assert report["deadline_exceeded"] is False
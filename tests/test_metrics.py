@@ -0,0 +1,24 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.main import TRACE_ID_HEADER, app
+from backend.services.metrics import accept_trace_id
+
+
+@pytest.mark.parametrize("supplied", ["abc123", "4bf92f35-77b3-4da6-a3ce-929d0e0e4736", "a" * 64])
+def test_valid_trace_id_is_kept(supplied):
+    assert accept_trace_id(supplied) == supplied
+
+
+@pytest.mark.parametrize("supplied", [None, "", "a" * 65, "id\nforged log line", "id with spaces", "ünï"])
+def test_invalid_trace_id_is_replaced(supplied):
+    trace_id = accept_trace_id(supplied)
+    assert trace_id != supplied
+    assert accept_trace_id(trace_id) == trace_id
+
+
+def test_response_echoes_only_valid_trace_ids():
+    client = TestClient(app)
+    assert client.get("/", headers={TRACE_ID_HEADER: "client-42"}).headers[TRACE_ID_HEADER] == "client-42"
+    replaced = client.get("/", headers={TRACE_ID_HEADER: "x" * 200}).headers[TRACE_ID_HEADER]
+    assert len(replaced) <= 64 and replaced != "x" * 200
@@ -0,0 +1,15 @@
+from backend.ai import prefetch
+from backend.services.snapshot_service import VerseRow
+
+
+def test_tool_call_ids_unique_across_turns(monkeypatch):
+    row = VerseRow(id=1, chapter_num=3, verse_num=16, verse_text="For God so loved the world",
+                   translation_shortname="BSB", name="John")
+    monkeypatch.setattr(prefetch, "get_verses_for_references", lambda references, session: [row])
+
+    first = prefetch.prefetch_messages("John 3:16")
+    second = prefetch.prefetch_messages("John 3:16")
+
+    ids = [call["id"] for call in first[0].tool_calls + second[0].tool_calls]
+    assert len(set(ids)) == 2
+    assert first[1].tool_call_id == first[0].tool_calls[0]["id"]
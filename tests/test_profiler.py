@@ -0,0 +1,27 @@
+from backend.services import profiler
+
+
+def test_authorized_requires_token_when_configured(monkeypatch):
+    monkeypatch.setattr(profiler, "PROFILING_ENABLED", True)
+    monkeypatch.setattr(profiler, "PROFILING_TOKEN", "s3cret")
+    assert profiler.authorized("s3cret")
+    assert not profiler.authorized("1")
+    assert not profiler.authorized(None)
+
+
+def test_disabled_never_authorizes(monkeypatch):
+    monkeypatch.setattr(profiler, "PROFILING_ENABLED", False)
+    monkeypatch.setattr(profiler, "PROFILING_TOKEN", "")
+    assert not profiler.authorized("1")
+    assert not profiler.requested("/bible/KJV/John/3", "1")
+
+
+def test_profile_ids_are_server_generated(monkeypatch, tmp_path):
+    monkeypatch.setattr(profiler, "PROFILE_DIR", tmp_path)
+    first = profiler.finish(profiler.begin())
+    second = profiler.finish(profiler.begin())
+    assert first != second
+    assert profiler.profile_path(first) == tmp_path / f"{first}.collapsed"
+    # Caller-chosen trace ids and path tricks never resolve
+    assert profiler.profile_path("my-trace-id") is None
+    assert profiler.profile_path("../" + first) is None
@@ -0,0 +1,32 @@
+import gzip
+
+from backend.services.http_cache import compress
+from backend.services.response_cache import CachedBody, ResponseCache, dumps
+
+
+def test_encoding_is_compressed_once():
+    calls = []
+
+    def counting_compress(body, encoding):
+        calls.append(encoding)
+        return compress(body, encoding)
+
+    cached = CachedBody(dumps({"verse": "In the beginning"}))
+    assert cached.ready(None) == cached.body
+    assert cached.ready("gzip") is None
+
+    encoded = cached.encoded("gzip", counting_compress)
+    assert gzip.decompress(encoded) == cached.body
+    assert cached.ready("gzip") == encoded
+    cached.encoded("gzip", counting_compress)
+    assert calls == ["gzip"]
+
+
+def test_cache_evicts_least_recently_used():
+    cache = ResponseCache(max_entries=2)
+    cache.put("a", b"1")
+    cache.put("b", b"2")
+    cache.get("a")
+    cache.put("c", b"3")
+    assert cache.get("b") is None
+    assert cache.get("a").body == b"1"
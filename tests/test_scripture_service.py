@@ -0,0 +1,79 @@
+import pytest
+
+from backend.services.scripture_service import find_scripture_references, normalize_book_name
+
+
+def refs(text):
+    return [(r.book, r.chapter, r.verse, r.translation) for r in find_scripture_references(text)]
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("Explain 1 John 4:8", [("1 John", 4, 8, "BSB")]),
+    ("what does 2 Timothy 3:16 mean", [("2 Timothy", 3, 16, "BSB")]),
+    ("compare 1john 2 with John 2", [("1 John", 2, None, "BSB"), ("John", 2, None, "BSB")]),
+    ("3 John 1:4 and 1 Corinthians 13", [("3 John", 1, 4, "BSB"), ("1 Corinthians", 13, None, "BSB")]),
+    ("read song of solomon 2:4", [("Song of Solomon", 2, 4, "BSB")]),
+])
+def test_numbered_and_multi_word_books(text, expected):
+    assert refs(text) == expected
+
+
+@pytest.mark.parametrize("text, translation", [
+    ("romans 8:28 kjv", "KJV"),
+    ("Romans 8:28 (kjv)", "KJV"),
+    ("Romans 8:28 in KJV", "KJV"),
+    ("Romans 8:28 in the esv", "ESV"),
+    ("Romans 8:28 XYZ", "BSB"),
+    ("Romans 8:28 is about hope", "BSB"),
+])
+def test_translation_detection(text, translation):
+    assert refs(text) == [("Romans", 8, 28, translation)]
+
+
+@pytest.mark.parametrize("text", [
+    "I have 3 questions about 40 days",
+    "Explain 1 thing to me",
+    "Johnny 5 is alive",
+    "what happened in 1 year",
+    "I lost my job 3 days ago, give me verses about comfort",
+    "mark 2 verses as favourites",
+    "the acts 2 friends did were kind",
+])
+def test_numbers_without_reference(text):
+    assert refs(text) == []
+
+
+def test_duplicates_collapse():
+    assert refs("John 3:16, then John 3:16 again") == [("John", 3, 16, "BSB")]
+
+
+def test_normalize_book_name():
+    assert normalize_book_name("1john") == "1 John"
+    assert normalize_book_name("SONG  OF solomon") == "Song of Solomon"
+
+
+@pytest.mark.parametrize("alias, name", [
+    ("psalm", "Psalms"),
+    ("Psalms", "Psalms"),
+    ("song of songs", "Song of Solomon"),
+    ("Revelations", "Revelation"),
+])
+def test_normalize_book_aliases(alias, name):
+    assert normalize_book_name(alias) == name
+
+
+def test_alias_in_reference():
+    assert refs("Psalm 23:1 kjv") == [("Psalms", 23, 1, "KJV")]
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("Read Job 3", [("Job", 3, None, "BSB")]),
+    ("what does job 3:1 say", [("Job", 3, 1, "BSB")]),
+    ("acts 2:38", [("Acts", 2, 38, "BSB")]),
+])
+def test_ambiguous_books_need_capital_or_verse(text, expected):
+    assert refs(text) == expected
+
+
+def test_uppercase_word_is_not_a_translation():
+    assert refs("John 3:16 AND Romans 8:28") == [("John", 3, 16, "BSB"), ("Romans", 8, 28, "BSB")]
@@ -0,0 +1,170 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from backend.services.single_flight import AsyncSingleFlight, SingleFlight, make_key
+
+
+def test_make_key_ignores_keyword_order():
+    assert make_key("lookup", "John", chapter=3, verse=16) == make_key("lookup", "John", verse=16, chapter=3)
+    assert make_key("lookup", "John") != make_key("lookup", "john")
+
+
+# --- AsyncSingleFlight -------------------------------------------------------
+
+def test_async_concurrent_callers_share_one_execution():
+    async def scenario():
+        flight = AsyncSingleFlight()
+        calls = 0
+
+        async def fn():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return calls
+
+        results = await asyncio.gather(*(flight.do("key", fn) for _ in range(5)))
+        assert results == [1] * 5
+        assert calls == 1 and flight.shared == 4
+
+        # Finished calls are not cached
+        assert await flight.do("key", fn) == 2
+
+    asyncio.run(scenario())
+
+
+def test_async_exception_reaches_every_waiter():
+    async def scenario():
+        flight = AsyncSingleFlight()
+
+        async def fn():
+            await asyncio.sleep(0.01)
+            raise ValueError("lookup failed")
+
+        results = await asyncio.gather(*(flight.do("key", fn) for _ in range(3)), return_exceptions=True)
+        assert all(isinstance(r, ValueError) for r in results)
+
+    asyncio.run(scenario())
+
+
+def test_async_caller_timeout_leaves_leader_running():
+    async def scenario():
+        flight = AsyncSingleFlight()
+        finished = asyncio.Event()
+
+        async def fn():
+            await asyncio.sleep(0.1)
+            finished.set()
+            return "done"
+
+        with pytest.raises(TimeoutError):
+            await flight.do("key", fn, timeout=0.01)
+        # A later caller joins the same run instead of starting another
+        assert await flight.do("key", fn, timeout=1) == "done"
+        assert finished.is_set() and flight.shared == 1
+
+    asyncio.run(scenario())
+
+
+def test_async_leader_cancellation_is_shielded():
+    async def scenario():
+        flight = AsyncSingleFlight()
+
+        async def fn():
+            await asyncio.sleep(0.05)
+            return "done"
+
+        leader = asyncio.ensure_future(flight.do("key", fn))
+        follower = asyncio.ensure_future(flight.do("key", fn))
+        await asyncio.sleep(0)
+
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        assert await follower == "done"
+
+    asyncio.run(scenario())
+
+
+# --- SingleFlight ------------------------------------------------------------
+
+def test_threads_share_one_execution():
+    flight = SingleFlight()
+    calls = 0
+    started = threading.Event()
+
+    def fn():
+        nonlocal calls
+        calls += 1
+        started.set()
+        time.sleep(0.05)
+        return "verse"
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        leader = pool.submit(flight.do, "key", fn)
+        started.wait()
+        followers = [pool.submit(flight.do, "key", fn) for _ in range(3)]
+        results = [leader.result()] + [f.result() for f in followers]
+
+    assert results == ["verse"] * 4
+    assert calls == 1 and flight.shared == 3
+
+
+def test_thread_exception_reaches_every_waiter():
+    flight = SingleFlight()
+    started = threading.Event()
+
+    def fn():
+        started.set()
+        time.sleep(0.05)
+        raise ValueError("lookup failed")
+
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        leader = pool.submit(flight.do, "key", fn)
+        started.wait()
+        followers = [pool.submit(flight.do, "key", fn) for _ in range(2)]
+        for future in [leader, *followers]:
+            with pytest.raises(ValueError):
+                future.result()
+
+
+def test_thread_follower_timeout_leaves_leader_running():
+    flight = SingleFlight()
+    started = threading.Event()
+
+    def fn():
+        started.set()
+        time.sleep(0.1)
+        return "verse"
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        leader = pool.submit(flight.do, "key", fn)
+        started.wait()
+        with pytest.raises(TimeoutError):
+            flight.do("key", fn, timeout=0.01)
+        assert leader.result() == "verse"
+
+
+def test_wrap_coalesces_equal_arguments():
+    flight = SingleFlight()
+    calls = []
+    started = threading.Event()
+
+    @flight.wrap("lookup")
+    def lookup(book, chapter):
+        calls.append((book, chapter))
+        started.set()
+        time.sleep(0.05)
+        return f"{book} {chapter}"
+
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        first = pool.submit(lookup, "John", 3)
+        started.wait()
+        same = pool.submit(lookup, "John", 3)
+        other = pool.submit(lookup, "John", 4)
+        assert (first.result(), same.result(), other.result()) == ("John 3", "John 3", "John 4")
+
+    assert sorted(calls) == [("John", 3), ("John", 4)]
@@ -0,0 +1,96 @@
+import numpy as np
+import pytest
+
+from backend.schemas.models import Book, Translation
+from backend.services import snapshot_service
+from backend.services.corpus_snapshot import CorpusSnapshot, SnapshotVerse, verse_key, write_snapshot
+
+
+@pytest.fixture
+def snapshot(tmp_path, monkeypatch):
+    # Ids are deliberately out of key order, the way a re-imported book would be
+    verses = [
+        SnapshotVerse(30, 1, 1, 1, 1, "gen 1:1", [1.0, 0.0]),
+        SnapshotVerse(10, 1, 1, 1, 2, "gen 1:2", [0.0, 1.0]),
+        SnapshotVerse(20, 1, 2, 1, 1, "exo 1:1", [0.6, 0.8]),
+        SnapshotVerse(5, 1, 2, 1, 2, "exo 1:2", [0.8, 0.6]),
+        SnapshotVerse(40, 1, 2, 2, 1, "exo 2:1", [-1.0, 0.0]),
+        SnapshotVerse(1, 2, 2, 1, 1, "other translation", [1.0, 0.0]),
+    ]
+    path = str(tmp_path / "corpus.snap")
+    write_snapshot(
+        path,
+        translations=[{"id": 1, "translation_shortname": "BSB"}, {"id": 2, "translation_shortname": "KJV"}],
+        books=[{"id": 1, "name": "Genesis"}, {"id": 2, "name": "Exodus"}],
+        verses=iter(verses),
+        verse_count=len(verses),
+        dims=2,
+    )
+    snapshot = CorpusSnapshot(path)
+    monkeypatch.setattr(snapshot_service, "_snapshot", snapshot)
+    yield snapshot
+    snapshot.close()
+
+
+def _ids(verses):
+    return [v.id for v in verses]
+
+
+def test_iter_verses_book_in_id_order(snapshot):
+    verses = snapshot_service.iter_verses(Translation(id=1, translation_shortname="BSB"), None, book=Book(id=2, name="Exodus"))
+    assert _ids(verses) == [5, 20, 40]
+
+
+def test_iter_verses_translation_in_id_order(snapshot):
+    verses = snapshot_service.iter_verses(Translation(id=1, translation_shortname="BSB"), None)
+    assert _ids(verses) == [5, 10, 20, 30, 40]
+
+
+def test_iter_verses_resumes_from_verse_id(snapshot):
+    translation = Translation(id=1, translation_shortname="BSB")
+    assert _ids(snapshot_service.iter_verses(translation, None, from_id=11)) == [20, 30, 40]
+    assert _ids(snapshot_service.iter_verses(translation, None, book=Book(id=1, name="Genesis"), from_id=11)) == [30]
+    assert _ids(snapshot_service.iter_verses(translation, None, from_id=41)) == []
+
+
+def test_semantic_search_ranks_within_translation(snapshot):
+    rows = snapshot_service.get_semantic_similar_verses([1.0, 0.1], None, limit=3)
+    assert [row.id for row in rows] == [30, 5, 20]
+    assert all(row.translation_shortname == "BSB" for row in rows)
+
+
+def test_out_of_range_chapter_finds_nothing(snapshot):
+    translation, book = Translation(id=1, translation_shortname="BSB"), Book(id=1, name="Genesis")
+    assert snapshot_service.get_verses(translation, book, 5000, None) == []
+    assert snapshot_service.get_verse(translation, book, 1, -1, None) is None
+
+
+def test_write_snapshot_requires_key_order(tmp_path):
+    verses = [SnapshotVerse(1, 1, 2, 1, 1, "later"), SnapshotVerse(2, 1, 1, 1, 1, "earlier")]
+    with pytest.raises(ValueError, match="ordered"):
+        write_snapshot(str(tmp_path / "c.snap"), [], [], verses)
+
+
+@pytest.mark.parametrize("verse", [
+    SnapshotVerse(1, 1, 256, 1, 1, "book id too large"),
+    SnapshotVerse(1, 1, 1, 4096, 1, "chapter too large"),
+    SnapshotVerse(1, 1, 1, 1, 4096, "verse too large"),
+])
+def test_write_snapshot_rejects_keys_that_would_collide(tmp_path, verse):
+    with pytest.raises(ValueError, match="does not fit"):
+        write_snapshot(str(tmp_path / "c.snap"), [], [], [verse])
+
+
+def test_write_snapshot_checks_verse_count(tmp_path):
+    with pytest.raises(ValueError, match="expected 2"):
+        write_snapshot(str(tmp_path / "c.snap"), [], [], iter([SnapshotVerse(1, 1, 1, 1, 1, "only one")]), verse_count=2)
+
+
+def test_verse_key_accepts_exclusive_end_only():
+    assert verse_key(1, 1, 4096) == verse_key(1, 2)
+    with pytest.raises(ValueError):
+        verse_key(1, 1, 4097)
+
+
+def test_embeddings_are_normalized(snapshot):
+    assert np.allclose(np.linalg.norm(snapshot.embeddings, axis=1), 1.0)